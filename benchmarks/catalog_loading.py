@@ -0,0 +1,133 @@
+"""JSONL 주제 목록의 적재 시간·메모리와 재사용 대기 조회 시간을 목록 크기별로 잰다.
+
+    python benchmarks/catalog_loading.py [--sizes 10000 100000] [--recent 30]
+
+비교 기준은 예전처럼 모든 줄을 TopicPlan으로 만들어 튜플에 담고 SequenceMatcher로 전수 비교하는 방식이다.
+전수 비교는 오래 걸리므로 --linear-limit 이하 크기에서만 잰다.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from models import TopicPlan  # noqa: E402
+from topic_catalog import ELIGIBLE_SIMILARITY, VERIFIED_TOPICS, TopicCatalog  # noqa: E402
+from topic_similarity import TopicIndex, normalize_topic  # noqa: E402
+
+
+def write_catalog(path: Path, size: int, seed: int = 7) -> List[str]:
+    """실제 항목의 질문 형식·검색어는 두고 낱말 1~3개를 임의의 2~3음절 낱말로 바꾼 목록을 쓴다."""
+    generator = random.Random(seed)
+    templates = list(VERIFIED_TOPICS)
+    topics: List[str] = []
+    seen = set()
+    with path.open("w", encoding="utf-8") as handle:
+        while len(topics) < size:
+            template = generator.choice(templates)
+            words = template.topic.split()
+            for position in generator.sample(range(len(words)), min(len(words), generator.randint(1, 3))):
+                words[position] = "".join(
+                    chr(0xAC00 + generator.randrange(11172)) for _ in range(generator.randint(2, 3))
+                )
+            topic = " ".join(words)
+            if topic in seen:
+                continue
+            seen.add(topic)
+            topics.append(topic)
+            entry = {
+                "topic": topic,
+                "wiki_query": f"{template.wiki_query} {len(topics)}",
+                "stock_queries": list(template.stock_queries),
+                "category": template.category,
+            }
+            handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return topics
+
+
+def measured(action: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """(결과, 초, 결과가 붙잡고 있는 바이트). 시간은 tracemalloc 없이 따로 잰다."""
+    started = time.perf_counter()
+    action()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    result = action()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, retained
+
+
+def eager_tuple(path: Path) -> Tuple[TopicPlan, ...]:
+    plans = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        entry = json.loads(line)
+        plans.append(TopicPlan(entry["topic"], entry["wiki_query"], entry["stock_queries"], entry["category"]))
+    return tuple(plans)
+
+
+def linear_eligible(plans: Tuple[TopicPlan, ...], recent: List[str]) -> int:
+    normalized = [normalize_topic(item) for item in recent]
+    return sum(
+        1
+        for plan in plans
+        if not any(
+            SequenceMatcher(None, normalize_topic(plan.topic), old).ratio() >= ELIGIBLE_SIMILARITY
+            for old in normalized
+        )
+    )
+
+
+def benchmark(size: int, recent_count: int, linear_limit: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "topic_catalog.jsonl"
+        topics = write_catalog(path, size)
+        generator = random.Random(size)
+        recent = [generator.choice(topics) for _ in range(recent_count)]
+        catalog, load_seconds, catalog_bytes = measured(lambda: TopicCatalog(path))
+        plans, eager_seconds, eager_bytes = measured(lambda: eager_tuple(path))
+        index_path = Path(directory) / "topic_lsh.npz"
+        TopicIndex.load_or_build(catalog.topics, index_path)
+        index, index_seconds, _ = measured(lambda: TopicIndex.load_or_build(catalog.topics, index_path))
+        started = time.perf_counter()
+        eligible = catalog.plans(np.flatnonzero(~catalog.cooldown_mask(recent, index)))
+        query_seconds = time.perf_counter() - started
+        row = {
+            "catalog": size,
+            "load_seconds": round(load_seconds, 3),
+            "load_mib": round(catalog_bytes / 2**20, 1),
+            "eager_tuple_seconds": round(eager_seconds, 3),
+            "eager_tuple_mib": round(eager_bytes / 2**20, 1),
+            "index_load_seconds": round(index_seconds, 3),
+            "cooldown_query_seconds": round(query_seconds, 3),
+            "eligible": len(eligible),
+        }
+        if size <= linear_limit:
+            started = time.perf_counter()
+            row["linear_eligible"] = linear_eligible(plans, recent)
+            row["linear_query_seconds"] = round(time.perf_counter() - started, 3)
+        return row
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="주제 목록 적재·조회 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--recent", type=int, default=30)
+    parser.add_argument("--linear-limit", type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps([benchmark(size, args.recent, args.linear_limit) for size in args.sizes], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
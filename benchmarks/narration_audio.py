@@ -0,0 +1,153 @@
+"""기존 두 번 AAC 인코딩 경로와 무손실 단일 인코딩 경로의 시간·음질을 비교한다.
+
+    python benchmarks/narration_audio.py [--input narration_raw.wav] [--repeat 3]
+
+입력이 없으면 말소리와 비슷한 합성 신호를 만든다. 경로마다 최선 소요 시간, AAC 인코딩 횟수,
+최종 결과의 통합 라우드니스·트루 피크, 같은 필터 체인을 AAC 없이 적용한 기준 음성과의 SNR을 출력한다.
+FFmpeg가 설치된 환경에서 실행한다.
+"""
+
+import argparse
+import json
+import math
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from video_renderer import (  # noqa: E402
+    _run,
+    analyze_wave,
+    mastering_filter,
+    measure_loudness,
+    media_duration,
+    narration_audio_filter,
+    narration_tempo,
+)
+
+SYNTHETIC_SOURCE = (
+    "aevalsrc='0.35*sin(2*PI*(140+45*sin(2*PI*0.7*t))*t)*(0.55+0.45*sin(2*PI*3.1*t))"
+    "+0.08*sin(2*PI*2300*t)*(0.5+0.5*sin(2*PI*5*t))':s=24000:d=48"
+)
+
+
+def _decode(path: Path) -> array:
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "s16le", "-ac", "1", "-ar", "48000", "-"],
+        capture_output=True,
+        check=True,
+    )
+    samples = array("h")
+    samples.frombytes(result.stdout[: len(result.stdout) // 2 * 2])
+    return samples
+
+
+def snr_db(reference: array, candidate: array) -> float:
+    length = min(len(reference), len(candidate))
+    signal = sum(value * value for value in reference[:length])
+    noise = sum((reference[index] - candidate[index]) ** 2 for index in range(length))
+    return round(10 * math.log10(signal / noise), 2) if noise else float("inf")
+
+
+def loudness(path: Path) -> Dict[str, float]:
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", str(path), "-filter:a", "ebur128=peak=true",
+         "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    summary = result.stderr[result.stderr.rfind("Summary:"):]
+    integrated = re.search(r"I:\s+(-?[\d.]+) LUFS", summary)
+    peak = re.search(r"Peak:\s+(-?[\d.]+) dBFS", summary)
+    return {
+        "integrated_lufs": float(integrated.group(1)) if integrated else 0.0,
+        "true_peak_dbfs": float(peak.group(1)) if peak else 0.0,
+    }
+
+
+def run_aac_path(raw: Path, work: Path) -> Path:
+    """기존 경로: 정규화해 AAC로 한 번, 최종 먹싱에서 리미터 후 AAC로 다시 한 번 인코딩한다."""
+    normalized = work / "narration.m4a"
+    _run(["ffmpeg", "-y", "-i", str(raw), "-filter:a", narration_audio_filter(media_duration(raw)),
+          "-c:a", "aac", "-b:a", "160k", str(normalized)])
+    final = work / "final_aac.m4a"
+    _run(["ffmpeg", "-y", "-i", str(normalized), "-filter:a", "alimiter=limit=0.95",
+          "-c:a", "aac", "-b:a", "160k", str(final)])
+    return final
+
+
+def lossless_chain(raw: Path, work: Path) -> Tuple[Path, str]:
+    """create_narration과 같이 WAV는 프로세스 안에서 재고, 다른 형식은 FLAC 보관과 측정을 한 번에 한다."""
+    analysis = analyze_wave(raw) if raw.suffix == ".wav" else None
+    gain_db = analysis.normalization_gain() if analysis is not None else None
+    if analysis is not None and gain_db is not None:
+        return raw, mastering_filter(narration_tempo(analysis.duration), None, gain_db)
+    narration = work / "narration.flac"
+    measured = measure_loudness(raw, narration)
+    return narration, mastering_filter(narration_tempo(media_duration(raw)), measured)
+
+
+def run_lossless_path(raw: Path, work: Path) -> Path:
+    """새 경로: 무손실 내레이션에 최종 인코딩에서 전체 체인을 한 번만 적용한다."""
+    narration, chain = lossless_chain(raw, work)
+    final = work / "final_lossless.m4a"
+    _run(["ffmpeg", "-y", "-i", str(narration), "-filter:a", chain,
+          "-c:a", "aac", "-b:a", "160k", str(final)])
+    return final
+
+
+def reference(raw: Path, work: Path, path: str) -> Path:
+    if path == "aac":
+        chain = f"{narration_audio_filter(media_duration(raw))},alimiter=limit=0.95"
+    else:
+        chain = lossless_chain(raw, work)[1]
+    output = work / f"reference_{path}.wav"
+    _run(["ffmpeg", "-y", "-i", str(raw), "-filter:a", chain, "-ar", "48000", str(output)])
+    return output
+
+
+def benchmark(raw: Path, repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for name, runner in (("aac", run_aac_path), ("lossless", run_lossless_path)):
+        with tempfile.TemporaryDirectory() as directory:
+            work = Path(directory)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                final = runner(raw, work)
+                timings.append(time.perf_counter() - started)
+            rows.append(
+                {
+                    "path": name,
+                    "aac_encodes": 2 if name == "aac" else 1,
+                    "best_wall_seconds": round(min(timings), 3),
+                    "snr_vs_lossless_db": snr_db(_decode(reference(raw, work, name)), _decode(final)),
+                    **loudness(final),
+                }
+            )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="내레이션 오디오 경로 벤치마크")
+    parser.add_argument("--input", type=Path, help="원본 내레이션(WAV/MP3). 없으면 합성 신호 사용")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        raw = args.input
+        if raw is None:
+            raw = Path(directory) / "synthetic.wav"
+            _run(["ffmpeg", "-y", "-f", "lavfi", "-i", SYNTHETIC_SOURCE, str(raw)])
+        print(json.dumps(benchmark(raw, max(1, args.repeat)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
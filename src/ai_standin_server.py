@@ -0,0 +1,431 @@
+"""네트워크 없이 GeminiWriter를 벤치마크·회귀 테스트하는 로컬 AI 대체 서버.
+
+GitHub Models chat completions와 Gemini interactions·cachedContents·generateContent 중
+파이프라인이 실제로 호출하는 부분만 흉내 내고, 스키마에 맞는 JSON을 돌려준다.
+지연 시간 분포, 오류·429·타임아웃 비율을 바꿔 대체 경로와 동시 호출을 시험할 수 있다.
+
+    python src/ai_standin_server.py --port 8765 --latency-ms 600 --rate-limit-rate 0.2
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta \\
+    GITHUB_MODELS_ENDPOINT=http://127.0.0.1:8765/inference/chat/completions python src/main.py --dry-run
+
+    python src/ai_standin_server.py --load-test 200 --concurrency 16 --error-rate 0.1
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+LOGGER = logging.getLogger("ai-standin")
+CHAT_PATH = "/inference/chat/completions"
+GEMINI_PREFIX = "/v1beta"
+
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.35
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 95.0
+    stream_chunk_chars: int = 24
+    seed: Optional[int] = None
+
+
+def _topic_from_prompt(prompt: str) -> str:
+    match = re.search(r"^주제:\s*(.+)$", prompt, flags=re.M)
+    return match.group(1).strip() if match else "오늘의 과학 현상"
+
+
+def _caption_chunks_from_prompt(prompt: str) -> List[str]:
+    match = re.search(r"한글 자막\(JSON\):\s*(\[.*?\])\s*$", prompt, flags=re.S | re.M)
+    if not match:
+        return []
+    try:
+        return [str(item) for item in json.loads(match.group(1))]
+    except ValueError:
+        return []
+
+
+def _script_fields(topic: str) -> Dict[str, Any]:
+    """validate_package를 통과하는 구조(질문 훅·중앙 반전·루프 결말)의 대본을 만든다."""
+    hook = topic.rstrip("?？ ") + "?"
+    midpoint = "그런데 핵심은 작은 차이가 차곡차곡 쌓이는 방식에 있습니다."
+    closing = "이 사실을 알고 처음 장면을 다시 보면…"
+    first = [
+        "검증 자료는 이 현상을 몇 가지 단계로 나누어 설명합니다.",
+        "먼저 기본 구조를 살펴보면 원리가 조금씩 보이기 시작합니다.",
+        "구조 안의 작은 차이가 전체 결과를 크게 바꾸기도 합니다.",
+    ]
+    second = [
+        "그 차이가 이어지면서 우리가 보는 장면이 만들어집니다.",
+        "자료는 원인과 과정, 결과가 하나로 연결된다고 설명합니다.",
+        "그래서 같은 현상도 조건에 따라 다르게 나타납니다.",
+    ]
+    narration = " ".join([hook, *first, midpoint, *second, closing])
+    return {
+        "title": f"{topic.rstrip('?？ ')}"[:40],
+        "hook": hook,
+        "narration": narration,
+        "description_intro": "검증 자료를 바탕으로 현상의 원리를 정리했습니다. 짧은 설명으로 핵심을 전합니다.",
+        "midpoint_hook": midpoint,
+        "closing_loop": closing,
+        "engagement_question": "여러분이 가장 궁금했던 장면은 무엇이었나요?",
+        "tags": ["과학", "지식", "원리", "자연", "교양"],
+    }
+
+
+def _value_for(schema: Dict[str, Any], name: str = "") -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _value_for(item, key) for key, item in (schema.get("properties") or {}).items()
+        }
+    if kind == "array":
+        return [_value_for(schema.get("items") or {"type": "string"}, name)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    return f"{name or 'value'}"
+
+
+def build_response(schema: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+    """순위·대본·검수·번역 프롬프트에 맞는 응답을 만들고, 모르는 스키마는 형식만 맞춘다."""
+    properties = set((schema.get("properties") or {}).keys())
+    if "candidate_ids" in properties:
+        count = len(re.findall(r'"id":\s*\d+', prompt)) or 1
+        return {
+            "candidate_ids": list(range(count)),
+            "trend_reason": "시각적으로 설명하기 좋고 오래 검색되는 주제입니다.",
+        }
+    if "narration" in properties:
+        return _script_fields(_topic_from_prompt(prompt))
+    if "approved" in properties:
+        return {
+            "approved": True,
+            "score": 88,
+            "facts_supported": True,
+            "natural_korean": True,
+            "visualizable": True,
+            "issues": [],
+        }
+    if "translations" in properties:
+        chunks = _caption_chunks_from_prompt(prompt)
+        return {"translations": [f"Stand-in caption {index + 1}" for index in range(len(chunks))]}
+    return _value_for(schema)
+
+
+class StandInServer:
+    """스레드형 HTTP 서버를 백그라운드에서 띄우고 요청 통계를 모은다."""
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandInConfig()
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.caches: Dict[str, str] = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self) -> Dict[str, str]:
+        """GeminiWriter가 이 서버를 보도록 하는 환경 변수."""
+        return {
+            "GEMINI_API_BASE": f"{self.base_url}{GEMINI_PREFIX}",
+            "GITHUB_MODELS_ENDPOINT": f"{self.base_url}{CHAT_PATH}",
+        }
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def start(self) -> "StandInServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.stop()
+
+    def draw(self) -> Tuple[str, float]:
+        """이번 요청의 결과 유형과 지연 시간을 정한다."""
+        config = self.config
+        with self.lock:
+            roll = self.random.random()
+            delay = 0.0
+            if config.latency_ms > 0:
+                median = math.log(config.latency_ms / 1000)
+                delay = self.random.lognormvariate(median, config.latency_sigma)
+        if roll < config.timeout_rate:
+            return "timeout", config.hang_seconds
+        roll -= config.timeout_rate
+        if roll < config.rate_limit_rate:
+            return "rate_limit", delay * 0.1
+        roll -= config.rate_limit_rate
+        if roll < config.error_rate:
+            return "error", delay * 0.5
+        return "ok", delay
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                LOGGER.debug(format, *args)
+
+            def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, events: List[Dict[str, Any]], done_marker: bool) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for event in events:
+                        line = "data: " + json.dumps(event, ensure_ascii=False) + "\n\n"
+                        self.wfile.write(line.encode("utf-8"))
+                        self.wfile.flush()
+                    if done_marker:
+                        self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 조기 중단하면 남은 조각을 버린다.
+                    server.count("stream_aborted")
+                self.close_connection = True
+
+            def do_DELETE(self) -> None:
+                server.count("delete_cache")
+                server.caches.pop(self.path[len(GEMINI_PREFIX) + 1:], None)
+                self._send_json(200, {})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": {"message": "invalid JSON"}})
+                    return
+                path = self.path.split("?", 1)[0]
+                if path == f"{GEMINI_PREFIX}/cachedContents":
+                    server.count("create_cache")
+                    name = f"cachedContents/standin-{len(server.caches) + 1}"
+                    parts = payload.get("contents", [{}])[0].get("parts", [{}])
+                    server.caches[name] = str(parts[0].get("text", ""))
+                    self._send_json(200, {"name": name})
+                    return
+
+                outcome, delay = server.draw()
+                server.count(f"{path.rsplit('/', 1)[-1]}:{outcome}")
+                time.sleep(delay)
+                if outcome == "timeout":
+                    self._send_json(504, {"error": {"message": "stand-in timeout"}})
+                    return
+                if outcome == "rate_limit":
+                    self._send_json(
+                        429,
+                        {"error": {"message": "stand-in rate limit"}},
+                        {"Retry-After": "1"},
+                    )
+                    return
+                if outcome == "error":
+                    self._send_json(500, {"error": {"message": "stand-in server error"}})
+                    return
+
+                if path == CHAT_PATH:
+                    self._chat(payload)
+                elif path == f"{GEMINI_PREFIX}/interactions":
+                    self._interaction(payload)
+                elif re.fullmatch(rf"{GEMINI_PREFIX}/models/[^/:]+:(stream)?[gG]enerateContent", path):
+                    self._generate_content(payload, stream="streamGenerateContent" in path)
+                else:
+                    self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+            def _pieces(self, text: str) -> List[str]:
+                size = max(1, server.config.stream_chunk_chars)
+                return [text[index:index + size] for index in range(0, len(text), size)]
+
+            def _chat(self, payload: Dict[str, Any]) -> None:
+                prompt = "\n".join(str(item.get("content", "")) for item in payload.get("messages", []))
+                schema = ((payload.get("response_format") or {}).get("json_schema") or {}).get("schema") or {}
+                text = json.dumps(build_response(schema, prompt), ensure_ascii=False)
+                usage = {"prompt_tokens": len(prompt) // 2, "completion_tokens": len(text) // 2}
+                if payload.get("stream"):
+                    events = [{"choices": [{"delta": {"content": piece}}]} for piece in self._pieces(text)]
+                    events.append({"choices": [], "usage": usage})
+                    self._send_stream(events, done_marker=True)
+                    return
+                self._send_json(200, {"choices": [{"message": {"content": text}}], "usage": usage})
+
+            def _interaction(self, payload: Dict[str, Any]) -> None:
+                prompt = str(payload.get("input", ""))
+                schema = (payload.get("response_format") or {}).get("schema") or {}
+                text = json.dumps(build_response(schema, prompt), ensure_ascii=False)
+                usage = {"total_input_tokens": len(prompt) // 2, "total_output_tokens": len(text) // 2}
+                if payload.get("stream"):
+                    events = [
+                        {"event_type": "content.delta", "delta": {"type": "text", "text": piece}}
+                        for piece in self._pieces(text)
+                    ]
+                    events.append({"event_type": "interaction.complete", "usage": usage})
+                    self._send_stream(events, done_marker=False)
+                    return
+                self._send_json(200, {"output_text": text, "usage": usage})
+
+            def _generate_content(self, payload: Dict[str, Any], stream: bool) -> None:
+                cached = server.caches.get(str(payload.get("cachedContent", "")), "")
+                tail = "".join(
+                    str(part.get("text", ""))
+                    for content in payload.get("contents") or []
+                    for part in content.get("parts") or []
+                )
+                prompt = cached + tail
+                schema = (payload.get("generationConfig") or {}).get("responseSchema") or {}
+                text = json.dumps(build_response(schema, prompt), ensure_ascii=False)
+                usage = {
+                    "promptTokenCount": len(prompt) // 2,
+                    "cachedContentTokenCount": len(cached) // 2,
+                    "candidatesTokenCount": len(text) // 2,
+                }
+                if stream:
+                    events = [
+                        {"candidates": [{"content": {"parts": [{"text": piece}]}}]}
+                        for piece in self._pieces(text)
+                    ]
+                    events[-1]["usageMetadata"] = usage
+                    self._send_stream(events, done_marker=False)
+                    return
+                self._send_json(
+                    200,
+                    {"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": usage},
+                )
+
+        return Handler
+
+
+def run_load_test(server: StandInServer, total: int, concurrency: int) -> Dict[str, Any]:
+    """대체 서버를 향해 GeminiWriter 순위 호출을 동시에 보내 지연·성공률·대체 경로 사용을 잰다."""
+    from ai_writer import GeminiWriter
+    from topic_catalog import VERIFIED_TOPICS
+
+    os.environ.update(server.environment())
+    os.environ.setdefault("GITHUB_MODELS_TOKEN", "standin-token")
+    os.environ.setdefault("GEMINI_API_KEY", "standin-key")
+    writer = GeminiWriter()
+    candidates = list(VERIFIED_TOPICS[:8])
+
+    def one_call(_: int) -> Tuple[bool, float]:
+        started = time.monotonic()
+        try:
+            writer.rank_topics([], [], [], candidates, limit=3)
+            return True, time.monotonic() - started
+        except Exception:
+            return False, time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(one_call, range(total)))
+    wall = time.monotonic() - started
+    latencies = sorted(seconds for _, seconds in results)
+    attempts = [event["attempt"] for event in writer.call_log.events if event["outcome"] == "ok"]
+
+    def percentile(value: float) -> float:
+        if not latencies:
+            return 0.0
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * value))], 3)
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "succeeded": sum(1 for ok, _ in results if ok),
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(total / wall, 2) if wall else 0.0,
+        "p50_seconds": percentile(0.5),
+        "p95_seconds": percentile(0.95),
+        "mean_attempts": round(statistics.mean(attempts), 2) if attempts else 0.0,
+        "server_counts": dict(sorted(server.counts.items())),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="로컬 AI 대체 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="로그정규 지연의 중앙값")
+    parser.add_argument("--latency-sigma", type=float, default=0.35)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 비율")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="HTTP 429 비율")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="응답 지연 후 504 비율")
+    parser.add_argument("--hang-seconds", type=float, default=95.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--load-test", type=int, default=0, help="서버를 띄우고 이 수만큼 동시 호출")
+    parser.add_argument("--concurrency", type=int, default=8)
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    args = parse_args()
+    config = StandInConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+    if args.load_test:
+        logging.getLogger().setLevel(logging.ERROR)
+        with StandInServer(config, args.host, 0) as server:
+            print(json.dumps(run_load_test(server, args.load_test, args.concurrency), indent=2))
+        return 0
+    server = StandInServer(config, args.host, args.port)
+    LOGGER.info("AI 대체 서버 시작: %s", server.base_url)
+    for key, value in server.environment().items():
+        LOGGER.info("%s=%s", key, value)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,11 +4,17 @@ import json
 import logging
 import os
 import re
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import requests
 
+from context_cache import CachedContext, ContextCache, estimate_tokens
+from knowledge import DEFAULT_EVIDENCE_CHARS, condense_extract
+from llm_telemetry import CallLog
 from models import KnowledgeSource, ScriptPackage, TopicPlan
+from topic_matcher import rank_candidates
+from translation_memory import TranslationMemory, normalize_chunk
 
 LOGGER = logging.getLogger(__name__)
 API_BASE = "https://generativelanguage.googleapis.com/v1beta"
@@ -18,12 +24,121 @@ DEFAULT_MODELS = (
     "gemini-2.5-flash",
     "gemini-2.5-flash-lite",
 )
+CONTEXT_CACHE_TTL = "900s"
+# 정규화 보정(질문 훅·루프 문장 추가)으로도 살릴 수 없는 스트리밍 원문 길이 범위
+STREAM_NARRATION_RANGE = (180, 360)
 
 
 class GeminiError(RuntimeError):
     pass
 
 
+class DraftRejectedError(GeminiError):
+    """스트리밍 중 필드 검사에서 초안이 확정적으로 탈락했다."""
+
+
+class IncrementalJsonObject:
+    """스트리밍 조각에서 최상위 JSON 필드가 완성되는 즉시 꺼낸다."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._mode = "key"
+        self._key = ""
+        self._start = -1
+
+    def _complete(self, end: int) -> Optional[Tuple[str, Any]]:
+        raw = self.buffer[self._start:end].strip()
+        self._mode = "after"
+        self._start = -1
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return None
+        self.fields[self._key] = value
+        return self._key, value
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """새 조각을 읽고 이번에 완성된 (필드, 값) 목록을 돌려준다."""
+        self.buffer += text
+        completed: List[Optional[Tuple[str, Any]]] = []
+        while self._position < len(self.buffer) and not self.done:
+            index = self._position
+            char = self.buffer[index]
+            self._position += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._mode == "key":
+                        try:
+                            self._key = json.loads(self.buffer[self._start:index + 1])
+                        except ValueError:
+                            self._key = ""
+                        self._mode = "colon"
+                    elif self._depth == 1 and self._mode == "value":
+                        completed.append(self._complete(index + 1))
+                continue
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._mode = "key"
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and (self._mode == "key" or self._start < 0):
+                    self._start = index
+            elif char in "{[":
+                if self._depth == 1 and self._mode == "value" and self._start < 0:
+                    self._start = index
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._mode == "value":
+                    completed.append(self._complete(index + 1))
+                elif self._depth == 0:
+                    if self._mode == "value" and self._start >= 0:
+                        completed.append(self._complete(index))
+                    self.done = True
+            elif self._depth == 1:
+                if char == ":" and self._mode == "colon":
+                    self._mode = "value"
+                    self._start = -1
+                elif char == ",":
+                    if self._mode == "value" and self._start >= 0:
+                        completed.append(self._complete(index))
+                    self._mode = "key"
+                elif not char.isspace() and self._mode == "value" and self._start < 0:
+                    self._start = index
+        return [item for item in completed if item is not None]
+
+
+def _check_streamed_narration(value: Any) -> str:
+    length = len(re.sub(r"\s+", " ", str(value)).strip())
+    minimum, maximum = STREAM_NARRATION_RANGE
+    if not minimum <= length <= maximum:
+        return f"대본 길이가 기준 밖입니다: {length}자"
+    return ""
+
+
+SCRIPT_STREAM_CHECKS: Dict[str, Callable[[Any], str]] = {
+    "narration": _check_streamed_narration,
+}
+
+
+def rank_prompt_candidates(limit: int) -> int:
+    """주제 순위 프롬프트에 넣을 최대 후보 수. 요청한 순위 수보다 작아지지 않는다."""
+    return max(int(os.getenv("RANK_PROMPT_CANDIDATES", "12")), limit)
+
+
 def normalize_loop_ending(narration: str, closing_loop: str) -> Tuple[str, str]:
     """AI가 형식을 놓쳐도 마지막 장면이 첫 질문으로 이어지게 보정한다."""
     narration = re.sub(r"\s+", " ", narration).strip()
@@ -62,7 +177,21 @@ def normalize_question_hook(narration: str, hook: str) -> Tuple[str, str]:
 
 
 class GeminiWriter:
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    api_base = API_BASE
+    github_endpoint = GITHUB_MODELS_ENDPOINT
+    streaming = False
+    translation_memory: Optional[TranslationMemory] = None
+    context_cache: Optional[ContextCache] = None
+    evidence_chars = DEFAULT_EVIDENCE_CHARS
+    call_log: Optional[CallLog] = None
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        translation_memory: Optional[TranslationMemory] = None,
+        call_log: Optional[CallLog] = None,
+    ):
         self.api_keys = list(
             dict.fromkeys(
                 key
@@ -75,9 +204,19 @@ class GeminiWriter:
         )
         self.github_token = os.getenv("GITHUB_MODELS_TOKEN", "")
         self.github_model = os.getenv("GITHUB_MODELS_MODEL", "openai/gpt-4.1")
+        # 로컬 대체 서버(ai_standin_server)로 벤치마크·회귀 테스트할 때만 바꾼다.
+        self.api_base = os.getenv("GEMINI_API_BASE", API_BASE).rstrip("/")
+        self.github_endpoint = os.getenv("GITHUB_MODELS_ENDPOINT", GITHUB_MODELS_ENDPOINT)
         if not self.api_keys and not self.github_token:
             raise GeminiError("사용 가능한 AI 인증 정보가 없습니다.")
         self.requested_model = model or os.getenv("GEMINI_MODEL", "")
+        self.streaming = os.getenv("AI_STREAMING", "").strip().lower() in ("1", "true", "yes")
+        self.translation_memory = translation_memory
+        self.call_log = call_log or CallLog()
+        self.evidence_chars = int(os.getenv("SOURCE_EVIDENCE_CHARS", str(DEFAULT_EVIDENCE_CHARS)))
+        self.context_cache = ContextCache(
+            provider_enabled=os.getenv("GEMINI_CONTEXT_CACHE", "1").strip() != "0"
+        )
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": "OriginalShortsMVP/1.0"})
 
@@ -120,6 +259,69 @@ class GeminiWriter:
             return ""
         return str(choices[0].get("message", {}).get("content", "")).strip()
 
+    @staticmethod
+    def _extract_stream_delta(event: Dict[str, Any]) -> str:
+        """SSE 이벤트 하나에서 새로 도착한 본문 조각만 꺼낸다."""
+        choices = event.get("choices")
+        if choices:
+            return str((choices[0].get("delta") or {}).get("content") or "")
+        delta = event.get("delta")
+        if isinstance(delta, dict) and delta.get("type", "text") == "text":
+            return str(delta.get("text") or "")
+        for candidate in event.get("candidates") or []:
+            return "".join(
+                str(part.get("text", ""))
+                for part in (candidate.get("content") or {}).get("parts") or []
+            )
+        return ""
+
+    def _read_stream(
+        self,
+        response: Any,
+        checks: Optional[Dict[str, Callable[[Any], str]]] = None,
+        usage: Optional[Dict[str, Optional[int]]] = None,
+    ) -> str:
+        """SSE 본문을 모으며 완성된 필드를 검사하고, 확정 탈락이면 즉시 연결을 끊는다."""
+        parser = IncrementalJsonObject()
+        pieces: List[str] = []
+        try:
+            for raw_line in response.iter_lines():
+                line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else str(raw_line)
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                if usage is not None:
+                    usage.update(
+                        {
+                            name: value
+                            for name, value in self._usage_counts(event).items()
+                            if value is not None
+                        }
+                    )
+                delta = self._extract_stream_delta(event)
+                if not delta:
+                    continue
+                pieces.append(delta)
+                for name, value in parser.feed(delta):
+                    check = (checks or {}).get(name)
+                    issue = check(value) if check else ""
+                    if issue:
+                        LOGGER.warning(
+                            "스트리밍 검사에서 초안을 조기 중단합니다(%s자 수신): %s",
+                            len(parser.buffer),
+                            issue,
+                        )
+                        raise DraftRejectedError(issue)
+        finally:
+            response.close()
+        return "".join(pieces).strip()
+
     @staticmethod
     def _strict_schema(value: Any) -> Any:
         if isinstance(value, dict):
@@ -139,19 +341,246 @@ class GeminiWriter:
             message = ""
         return (message or response.text or response.reason)[:300]
 
-    def _generate(self, prompt: str, schema: Dict[str, Any], temperature: float) -> Dict[str, Any]:
+    @staticmethod
+    def _usage_counts(data: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        """공급자마다 다른 사용량 표기를 입력·캐시·출력 토큰으로 맞춘다."""
+        usage = data.get("usage") or {}
+        metadata = data.get("usageMetadata") or data.get("usage_metadata") or {}
+
+        def first(*values: Any) -> Optional[int]:
+            for value in values:
+                if value is not None:
+                    return int(value)
+            return None
+
+        return {
+            "prompt_tokens": first(
+                usage.get("prompt_tokens"),
+                usage.get("total_input_tokens"),
+                metadata.get("promptTokenCount"),
+            ),
+            "cached_tokens": first(
+                (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+                usage.get("total_cached_tokens"),
+                metadata.get("cachedContentTokenCount"),
+            ),
+            "output_tokens": first(
+                usage.get("completion_tokens"),
+                usage.get("total_output_tokens"),
+                metadata.get("candidatesTokenCount"),
+            ),
+        }
+
+    @staticmethod
+    def _extract_generate_content_text(data: Dict[str, Any]) -> str:
+        for candidate in data.get("candidates") or []:
+            text = "".join(
+                str(part.get("text", ""))
+                for part in (candidate.get("content") or {}).get("parts") or []
+            ).strip()
+            if text:
+                return text
+        return ""
+
+    def _request_text(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], str],
+        checks: Optional[Dict[str, Callable[[Any], str]]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, Dict[str, Optional[int]]]:
+        """요청을 보내고 본문과 사용량을 돌려준다. stats에는 헤더 수신까지의 시간과 응답 크기를 채운다."""
+        stats = {} if stats is None else stats
+        response = self.session.post(
+            url,
+            headers=headers,
+            json=payload,
+            timeout=90,
+            stream=self.streaming,
+        )
+        try:
+            stats["connect_seconds"] = float(response.elapsed.total_seconds())
+        except (AttributeError, TypeError, ValueError):
+            pass
+        if not response.ok:
+            raise GeminiError(f"HTTP {response.status_code}: {self._error_message(response)}")
+        usage: Dict[str, Optional[int]] = {}
+        if self.streaming:
+            text = self._read_stream(response, checks, usage)
+        else:
+            data = response.json()
+            text = extract(data)
+            usage = self._usage_counts(data)
+        stats["usage"] = usage
+        stats["response_chars"] = len(text)
+        if not text:
+            raise GeminiError("빈 응답")
+        return text, usage
+
+    def _source_context(self, plan: TopicPlan, source: KnowledgeSource) -> str:
+        """작가와 편집자 호출이 공유하는 검증 자료 문맥. 캐시 접두가 되도록 프롬프트 맨 앞에 둔다."""
+        evidence = condense_extract(
+            source.extract,
+            f"{plan.topic} {plan.wiki_query}",
+            self.evidence_chars,
+        )
+        if len(source.extract) > self.evidence_chars:
+            LOGGER.info("검증 자료 발췌: %s자 → %s자", len(source.extract), len(evidence))
+        context = f"""
+[공통 검증 자료]
+주제: {plan.topic}
+검증 자료 제목: {source.title}
+검증 자료 URL: {source.url}
+검증 자료 본문(주제 관련 문장 발췌):
+{evidence}
+
+[공통 원칙]
+- 검증 자료에 명시된 사실만 근거로 삼는다.
+- 자료에 없는 숫자, 추정, 최신 뉴스, 건강·투자 조언은 사실로 인정하지 않는다.
+- 자료가 직접 설명하지 않는 인과관계나 다른 현상과의 비유를 근거로 쓰지 않는다.
+"""
+        if self.context_cache:
+            self._delete_cached_contexts(self.context_cache.register(context))
+        return context
+
+    def _gemini_cache_handle(
+        self,
+        context: CachedContext,
+        key_number: int,
+        api_key: str,
+        model: str,
+    ) -> str:
+        """모델별 명시적 문맥 캐시를 한 번만 만든다. 실패한 조합은 전체 프롬프트 전송으로 되돌린다."""
+        slot = f"key#{key_number}/{model}"
+        if slot in context.handles:
+            return context.handles[slot]
+        handle = ""
+        try:
+            response = self.session.post(
+                f"{self.api_base}/cachedContents",
+                headers={"x-goog-api-key": api_key, "Content-Type": "application/json"},
+                json={
+                    "model": f"models/{model}",
+                    "contents": [{"role": "user", "parts": [{"text": context.text}]}],
+                    "ttl": CONTEXT_CACHE_TTL,
+                },
+                timeout=30,
+            )
+            if not response.ok:
+                raise GeminiError(f"HTTP {response.status_code}: {self._error_message(response)}")
+            handle = str(response.json().get("name") or "")
+            LOGGER.info("검증 자료 문맥 캐시 생성: %s", model)
+        except Exception as exc:
+            LOGGER.info("문맥 캐시를 만들지 못해 전체 프롬프트로 보냅니다(%s): %s", model, exc)
+        context.handles[slot] = handle
+        return handle
+
+    def _delete_cached_contexts(self, contexts: Iterable[CachedContext]) -> None:
+        for context in contexts:
+            for slot, handle in context.handles.items():
+                if not handle:
+                    continue
+                key_number = int(slot.split("/", 1)[0].replace("key#", ""))
+                try:
+                    self.session.delete(
+                        f"{self.api_base}/{handle}",
+                        headers={"x-goog-api-key": self.api_keys[key_number - 1]},
+                        timeout=15,
+                    )
+                except Exception as exc:
+                    LOGGER.info("문맥 캐시 삭제 실패(만료 시간 후 자동 삭제): %s", exc)
+
+    def release_contexts(self) -> None:
+        """후보 주제 편집이 끝나면 남은 공급자 캐시를 정리한다."""
+        if self.context_cache:
+            self._delete_cached_contexts(self.context_cache.release())
+
+    def _record_prompt(
+        self,
+        context: Optional[CachedContext],
+        provider: str,
+        model: str,
+        prompt: str,
+        mode: str,
+        usage: Dict[str, Optional[int]],
+    ) -> None:
+        if self.context_cache:
+            self.context_cache.record(
+                context,
+                provider,
+                model,
+                prompt,
+                mode,
+                prompt_tokens=usage.get("prompt_tokens"),
+                cached_tokens=usage.get("cached_tokens"),
+            )
+
+    def _log_call(
+        self,
+        step: str,
+        provider: str,
+        model: str,
+        attempt: int,
+        prompt: str,
+        started: float,
+        stats: Dict[str, Any],
+        outcome: str,
+        mode: str = "",
+        error: str = "",
+    ) -> None:
+        if not self.call_log:
+            return
+        elapsed = time.monotonic() - started
+        # 헤더를 받기 전에 실패했다면 전체 시간을 연결 대기로 본다.
+        connect = min(elapsed, stats.get("connect_seconds", elapsed))
+        usage = stats.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        self.call_log.record(
+            step=step,
+            provider=provider,
+            model=model,
+            attempt=attempt,
+            mode=mode,
+            prompt_chars=len(prompt),
+            response_chars=stats.get("response_chars", 0),
+            prompt_tokens=prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt),
+            cached_tokens=usage.get("cached_tokens") or 0,
+            output_tokens=usage.get("output_tokens") or 0,
+            estimated_tokens=prompt_tokens is None,
+            connect_seconds=round(connect, 3),
+            generation_seconds=round(elapsed - connect, 3),
+            outcome=outcome,
+            error=error[:300],
+        )
+
+    def _generate(
+        self,
+        step: str,
+        prompt: str,
+        schema: Dict[str, Any],
+        temperature: float,
+        checks: Optional[Dict[str, Callable[[Any], str]]] = None,
+    ) -> Dict[str, Any]:
+        """step 이름으로 호출을 기록하며 구조화 JSON을 생성한다. 스트리밍 모드에서는 checks로 완성된 필드를 즉시 검사한다."""
         errors: List[str] = []
+        attempt = 0
+        context = self.context_cache.match(prompt) if self.context_cache else None
         if self.github_token:
+            attempt += 1
+            started = time.monotonic()
+            stats: Dict[str, Any] = {}
             try:
-                response = self.session.post(
-                    GITHUB_MODELS_ENDPOINT,
-                    headers={
+                text, usage = self._request_text(
+                    self.github_endpoint,
+                    {
                         "Authorization": f"Bearer {self.github_token}",
                         "Accept": "application/vnd.github+json",
                         "Content-Type": "application/json",
                         "X-GitHub-Api-Version": "2026-03-10",
                     },
-                    json={
+                    {
                         "model": self.github_model,
                         "messages": [
                             {
@@ -162,6 +591,7 @@ class GeminiWriter:
                         ],
                         "temperature": temperature,
                         "max_tokens": 1800,
+                        "stream": self.streaming,
                         "response_format": {
                             "type": "json_schema",
                             "json_schema": {
@@ -171,18 +601,29 @@ class GeminiWriter:
                             },
                         },
                     },
-                    timeout=90,
+                    self._extract_chat_text,
+                    checks,
+                    stats,
+                )
+                result = self._parse_json(text)
+                # 같은 접두를 맨 앞에 두면 공급자의 자동 접두 캐시가 적용된다.
+                self._record_prompt(context, "github", self.github_model, prompt, "implicit", usage)
+                self._log_call(
+                    step, "github", self.github_model, attempt, prompt, started, stats, "ok", "implicit"
                 )
-                if not response.ok:
-                    raise GeminiError(
-                        f"HTTP {response.status_code}: {self._error_message(response)}"
-                    )
-                text = self._extract_chat_text(response.json())
-                if not text:
-                    raise GeminiError("빈 응답")
                 LOGGER.info("GitHub Models 사용: %s", self.github_model)
-                return self._parse_json(text)
+                return result
+            except DraftRejectedError as exc:
+                self._log_call(
+                    step, "github", self.github_model, attempt, prompt, started, stats, "rejected",
+                    error=str(exc),
+                )
+                raise
             except Exception as exc:
+                self._log_call(
+                    step, "github", self.github_model, attempt, prompt, started, stats, "error",
+                    error=str(exc),
+                )
                 errors.append(f"github/{self.github_model}: {exc}")
                 LOGGER.warning("GitHub Models 실패, Gemini로 전환: %s", exc)
 
@@ -195,29 +636,69 @@ class GeminiWriter:
             },
             "generation_config": {"temperature": temperature},
         }
+        if self.streaming:
+            payload["stream"] = True
+        use_provider_cache = bool(context and self.context_cache.provider_enabled)
         for key_number, api_key in enumerate(self.api_keys, start=1):
+            headers = {"x-goog-api-key": api_key, "Content-Type": "application/json"}
             for model in self._model_candidates():
+                attempt += 1
+                started = time.monotonic()
+                stats = {}
+                mode = "local"
                 try:
-                    payload["model"] = model
-                    response = self.session.post(
-                        f"{API_BASE}/interactions",
-                        headers={
-                            "x-goog-api-key": api_key,
-                            "Content-Type": "application/json",
-                        },
-                        json=payload,
-                        timeout=90,
+                    handle = (
+                        self._gemini_cache_handle(context, key_number, api_key, model)
+                        if use_provider_cache
+                        else ""
                     )
-                    if not response.ok:
-                        raise GeminiError(
-                            f"HTTP {response.status_code}: {self._error_message(response)}"
+                    if handle:
+                        method = "streamGenerateContent?alt=sse" if self.streaming else "generateContent"
+                        tail = prompt[len(context.text):]
+                        text, usage = self._request_text(
+                            f"{self.api_base}/models/{model}:{method}",
+                            headers,
+                            {
+                                "cachedContent": handle,
+                                "contents": [{"role": "user", "parts": [{"text": tail}]}],
+                                "generationConfig": {
+                                    "temperature": temperature,
+                                    "responseMimeType": "application/json",
+                                    "responseSchema": schema,
+                                },
+                            },
+                            self._extract_generate_content_text,
+                            checks,
+                            stats,
+                        )
+                        mode = "provider"
+                    else:
+                        payload["model"] = model
+                        text, usage = self._request_text(
+                            f"{self.api_base}/interactions",
+                            headers,
+                            payload,
+                            self._extract_interaction_text,
+                            checks,
+                            stats,
                         )
-                    text = self._extract_interaction_text(response.json())
-                    if not text:
-                        raise GeminiError("빈 응답")
+                        mode = "local"
+                    result = self._parse_json(text)
+                    self._record_prompt(context, "gemini", model, prompt, mode, usage)
+                    self._log_call(step, "gemini", model, attempt, prompt, started, stats, "ok", mode)
                     LOGGER.info("Gemini 모델 사용: %s", model)
-                    return self._parse_json(text)
+                    return result
+                except DraftRejectedError as exc:
+                    self._log_call(
+                        step, "gemini", model, attempt, prompt, started, stats, "rejected", mode,
+                        error=str(exc),
+                    )
+                    raise
                 except Exception as exc:
+                    self._log_call(
+                        step, "gemini", model, attempt, prompt, started, stats, "error", mode,
+                        error=str(exc),
+                    )
                     errors.append(f"key#{key_number}/{model}: {exc}")
                     LOGGER.warning(
                         "Gemini 후보 실패(key=%s, model=%s): %s",
@@ -234,11 +715,19 @@ class GeminiWriter:
         top_performers: Iterable[str],
         verified_candidates: Iterable[TopicPlan],
         limit: int = 6,
+        category_performance: Optional[Dict[str, float]] = None,
     ) -> List[TopicPlan]:
         signals = list(trend_signals)[:20]
         candidates = list(verified_candidates)
+        top_performers = list(top_performers)
         if not candidates:
             raise GeminiError("검증된 주제 후보가 없습니다.")
+        prompt_limit = rank_prompt_candidates(limit)
+        local_order = rank_candidates(candidates, signals, top_performers, category_performance)
+        if len(candidates) > prompt_limit:
+            # 인기 신호와 가까운 후보만 모델에 보내 프롬프트 길이를 후보 수와 무관하게 유지한다.
+            candidates = [candidates[index] for index in local_order[:prompt_limit]]
+            local_order = list(range(len(candidates)))
         candidate_rows = [
             {
                 "id": index,
@@ -257,6 +746,7 @@ class GeminiWriter:
 인기 신호: {json.dumps(signals, ensure_ascii=False)}
 최근 사용 주제(반복 금지): {json.dumps(list(recent_topics)[-30:], ensure_ascii=False)}
 성과가 상대적으로 좋았던 주제: {json.dumps(list(top_performers)[:5], ensure_ascii=False)}
+분야별 나이 보정 성과(0보다 크면 채널 평균 이상): {json.dumps(category_performance or {}, ensure_ascii=False)}
 출처와 스톡 검색어를 사람이 미리 검토한 후보: {json.dumps(candidate_rows, ensure_ascii=False)}
 
 조건:
@@ -273,7 +763,14 @@ class GeminiWriter:
             },
             "required": ["candidate_ids", "trend_reason"],
         }
-        result = self._generate(prompt, schema, temperature=0.35)
+        try:
+            result = self._generate("rank_topics", prompt, schema, temperature=0.35)
+        except GeminiError as exc:
+            LOGGER.warning("주제 순위 AI 호출 실패, 인기 신호 일치도 순서로 정합니다: %s", exc)
+            result = {
+                "candidate_ids": local_order,
+                "trend_reason": "인기 신호와 채널 성과에 가장 가까운 검증 후보",
+            }
         ordered_ids = []
         for raw in result.get("candidate_ids", []):
             try:
@@ -325,14 +822,9 @@ class GeminiWriter:
             if feedback
             else ""
         )
-        prompt = f"""
-당신은 한국어 1분 지식 영상의 작가다. 아래 '검증 자료'에 명시된 사실만 사용해 완전히 새 문장으로 대본을 작성한다.
-
-주제: {plan.topic}
-검증 자료 제목: {source.title}
-검증 자료 URL: {source.url}
-검증 자료 본문:
-{source.extract[:6000]}
+        prompt = self._source_context(plan, source) + f"""
+[작가 역할]
+당신은 한국어 1분 지식 영상의 작가다. 위 '검증 자료'에 명시된 사실만 사용해 완전히 새 문장으로 대본을 작성한다.
 {feedback_text}
 
 작성 규칙:
@@ -378,7 +870,7 @@ class GeminiWriter:
                 "tags",
             ],
         }
-        result = self._generate(prompt, schema, temperature=0.72)
+        result = self._generate("write_script", prompt, schema, temperature=0.72, checks=SCRIPT_STREAM_CHECKS)
         narration = re.sub(r"\s+", " ", str(result["narration"])).strip()
         narration, closing_loop = normalize_loop_ending(
             narration,
@@ -417,11 +909,27 @@ class GeminiWriter:
         )
 
     def translate_caption_chunks(self, chunks: Iterable[str]) -> List[str]:
-        """한글 자막 묶음과 정확히 같은 순서의 짧은 영문 자막을 만든다."""
-        source_chunks = [re.sub(r"\s+", " ", str(item)).strip() for item in chunks]
-        source_chunks = [item for item in source_chunks if item]
-        if not source_chunks:
+        """한글 자막 묶음과 정확히 같은 순서의 짧은 영문 자막을 만든다.
+
+        번역 메모리에 있는 자막은 재사용하고, 처음 보는 자막만 한 번에 모아 번역한다.
+        """
+        requested = [re.sub(r"\s+", " ", str(item)).strip() for item in chunks]
+        requested = [item for item in requested if item]
+        if not requested:
             return []
+        memory = self.translation_memory
+        known: Dict[str, str] = {}
+        for chunk in requested:
+            cached = memory.get(chunk) if memory else None
+            if cached:
+                known[normalize_chunk(chunk)] = cached
+        source_chunks = list(
+            dict.fromkeys(chunk for chunk in requested if normalize_chunk(chunk) not in known)
+        )
+        if not source_chunks:
+            LOGGER.info("영문 자막 %s개를 번역 메모리에서 모두 재사용했습니다.", len(requested))
+            memory.save()
+            return [known[normalize_chunk(chunk)] for chunk in requested]
 
         schema = {
             "type": "object",
@@ -452,7 +960,7 @@ class GeminiWriter:
 """
             if attempt:
                 prompt += f"\n이전 결과 문제: {last_issue} 정확한 개수를 다시 확인한다.\n"
-            result = self._generate(prompt, schema, temperature=0.18)
+            result = self._generate("translate_caption_chunks", prompt, schema, temperature=0.18)
             translations = [
                 re.sub(r"\s+", " ", str(item)).strip()
                 for item in result.get("translations", [])
@@ -463,7 +971,18 @@ class GeminiWriter:
                 and all(len(item) <= 90 for item in translations)
             )
             if valid:
-                return translations
+                for chunk, translation in zip(source_chunks, translations):
+                    known[normalize_chunk(chunk)] = translation
+                    if memory:
+                        memory.put(chunk, translation)
+                if memory:
+                    memory.save()
+                    LOGGER.info(
+                        "영문 자막 번역: 메모리 재사용 %s개 / 신규 %s개",
+                        len(requested) - len(source_chunks),
+                        len(source_chunks),
+                    )
+                return [known[normalize_chunk(chunk)] for chunk in requested]
             last_issue = (
                 f"필요 {len(source_chunks)}개, 수신 {len(translations)}개 또는 길이 기준 초과"
             )
@@ -476,12 +995,10 @@ class GeminiWriter:
         script: ScriptPackage,
     ) -> Dict[str, Any]:
         """업로드 전에 사실성·문장 품질·화면 적합성을 편집자 관점으로 재검토한다."""
-        prompt = f"""
-당신은 한국어 지식 쇼츠의 최종 편집자다. 검증 자료와 대본을 대조해 냉정하게 검수한다.
+        prompt = self._source_context(plan, source) + f"""
+[최종 편집자 역할]
+당신은 한국어 지식 쇼츠의 최종 편집자다. 위 검증 자료와 대본을 대조해 냉정하게 검수한다.
 
-주제: {plan.topic}
-검증 자료 제목: {source.title}
-검증 자료 본문: {source.extract[:6000]}
 대본 패키지: {json.dumps(script.__dict__, ensure_ascii=False)}
 
 검수 기준:
@@ -511,7 +1028,7 @@ class GeminiWriter:
                 "issues",
             ],
         }
-        result = self._generate(prompt, schema, temperature=0.15)
+        result = self._generate("review_script", prompt, schema, temperature=0.15)
         score = max(0, min(100, int(result.get("score", 0) or 0)))
         facts_supported = bool(result.get("facts_supported"))
         natural_korean = bool(result.get("natural_korean"))
@@ -527,4 +1044,4 @@ class GeminiWriter:
             "visualizable": visualizable,
             "issues": issues,
         }
-
+
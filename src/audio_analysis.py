@@ -0,0 +1,169 @@
+"""내레이션 PCM에서 길이·라우드니스·트루 피크·무음 구간을 외부 프로세스 없이 측정한다."""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+TARGET_LUFS = -16.0
+TARGET_TRUE_PEAK = -1.5
+# 이득 뒤의 리미터가 순간 피크를 이만큼 눌러 준다고 보고 트루 피크 한도를 넘는 이득을 허용한다.
+LIMITER_HEADROOM_DB = 9.0
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = 10.0
+BLOCK_SECONDS = 0.4
+BLOCK_STEP_SECONDS = 0.1
+OVERSAMPLE = 4
+SILENCE_DBFS = -50.0
+SILENCE_FRAME_SECONDS = 0.02
+MIN_SILENCE_SECONDS = 0.25
+
+
+@dataclass
+class AudioAnalysis:
+    duration: float
+    integrated_lufs: Optional[float]
+    true_peak_dbtp: Optional[float]
+    silence_spans: List[Tuple[float, float]] = field(default_factory=list)
+
+    def normalization_gain(
+        self,
+        target_lufs: float = TARGET_LUFS,
+        peak_ceiling: float = TARGET_TRUE_PEAK,
+        limiter_headroom: float = LIMITER_HEADROOM_DB,
+    ) -> Optional[float]:
+        """목표 음량까지 올리는 선형 이득(dB). 피크가 한도를 넘는 양은 리미터가 누를 수 있는 만큼만 허용한다."""
+        if self.integrated_lufs is None or self.true_peak_dbtp is None:
+            return None
+        return min(target_lufs - self.integrated_lufs, peak_ceiling - self.true_peak_dbtp + limiter_headroom)
+
+    def expected_lufs(self, gain_db: float) -> Optional[float]:
+        """이득을 준 뒤의 통합 라우드니스. 리미터가 누르는 짧은 피크는 통합 값에 거의 영향을 주지 않는다."""
+        return None if self.integrated_lufs is None else self.integrated_lufs + gain_db
+
+    def summary(self) -> Dict[str, Any]:
+        gain = self.normalization_gain()
+        return {
+            "duration": round(self.duration, 3),
+            "integrated_lufs": None if self.integrated_lufs is None else round(self.integrated_lufs, 2),
+            "true_peak_dbtp": None if self.true_peak_dbtp is None else round(self.true_peak_dbtp, 2),
+            "gain_db": None if gain is None else round(gain, 2),
+            "expected_lufs": None if gain is None else round(self.expected_lufs(gain), 2),
+            "silence_spans": [[round(start, 3), round(end, 3)] for start, end in self.silence_spans],
+        }
+
+
+def pcm_to_float(pcm: bytes) -> np.ndarray:
+    """16비트 리틀엔디언 모노 PCM을 -1~1 실수 배열로 바꾼다."""
+    return np.frombuffer(pcm[: len(pcm) // 2 * 2], dtype="<i2").astype(np.float64) / 32768.0
+
+
+def _biquad_response(
+    b: Tuple[float, float, float],
+    a: Tuple[float, float, float],
+    frequencies: np.ndarray,
+    sample_rate: int,
+) -> np.ndarray:
+    z = np.exp(-1j * 2 * np.pi * frequencies / sample_rate)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+def k_weighting_response(frequencies: np.ndarray, sample_rate: int) -> np.ndarray:
+    """BS.1770 K 가중(고역 셸빙 + RLB 고역 통과)의 주파수 응답을 표본 주파수에 맞춰 계산한다."""
+    gain_db, shelf_hz, shelf_q = 4.0, 1500.0, 1 / math.sqrt(2)
+    amplitude = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * shelf_hz / sample_rate
+    alpha = math.sin(w0) / (2 * shelf_q)
+    cos_w0 = math.cos(w0)
+    root = 2 * math.sqrt(amplitude) * alpha
+    shelf = _biquad_response(
+        (
+            amplitude * ((amplitude + 1) + (amplitude - 1) * cos_w0 + root),
+            -2 * amplitude * ((amplitude - 1) + (amplitude + 1) * cos_w0),
+            amplitude * ((amplitude + 1) + (amplitude - 1) * cos_w0 - root),
+        ),
+        (
+            (amplitude + 1) - (amplitude - 1) * cos_w0 + root,
+            2 * ((amplitude - 1) - (amplitude + 1) * cos_w0),
+            (amplitude + 1) - (amplitude - 1) * cos_w0 - root,
+        ),
+        frequencies,
+        sample_rate,
+    )
+    w0 = 2 * math.pi * 38.0 / sample_rate
+    alpha = math.sin(w0) / (2 * 0.5)
+    cos_w0 = math.cos(w0)
+    highpass = _biquad_response(
+        ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2),
+        (1 + alpha, -2 * cos_w0, 1 - alpha),
+        frequencies,
+        sample_rate,
+    )
+    return shelf * highpass
+
+
+def integrated_loudness(samples: np.ndarray, sample_rate: int) -> Optional[float]:
+    """400ms 블록(75% 겹침)에 절대·상대 게이트를 적용한 통합 라우드니스(LUFS)다."""
+    block = int(sample_rate * BLOCK_SECONDS)
+    step = int(sample_rate * BLOCK_STEP_SECONDS)
+    if len(samples) < block:
+        return None
+    size = len(samples) + block
+    spectrum = np.fft.rfft(samples, n=size)
+    frequencies = np.fft.rfftfreq(size, d=1 / sample_rate)
+    weighted = np.fft.irfft(spectrum * k_weighting_response(frequencies, sample_rate), n=size)
+    energy = np.concatenate(([0.0], np.cumsum(weighted[: len(samples)] ** 2)))
+    starts = np.arange(0, len(samples) - block + 1, step)
+    power = (energy[starts + block] - energy[starts]) / block
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(power)
+    gated = power[loudness > ABSOLUTE_GATE_LUFS]
+    if not len(gated):
+        return None
+    relative_gate = -0.691 + 10 * math.log10(gated.mean()) - RELATIVE_GATE_LU
+    with np.errstate(divide="ignore"):
+        gated = gated[-0.691 + 10 * np.log10(gated) > relative_gate]
+    if not len(gated):
+        return None
+    return -0.691 + 10 * math.log10(gated.mean())
+
+
+def true_peak(samples: np.ndarray) -> Optional[float]:
+    """주파수 영역 4배 오버샘플링으로 표본 사이에 숨은 피크까지 근사한 dBTP다."""
+    if not len(samples):
+        return None
+    upsampled = np.fft.irfft(np.fft.rfft(samples), n=len(samples) * OVERSAMPLE) * OVERSAMPLE
+    peak = max(float(np.max(np.abs(upsampled))), float(np.max(np.abs(samples))))
+    return 20 * math.log10(peak) if peak > 0 else None
+
+
+def silence_spans(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_dbfs: float = SILENCE_DBFS,
+    min_seconds: float = MIN_SILENCE_SECONDS,
+) -> List[Tuple[float, float]]:
+    frame = max(1, int(sample_rate * SILENCE_FRAME_SECONDS))
+    count = len(samples) // frame
+    if not count:
+        return []
+    rms = np.sqrt(np.mean(samples[: count * frame].reshape(count, frame) ** 2, axis=1))
+    quiet = np.concatenate(([False], rms < 10 ** (threshold_dbfs / 20), [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    spans = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if (end - start) * frame / sample_rate >= min_seconds:
+            end_sample = min(end * frame, len(samples))
+            spans.append((float(start * frame / sample_rate), float(end_sample / sample_rate)))
+    return spans
+
+
+def analyze_pcm(pcm: bytes, sample_rate: int) -> AudioAnalysis:
+    samples = pcm_to_float(pcm)
+    return AudioAnalysis(
+        duration=len(samples) / sample_rate,
+        integrated_lufs=integrated_loudness(samples, sample_rate),
+        true_peak_dbtp=true_peak(samples),
+        silence_spans=silence_spans(samples, sample_rate),
+    )
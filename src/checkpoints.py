@@ -0,0 +1,136 @@
+"""실행 단계마다 결과를 입력 지문과 함께 남겨, 실패한 실행을 이미 끝난 단계 다음부터 이어 간다."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict, is_dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+CHECKPOINT_FORMAT = 1
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+def _encode(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"체크포인트에 저장할 수 없는 값: {type(value).__name__}")
+
+
+def fingerprint(inputs: Any) -> str:
+    """단계 입력을 정렬한 JSON으로 직렬화한 SHA-256. 데이터클래스·경로·날짜도 받는다."""
+    payload = json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=_encode)
+    return hashlib.sha256(f"{CHECKPOINT_FORMAT}:{payload}".encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: Path) -> str:
+    with path.open("rb") as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
+
+
+def checkpoint_max_age() -> float:
+    return float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", str(DEFAULT_MAX_AGE_HOURS))) * 3600
+
+
+class CheckpointStore:
+    """단계 이름과 입력 지문마다 JSON 파일 하나를 둔다. 저장은 늘 하고, 재사용은 resume일 때만 한다."""
+
+    def __init__(self, root: Path, resume: bool = False):
+        self.root = root
+        self.resume = resume
+        self.reused: List[str] = []
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / f"{stage}-{key[:16]}.json"
+
+    def load(
+        self,
+        stage: str,
+        inputs: Any,
+        decode: Callable[[Any], Any] = lambda value: value,
+        valid: Callable[[Any], bool] = lambda value: True,
+    ) -> Optional[Any]:
+        """입력 지문이 같은 완료 기록을 decode해 돌려준다. 결과 파일이 사라졌으면(valid 실패) None이다."""
+        if not self.resume:
+            return None
+        key = fingerprint(inputs)
+        path = self._path(stage, key)
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            if entry["fingerprint"] != key:
+                return None
+            value = decode(entry["output"])
+        except Exception as exc:
+            LOGGER.warning("%s 단계 체크포인트가 손상되어 다시 실행합니다: %s", stage, exc)
+            path.unlink(missing_ok=True)
+            return None
+        if not valid(value):
+            LOGGER.warning("%s 단계 결과 파일이 없어 다시 실행합니다.", stage)
+            return None
+        if stage not in self.reused:
+            self.reused.append(stage)
+        LOGGER.info("이전 실행의 %s 단계 결과를 재사용합니다.", stage)
+        return value
+
+    def save(self, stage: str, inputs: Any, output: Any) -> None:
+        """저장에 실패해도 실행은 계속한다."""
+        key = fingerprint(inputs)
+        path = self._path(stage, key)
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(".tmp")
+            temporary.write_text(
+                json.dumps(
+                    {"stage": stage, "fingerprint": key, "saved_at": time.time(), "output": output},
+                    ensure_ascii=False,
+                    indent=2,
+                    default=_encode,
+                ),
+                encoding="utf-8",
+            )
+            temporary.replace(path)
+        except Exception as exc:
+            LOGGER.warning("%s 단계 체크포인트 저장 실패: %s", stage, exc)
+
+    def run(
+        self,
+        stage: str,
+        inputs: Any,
+        compute: Callable[[], Any],
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+        valid: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """입력이 같은 완료 기록이 있으면 그 결과를, 없으면 compute 결과를 저장해 돌려준다."""
+        stored = self.load(stage, inputs, decode, valid)
+        if stored is not None:
+            return stored
+        value = compute()
+        self.save(stage, inputs, encode(value))
+        return value
+
+    def prune(self, max_age: float, now: Optional[float] = None) -> int:
+        """max_age초보다 오래된 체크포인트를 지우고 지운 수를 돌려준다."""
+        if not self.root.exists():
+            return 0
+        cutoff = (now or time.time()) - max_age
+        removed = 0
+        for path in self.root.glob("*.json"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,316 @@
+"""검증 주제 목록·업로드 이력·성과를 바탕으로 앞으로 며칠의 주제 일정을 미리 짠다.
+
+    python src/content_calendar.py [--days 14] [--start 2026-10-20]
+
+API를 부르지 않는다. 인기 신호는 마지막 실행이 남긴 캐시만 쓴다. 날마다 점수가 가장 높은 주제를
+고른 뒤 두 날짜 맞바꾸기와 미사용 후보로 바꾸기를 더 나아지지 않을 때까지 반복한다. 같은 분야가
+가까운 날짜에 나올수록 크게 감점한다. 비슷한 주제는 업로드 간격이 COOLDOWN_DAYS일보다 가까우면
+쓰지 않는다. 주제 하나는 기간 안에 최대 max_repeats번까지 쓴다.
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from models import TopicPlan
+from performance import load_performance
+from state_store import StateStore
+from topic_catalog import VERIFIED_TOPICS, TopicCatalog, catalog_index
+from topic_matcher import catalog_matcher, field_document, score_documents
+from topic_similarity import normalize_topic
+from trend_scout import cached_youtube_trends
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"
+STATE_DB_PATH = DATA_DIR / "state.sqlite3"
+STATE_PATH = DATA_DIR / "published_topics.json"
+CALENDAR_PATH = DATA_DIR / "content_calendar.json"
+TREND_CACHE_PATH = DATA_DIR / "cache" / "trends.json"
+TOPIC_INDEX_PATH = DATA_DIR / "cache" / "topic_lsh.npz"
+LOGGER = logging.getLogger("content-calendar")
+
+DEFAULT_DAYS = 14
+# main.py가 최근 12개 주제와 겹치는 후보를 빼는 것과 같은 간격
+COOLDOWN_DAYS = 12
+MAX_REPEATS = 1
+CATEGORY_WINDOW = 3
+CATEGORY_PENALTY = 0.3
+# 점수 높은 주제를 앞쪽 날짜에 두도록 날마다 조금씩 깎는다.
+DAY_DISCOUNT = 0.97
+POOL_PER_DAY = 6
+MAX_SEARCH_ROUNDS = 50
+
+
+class CalendarProblem:
+    """후보 풀 위치로 표현한 일정 문제. 일정 배열의 값은 풀 위치이고 -1은 비어 있는 날이다."""
+
+    def __init__(
+        self,
+        scores: np.ndarray,
+        categories: np.ndarray,
+        conflicts: np.ndarray,
+        history_conflicts: np.ndarray,
+        days: int,
+        cooldown_days: int = COOLDOWN_DAYS,
+        max_repeats: int = MAX_REPEATS,
+    ):
+        self.scores = np.asarray(scores, dtype=float)
+        self.categories = np.asarray(categories)
+        self.conflicts = conflicts
+        self.days = days
+        self.cooldown_days = cooldown_days
+        self.max_repeats = max_repeats
+        self.weights = DAY_DISCOUNT ** np.arange(days)
+        # 이력은 오래된 순서이고 마지막 항목이 어제 업로드다. 이력 j번은 j - len 날짜에 있었던 셈이다.
+        count = history_conflicts.shape[1]
+        blocked_until = np.where(
+            history_conflicts, cooldown_days + np.arange(count) - count, 0
+        )
+        self.available_from = blocked_until.max(axis=1, initial=0)
+
+    def feasible(self, schedule: np.ndarray, day: int, candidate: int) -> bool:
+        if day < self.available_from[candidate]:
+            return False
+        uses = 0
+        start = max(0, day - self.cooldown_days + 1)
+        for other in range(self.days):
+            chosen = schedule[other]
+            if other == day or chosen < 0:
+                continue
+            uses += chosen == candidate
+            if start <= other < day + self.cooldown_days and self.conflicts[candidate, chosen]:
+                return False
+        return uses < self.max_repeats
+
+    def category_penalty(self, schedule: np.ndarray, day: int, category: Any) -> float:
+        """day 앞뒤 CATEGORY_WINDOW일 안에서 같은 분야를 고른 날마다 거리에 반비례해 감점한다."""
+        penalty = 0.0
+        for other in range(max(0, day - CATEGORY_WINDOW + 1), min(self.days, day + CATEGORY_WINDOW)):
+            chosen = schedule[other]
+            if other != day and chosen >= 0 and self.categories[chosen] == category:
+                penalty += CATEGORY_PENALTY / abs(other - day)
+        return penalty
+
+    def value(self, schedule: np.ndarray) -> float:
+        # 쌍마다 양쪽 날짜에서 한 번씩 세므로 감점은 절반만 더한다.
+        return sum(
+            self.weights[day] * self.scores[chosen]
+            - self.category_penalty(schedule, day, self.categories[chosen]) / 2
+            for day, chosen in enumerate(schedule)
+            if chosen >= 0
+        )
+
+    def _contribution(self, schedule: np.ndarray, day: int) -> float:
+        chosen = schedule[day]
+        if chosen < 0:
+            return 0.0
+        return self.weights[day] * self.scores[chosen] - self.category_penalty(
+            schedule, day, self.categories[chosen]
+        )
+
+    def greedy(self) -> np.ndarray:
+        schedule = np.full(self.days, -1)
+        for day in range(self.days):
+            best, best_value = -1, -np.inf
+            for candidate in range(len(self.scores)):
+                if not self.feasible(schedule, day, candidate):
+                    continue
+                gain = self.weights[day] * self.scores[candidate] - self.category_penalty(
+                    schedule, day, self.categories[candidate]
+                )
+                if gain > best_value + 1e-12:
+                    best, best_value = candidate, gain
+            schedule[day] = best
+        return schedule
+
+    def improve(self, schedule: np.ndarray, rounds: int = MAX_SEARCH_ROUNDS) -> np.ndarray:
+        """맞바꾸기·바꿔 넣기 중 나아지는 수를 바로 받아들이고, 한 바퀴 동안 변화가 없으면 멈춘다."""
+        schedule = schedule.copy()
+        for _ in range(rounds):
+            improved = False
+            for first in range(self.days):
+                for second in range(first + 1, self.days):
+                    a, b = schedule[first], schedule[second]
+                    if a == b:
+                        continue
+                    before = self._contribution(schedule, first) + self._contribution(schedule, second)
+                    schedule[first], schedule[second] = b, a
+                    if (
+                        (b < 0 or self.feasible(schedule, first, b))
+                        and (a < 0 or self.feasible(schedule, second, a))
+                        and self._contribution(schedule, first) + self._contribution(schedule, second)
+                        > before + 1e-9
+                    ):
+                        improved = True
+                    else:
+                        schedule[first], schedule[second] = a, b
+            for day in range(self.days):
+                current = schedule[day]
+                before = self._contribution(schedule, day)
+                for candidate in range(len(self.scores)):
+                    if candidate == current or not self.feasible(schedule, day, candidate):
+                        continue
+                    schedule[day] = candidate
+                    if self._contribution(schedule, day) > before + 1e-9:
+                        current, before = candidate, self._contribution(schedule, day)
+                        improved = True
+                    schedule[day] = current
+            if not improved:
+                break
+        return schedule
+
+    def solve(self) -> np.ndarray:
+        return self.improve(self.greedy())
+
+
+def plan_calendar(
+    recent_topics: Sequence[str],
+    trend_signals: Iterable[Dict[str, Any]] = (),
+    top_performers: Iterable[str] = (),
+    category_performance: Optional[Dict[str, float]] = None,
+    days: int = DEFAULT_DAYS,
+    start: Optional[date] = None,
+    max_repeats: int = MAX_REPEATS,
+    catalog: TopicCatalog = VERIFIED_TOPICS,
+    index_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """start부터 days일의 일정을 만든다. 조건을 만족하는 주제가 없는 날은 unplanned에 남긴다."""
+    start = start or datetime.now(timezone.utc).date()
+    # 일정에는 주제·검증 문서·분야만 남기므로 TopicPlan을 읽지 않고 열 배열로 점수를 매긴다.
+    fields = catalog.fields()
+    scores = score_documents(
+        [field_document(*item) for item in fields],
+        [item[2] for item in fields],
+        trend_signals,
+        top_performers,
+        category_performance,
+        matcher=catalog_matcher(catalog),
+    )
+    pool = np.argsort(-scores, kind="stable")[: max(1, days * POOL_PER_DAY)]
+    history = [topic for topic in recent_topics if topic][-COOLDOWN_DAYS:]
+    index = catalog_index(index_path)
+    pool_topics = [catalog.topics[position] for position in pool]
+    problem = CalendarProblem(
+        scores=scores[pool],
+        categories=np.array([fields[position][2] for position in pool], dtype=object),
+        conflicts=catalog.conflicts(pool, pool_topics, index),
+        history_conflicts=catalog.conflicts(pool, history, index),
+        days=days,
+        max_repeats=max_repeats,
+    )
+    schedule = problem.solve()
+    entries = []
+    unplanned = []
+    for day, chosen in enumerate(schedule):
+        when = (start + timedelta(days=day)).isoformat()
+        if chosen < 0:
+            unplanned.append(when)
+            continue
+        topic, wiki_query, category, _ = fields[pool[chosen]]
+        entries.append(
+            {
+                "date": when,
+                "topic": topic,
+                "category": category,
+                "wiki_query": wiki_query,
+                "score": round(float(problem.scores[chosen]), 4),
+            }
+        )
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "start": start.isoformat(),
+        "days": days,
+        "objective": round(problem.value(schedule), 4),
+        "entries": entries,
+        "unplanned": unplanned,
+    }
+
+
+def write_calendar(path: Path, calendar: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(calendar, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    temporary.replace(path)
+
+
+def scheduled_plans(
+    path: Path,
+    today: date,
+    recent_topics: Sequence[str],
+    catalog: TopicCatalog = VERIFIED_TOPICS,
+    index_path: Optional[Path] = None,
+) -> List[TopicPlan]:
+    """오늘 계획된 주제가 아직 쓸 수 있으면 그 주제와 이후 날짜의 쓸 수 있는 주제를 날짜순으로 돌려준다.
+
+    오늘 항목이 없거나 그 사이 업로드한 주제와 겹치면 빈 목록이다.
+    """
+    if not path.exists():
+        return []
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8")).get("entries", [])
+    except Exception as exc:
+        LOGGER.warning("콘텐츠 캘린더를 읽지 못해 주제 순위를 새로 정합니다: %s", exc)
+        return []
+    blocked = catalog.cooldown_mask([topic for topic in recent_topics if topic], catalog_index(index_path))
+    upcoming = sorted(
+        (entry for entry in entries if str(entry.get("date", "")) >= today.isoformat()),
+        key=lambda entry: str(entry["date"]),
+    )
+    if not upcoming or upcoming[0]["date"] != today.isoformat():
+        return []
+    plans: List[TopicPlan] = []
+    seen = set()
+    for entry in upcoming:
+        position = catalog.by_topic.get(normalize_topic(str(entry.get("topic", ""))))
+        if position is None or blocked[position] or position in seen:
+            if not plans:
+                return []
+            continue
+        seen.add(position)
+        plans.append(replace(catalog.plan(position), trend_reason=f"콘텐츠 캘린더 {entry['date']} 계획"))
+    return plans
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="콘텐츠 캘린더 생성")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="계획할 날 수")
+    parser.add_argument("--start", type=date.fromisoformat, help="첫 날짜(UTC 기준 YYYY-MM-DD, 기본 오늘)")
+    parser.add_argument("--max-repeats", type=int, default=MAX_REPEATS, help="기간 안 주제별 최대 사용 횟수")
+    parser.add_argument("--output", type=Path, default=CALENDAR_PATH)
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    args = parse_args()
+    with StateStore(STATE_DB_PATH, legacy_json=STATE_PATH) as store:
+        recent_topics = store.recent_topics(COOLDOWN_DAYS)
+        performance = load_performance(store)
+    calendar = plan_calendar(
+        recent_topics,
+        cached_youtube_trends(TREND_CACHE_PATH),
+        performance.top_topics(5),
+        performance.category_scores(),
+        days=args.days,
+        start=args.start,
+        max_repeats=args.max_repeats,
+        index_path=TOPIC_INDEX_PATH,
+    )
+    write_calendar(args.output, calendar)
+    LOGGER.info(
+        "콘텐츠 캘린더 %s일 중 %s일을 계획했습니다: %s",
+        args.days,
+        len(calendar["entries"]),
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
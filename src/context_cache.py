@@ -0,0 +1,111 @@
+"""편집 루프에서 반복되는 검증 자료 프롬프트를 한 번만 캐시하고 토큰 절감량을 기록한다."""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """응답에 사용량이 없을 때 쓰는 보수적 추정치다. 한글은 대략 글자당 1토큰으로 본다."""
+    hangul = len(re.findall(r"[가-힣]", text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+@dataclass
+class CachedContext:
+    key: str
+    text: str
+    # "key#1/model" → cachedContents 이름. 생성에 실패한 조합은 빈 문자열로 남겨 재시도하지 않는다.
+    handles: Dict[str, str] = field(default_factory=dict)
+    calls: int = 0
+
+
+class ContextCache:
+    """후보 주제마다 공통 프롬프트 앞부분을 등록하고, 호출별 프롬프트 토큰을 기록한다."""
+
+    def __init__(self, provider_enabled: bool = True):
+        self.provider_enabled = provider_enabled
+        self.contexts: Dict[str, CachedContext] = {}
+        self.usage: List[Dict[str, Any]] = []
+
+    def register(self, text: str) -> List[CachedContext]:
+        """새 공통 앞부분을 등록하고 더 이상 쓰지 않을 이전 후보의 문맥을 돌려준다."""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        if key in self.contexts:
+            return []
+        released = list(self.contexts.values())
+        self.contexts = {key: CachedContext(key=key, text=text)}
+        return released
+
+    def release(self) -> List[CachedContext]:
+        released = list(self.contexts.values())
+        self.contexts = {}
+        return released
+
+    def match(self, prompt: str) -> Optional[CachedContext]:
+        for context in self.contexts.values():
+            if prompt.startswith(context.text):
+                return context
+        return None
+
+    def record(
+        self,
+        context: Optional[CachedContext],
+        provider: str,
+        model: str,
+        prompt: str,
+        mode: str,
+        prompt_tokens: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """한 호출의 전체 프롬프트 토큰과 캐시로 빠진 토큰, 과금 대상 토큰을 남긴다.
+
+        mode는 provider(명시적 캐시 참조), implicit(공급자 자동 접두 캐시), local(캐시 없이 전송)이다.
+        캐시 적중이 없으면 같은 문맥을 두 번째 이후로 보낼 때 아꼈을 토큰을 would_cache_tokens로 남긴다.
+        """
+        total = prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt)
+        if cached_tokens is not None:
+            cached = int(cached_tokens)
+        elif mode == "provider" and context is not None:
+            cached = estimate_tokens(context.text)
+        else:
+            cached = 0
+        would_cache = 0
+        if context is not None:
+            if mode != "provider" and not cached and context.calls:
+                would_cache = estimate_tokens(context.text)
+            context.calls += 1
+        entry = {
+            "provider": provider,
+            "model": model,
+            "mode": mode,
+            "context": context.key if context else "",
+            "prompt_tokens": total,
+            "cached_tokens": cached,
+            "billed_prompt_tokens": max(0, total - cached),
+            "would_cache_tokens": would_cache,
+        }
+        self.usage.append(entry)
+        if context is not None:
+            LOGGER.info(
+                "프롬프트 토큰(%s/%s): 전체 %s / 캐시 %s / 과금 %s",
+                provider,
+                mode,
+                total,
+                cached,
+                entry["billed_prompt_tokens"],
+            )
+        return entry
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "calls": len(self.usage),
+            "prompt_tokens": sum(item["prompt_tokens"] for item in self.usage),
+            "cached_tokens": sum(item["cached_tokens"] for item in self.usage),
+            "billed_prompt_tokens": sum(item["billed_prompt_tokens"] for item in self.usage),
+            "would_cache_tokens": sum(item["would_cache_tokens"] for item in self.usage),
+        }
@@ -0,0 +1,114 @@
+"""대본 글자 구성으로 낭독 길이를 합성 전에 예측하고, 실제 합성 길이로 음성별 보정값을 쌓는다."""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+# 절편, 한글 음절, 그 밖의 글자·숫자, 문장 끝, 쉼표마다 걸리는 초. 기록이 없을 때 쓰는 출발점이다.
+PRIOR_COEFFICIENTS = (0.6, 0.165, 0.07, 0.35, 0.15)
+PRIOR_SPREAD = 0.12
+MIN_FIT_SAMPLES = 8
+MAX_SAMPLES_PER_VOICE = 200
+# 원본 길이 기준(25~63초)과 템포 보정 한도(6%)를 합친, 정규화 후 28~60초에 들어오는 원본 길이
+SAFE_RAW_SECONDS = (28.0, 61.4)
+
+
+def duration_features(text: str) -> List[float]:
+    return [
+        1.0,
+        float(len(re.findall(r"[가-힣]", text))),
+        float(len(re.findall(r"[A-Za-z0-9]", text))),
+        float(len(re.findall(r"[.!?？。…]", text))),
+        float(len(re.findall(r"[,，]", text))),
+    ]
+
+
+@dataclass
+class DurationPrediction:
+    seconds: float
+    low: float
+    high: float
+    samples: int
+    method: str
+
+    def problem(self, bounds=SAFE_RAW_SECONDS) -> Optional[str]:
+        """예측 구간 전체가 기준 밖일 때만 작가에게 돌려보낼 문장을 만든다."""
+        minimum, maximum = bounds
+        if self.low > maximum:
+            return (
+                f"예상 낭독 시간이 {self.seconds:.0f}초로 너무 깁니다. "
+                f"약 {self.seconds - maximum + 2:.0f}초 분량의 문장을 덜어 {maximum:.0f}초 안에 맞추세요."
+            )
+        if self.high < minimum:
+            return (
+                f"예상 낭독 시간이 {self.seconds:.0f}초로 너무 짧습니다. "
+                f"검증 자료의 사실을 더해 {minimum:.0f}초 이상이 되게 하세요."
+            )
+        return None
+
+
+class DurationModel:
+    """음성(엔진·목소리·합성 방식)별 실제 길이 기록을 보관하고 최소제곱으로 계수를 맞춘다."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.samples: Dict[str, List[Dict[str, Any]]] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                samples = data.get("samples")
+                if not isinstance(samples, dict):
+                    raise ValueError("samples가 객체가 아님")
+                self.samples = samples
+            except Exception as exc:
+                LOGGER.warning("낭독 길이 기록을 읽지 못해 새로 시작합니다: %s", exc)
+
+    def predict(self, text: str, voice_key: str) -> DurationPrediction:
+        features = np.array(duration_features(text))
+        history = self.samples.get(voice_key, [])
+        prior = float(features @ np.array(PRIOR_COEFFICIENTS))
+        if not history:
+            return DurationPrediction(
+                prior, prior * (1 - PRIOR_SPREAD), prior * (1 + PRIOR_SPREAD), 0, "prior"
+            )
+        matrix = np.array([item["features"] for item in history], dtype=float)
+        observed = np.array([item["duration"] for item in history], dtype=float)
+        if len(history) < MIN_FIT_SAMPLES:
+            # 기록이 적으면 기본 계수 전체에 곱할 말 빠르기 비율 하나만 맞춘다.
+            ratios = observed / np.maximum(matrix @ np.array(PRIOR_COEFFICIENTS), 1e-6)
+            scale = float(np.median(ratios))
+            spread = max(float(np.std(ratios)) * 2 / scale, 0.05) if len(ratios) > 1 else PRIOR_SPREAD
+            seconds = prior * scale
+            return DurationPrediction(
+                seconds, seconds * (1 - spread), seconds * (1 + spread), len(history), "scaled"
+            )
+        coefficients, *_ = np.linalg.lstsq(matrix, observed, rcond=None)
+        residuals = observed - matrix @ coefficients
+        margin = max(float(np.std(residuals)) * 2, 0.5)
+        seconds = float(features @ coefficients)
+        return DurationPrediction(seconds, seconds - margin, seconds + margin, len(history), "fitted")
+
+    def record(self, text: str, voice_key: str, duration: float) -> None:
+        history = self.samples.setdefault(voice_key, [])
+        history.append(
+            {
+                "features": duration_features(text),
+                "duration": round(float(duration), 3),
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        del history[:-MAX_SAMPLES_PER_VOICE]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"version": 1, "samples": self.samples}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
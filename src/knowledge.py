@@ -1,14 +1,20 @@
 """위키백과 공개 API에서 대본의 검증 근거를 가져온다."""
 
 import logging
+import math
 import re
-from typing import Optional
+from typing import List, Optional
 
 import requests
 
 from models import KnowledgeSource
+from quality import _topic_terms
 
 LOGGER = logging.getLogger(__name__)
+DEFAULT_EVIDENCE_CHARS = 3600
+BOILERPLATE_SECTIONS = (
+    "같이 보기", "각주", "참고 문헌", "외부 링크", "See also", "References", "External links",
+)
 
 
 class KnowledgeError(RuntimeError):
@@ -139,3 +145,71 @@ def research_topic(query: str) -> KnowledgeSource:
             LOGGER.warning("위키백과 자료 조회 실패(%s): %s", language, exc)
     raise KnowledgeError("검증 가능한 위키백과 자료를 찾지 못했습니다. " + " | ".join(errors))
 
+
+def _evidence_sentences(extract: str) -> List[str]:
+    """문단 제목과 목록성 부록을 빼고 문장 단위로 나눈다."""
+    sentences: List[str] = []
+    # 본문 공백을 합쳐 저장하므로 "== 역사 ==" 같은 제목이 문장 사이에 섞여 있다.
+    for block in re.split(r"(={2,}[^=]+={2,})", extract):
+        heading = re.fullmatch(r"=+\s*(.+?)\s*=+", block.strip())
+        if heading:
+            if heading.group(1) in BOILERPLATE_SECTIONS:
+                break
+            continue
+        sentences.extend(
+            item.strip() for item in re.split(r"(?<=[.!?。])\s+", block) if item.strip()
+        )
+    return sentences
+
+
+def condense_extract(extract: str, query: str, budget: int = DEFAULT_EVIDENCE_CHARS) -> str:
+    """주제와 관련도가 높은 문장을 BM25로 골라 글자 예산 안의 근거 묶음을 만든다.
+
+    첫 문장(정의)은 항상 남기고, 고른 문장은 원래 순서대로 이어 붙인다.
+    """
+    extract = extract.strip()
+    if len(extract) <= budget:
+        return extract
+    sentences = _evidence_sentences(extract)
+    if not sentences:
+        return extract[:budget]
+    terms = [term.lower() for term in _topic_terms(query)]
+    lowered = [sentence.lower() for sentence in sentences]
+    average_length = sum(len(item) for item in lowered) / len(lowered)
+    document_frequency = {term: sum(1 for item in lowered if term in item) for term in terms}
+    count = len(sentences)
+    scores = []
+    for index, sentence in enumerate(lowered):
+        score = 0.0
+        for term in terms:
+            frequency = sentence.count(term)
+            if not frequency:
+                continue
+            frequency_in_corpus = document_frequency[term]
+            idf = math.log((count - frequency_in_corpus + 0.5) / (frequency_in_corpus + 0.5) + 1)
+            norm = frequency + 1.2 * (0.25 + 0.75 * len(sentence) / average_length)
+            score += idf * frequency * 2.2 / norm
+        # 앞쪽 문장일수록 정의와 개요일 가능성이 높아 작은 가산점을 준다.
+        scores.append(score + 0.3 / (1 + index))
+    smoothed = [
+        score + 0.25 * max(scores[max(0, index - 1): index + 2])
+        for index, score in enumerate(scores)
+    ]
+    order = [0] + sorted(range(1, count), key=lambda index: smoothed[index], reverse=True)
+    selected = []
+    used = 0
+    for index in order:
+        length = len(sentences[index]) + 1
+        if used + length > budget:
+            continue
+        selected.append(index)
+        used += length
+    selected.sort()
+    pieces = []
+    for position, index in enumerate(selected):
+        if position and index != selected[position - 1] + 1:
+            pieces.append("\n")
+        elif position:
+            pieces.append(" ")
+        pieces.append(sentences[index])
+    return "".join(pieces)
@@ -0,0 +1,61 @@
+"""AI 호출마다 단계·모델·토큰·지연 시간을 구조화해 남기고 실행 단위로 요약한다."""
+
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CallLog:
+    """호출 이벤트를 메모리에 모으고, 경로가 있으면 실행별 JSONL에도 한 줄씩 덧붙인다."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+
+    def record(self, **event: Any) -> Dict[str, Any]:
+        entry = {"at": datetime.now(timezone.utc).isoformat(), **event}
+        self.events.append(entry)
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as exc:
+                LOGGER.warning("AI 호출 기록을 쓰지 못했습니다: %s", exc)
+        return entry
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """단계별 호출 수·실패 수·토큰·시간 합계를 표 형태로 만든다. 마지막 행은 전체 합계다."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        for event in self.events:
+            for name in (event.get("step") or "unknown", "total"):
+                row = rows.setdefault(
+                    name,
+                    {
+                        "step": name,
+                        "calls": 0,
+                        "failures": 0,
+                        "prompt_tokens": 0,
+                        "cached_tokens": 0,
+                        "output_tokens": 0,
+                        "connect_seconds": 0.0,
+                        "generation_seconds": 0.0,
+                    },
+                )
+                row["calls"] += 1
+                row["failures"] += int(event.get("outcome") != "ok")
+                for key in ("prompt_tokens", "cached_tokens", "output_tokens"):
+                    row[key] += int(event.get(key) or 0)
+                for key in ("connect_seconds", "generation_seconds"):
+                    row[key] = round(row[key] + float(event.get(key) or 0.0), 3)
+        total = rows.pop("total", None)
+        table = sorted(
+            rows.values(),
+            key=lambda row: row["connect_seconds"] + row["generation_seconds"],
+            reverse=True,
+        )
+        return table + ([total] if total else [])
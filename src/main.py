@@ -10,44 +10,52 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List
 
-from ai_writer import GeminiWriter
+from ai_writer import DraftRejectedError, GeminiWriter, rank_prompt_candidates
+from checkpoints import CheckpointStore, checkpoint_max_age, file_fingerprint
+from content_calendar import scheduled_plans
+from duration_model import DurationModel
 from knowledge import research_exact_topic
+from llm_telemetry import CallLog
 from media_provider import StockMediaProvider
-from metrics import fetch_video_metrics, update_records
+from metrics import refresh_due_metrics
+from models import KnowledgeSource, ScriptPackage, StockClip, TopicPlan
+from narration_cache import NarrationCache
 from notifier import send_notification
+from performance import load_performance
+from prereview import prereview_script
 from quality import QualityGateError, source_is_relevant, validate_package
-from topic_catalog import eligible_topic_plans
-from trend_scout import fetch_youtube_trends, top_performing_topics
-from video_renderer import media_duration, render_short, split_caption_chunks
+from quota import QuotaLedger
+from stage_graph import Stage, StageGraph
+from state_store import StateStore
+from topic_catalog import VERIFIED_TOPICS, eligible_positions
+from topic_matcher import rank_positions
+from translation_memory import TranslationMemory
+from trend_scout import fetch_youtube_trends
+from video_renderer import (
+    create_narration,
+    expected_narration_key,
+    media_duration,
+    render_short,
+    split_caption_chunks,
+)
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 STATE_PATH = DATA_DIR / "published_topics.json"
+STATE_DB_PATH = DATA_DIR / "state.sqlite3"
+TRANSLATION_MEMORY_PATH = DATA_DIR / "translation_memory.json"
+DURATION_MODEL_PATH = DATA_DIR / "narration_durations.json"
 WORK_DIR = DATA_DIR / "work"
+CHECKPOINT_DIR = WORK_DIR / "checkpoints"
+NARRATION_CACHE_DIR = DATA_DIR / "cache" / "narration"
+TREND_CACHE_PATH = DATA_DIR / "cache" / "trends.json"
+TOPIC_INDEX_PATH = DATA_DIR / "cache" / "topic_lsh.npz"
+CALENDAR_PATH = DATA_DIR / "content_calendar.json"
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 LOGGER = logging.getLogger("original-shorts")
 
 
-def load_state() -> Dict[str, Any]:
-    if not STATE_PATH.exists():
-        return {"version": 1, "videos": []}
-    try:
-        data = json.loads(STATE_PATH.read_text(encoding="utf-8"))
-        if not isinstance(data.get("videos"), list):
-            raise ValueError("videos가 목록이 아님")
-        return data
-    except Exception as exc:
-        raise RuntimeError(f"운영 상태 파일을 읽지 못했습니다: {exc}") from exc
-
-
-def save_state(state: Dict[str, Any]) -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    STATE_PATH.write_text(
-        json.dumps(state, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
-    )
-
-
 def check_configuration(for_upload: bool) -> List[str]:
     missing = []
     required = ["YOUTUBE_DATA_API_KEY"]
@@ -106,7 +114,7 @@ def write_preview_metadata(path: Path, payload: Dict[str, Any]) -> None:
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
 
-def create_editorial_script(writer, plan, source, recent_topics):
+def create_editorial_script(writer, plan, source, recent_topics, duration_model=None):
     """작가 작성과 독립 편집 검수를 최대 두 번 수행한다."""
     feedback = []
     last_reason = "편집 검수를 통과하지 못했습니다."
@@ -114,11 +122,30 @@ def create_editorial_script(writer, plan, source, recent_topics):
         try:
             script = writer.write_script(plan, source, editorial_feedback=feedback)
             validate_package(plan, script, source, recent_topics)
-        except QualityGateError as exc:
+        except (QualityGateError, DraftRejectedError) as exc:
             last_reason = str(exc)
             feedback = [last_reason]
             LOGGER.warning("자동 품질 기준 미달로 대본을 다시 작성합니다(%s/2): %s", attempt + 1, exc)
             continue
+        if duration_model is not None:
+            problem = duration_model.predict(script.narration, expected_narration_key()).problem()
+            if problem:
+                # 음성 합성 뒤에야 길이 기준에 걸리는 일을 대본 단계에서 막는다.
+                feedback = [problem]
+                last_reason = problem
+                LOGGER.warning("예상 낭독 시간이 기준 밖이라 다시 작성합니다(%s/2): %s", attempt + 1, problem)
+                continue
+        prereview = prereview_script(source, script)
+        if not prereview["approved"]:
+            # 자료와 어긋난 숫자·이름은 유료 편집 검수 없이 바로 작가에게 돌려보낸다.
+            feedback = [item["message"] for item in prereview["issues"]]
+            last_reason = ", ".join(feedback[:3])
+            LOGGER.warning(
+                "로컬 사전 검수 미달로 편집 검수 없이 다시 작성합니다(%s/2): %s",
+                attempt + 1,
+                last_reason,
+            )
+            continue
         review = writer.review_script(plan, source, script)
         if review["approved"]:
             return script, review
@@ -135,91 +162,263 @@ def create_editorial_script(writer, plan, source, recent_topics):
     raise QualityGateError("최종 편집 검수를 통과하지 못했습니다: " + last_reason)
 
 
-def run(dry_run: bool = False) -> Dict[str, Any]:
-    missing = check_configuration(for_upload=not dry_run)
-    if missing:
-        raise RuntimeError("GitHub Secrets 누락: " + ", ".join(missing))
-
-    state = load_state()
-    records: List[Dict[str, Any]] = state["videos"]
-    data_api_key = os.environ["YOUTUBE_DATA_API_KEY"]
-
-    metrics = fetch_video_metrics(data_api_key, [item.get("video_id", "") for item in records])
-    if update_records(records, metrics):
-        save_state(state)
-        LOGGER.info("기존 영상 성과를 갱신했습니다.")
+def rank_candidate_plans(
+    writer, trend_signals, recent_topics, performance, candidate_positions
+) -> List[TopicPlan]:
+    """오늘 계획된 주제가 있으면 그 순서로, 없으면 AI 주제 순위로 후보를 정한다.
 
-    if WORK_DIR.exists():
-        resolved = WORK_DIR.resolve()
-        if DATA_DIR.resolve() not in resolved.parents:
-            raise RuntimeError("작업 폴더 안전 확인에 실패했습니다.")
-        shutil.rmtree(WORK_DIR)
-    media_dir = WORK_DIR / "media"
-    render_dir = WORK_DIR / "render"
-    media_dir.mkdir(parents=True, exist_ok=True)
-    render_dir.mkdir(parents=True, exist_ok=True)
-
-    recent_topics = [item.get("topic", "") for item in records[-12:] if item.get("topic")]
-    trends = fetch_youtube_trends(data_api_key)
-    writer = GeminiWriter()
-    top_topics = top_performing_topics(records)
-    candidate_pool = eligible_topic_plans(recent_topics)
-    ranked_candidates = writer.rank_topics(
-        trends,
+    후보는 목록 위치로 받아 점수로 먼저 추리고, 프롬프트나 예비 후보로 쓸 항목만 TopicPlan으로 읽는다.
+    """
+    top_topics = performance.top_topics(5)
+    category_scores = performance.category_scores()
+    planned = scheduled_plans(
+        CALENDAR_PATH,
+        datetime.now(timezone.utc).date(),
+        recent_topics,
+        index_path=TOPIC_INDEX_PATH,
+    )
+    if planned:
+        # 계획한 주제가 모두 실패할 때를 대비해 나머지 후보를 성과 점수 순으로 뒤에 붙인다.
+        LOGGER.info("콘텐츠 캘린더 계획을 사용해 주제 순위 AI 호출을 건너뜁니다: %s", planned[0].topic)
+        planned_topics = {plan.topic for plan in planned}
+        backups = [
+            position
+            for position in rank_positions(candidate_positions, [], top_topics, category_scores)
+            if VERIFIED_TOPICS.topics[position] not in planned_topics
+        ]
+        return (planned + VERIFIED_TOPICS.plans(backups[: max(0, 8 - len(planned))]))[:8]
+    signals = list(trend_signals)[:20]
+    shortlist = rank_positions(candidate_positions, signals, top_topics, category_scores)
+    candidates = VERIFIED_TOPICS.plans(shortlist[: rank_prompt_candidates(8)])
+    return writer.rank_topics(
+        signals,
         recent_topics,
         top_topics,
-        candidate_pool,
-        limit=min(8, len(candidate_pool)),
+        candidates,
+        limit=min(8, len(candidates)),
+        category_performance=category_scores,
     )
-    plan = None
-    source = None
-    script = None
-    editorial_review = None
+
+
+def select_editorial_topic(writer, ranked_candidates, recent_topics, duration_model, checkpoints):
+    """순위대로 자료 조회와 대본 작성·검수를 시도해 처음 통과한 (주제, 자료, 대본, 검수)를 돌려준다."""
     for topic_attempt, candidate in enumerate(ranked_candidates, start=1):
         LOGGER.info("선정 주제: %s (%s)", candidate.topic, candidate.trend_reason)
         try:
-            candidate_source = research_exact_topic(candidate.wiki_query)
+            candidate_source = checkpoints.run(
+                "research",
+                {"wiki_query": candidate.wiki_query},
+                lambda: research_exact_topic(candidate.wiki_query),
+                decode=lambda row: KnowledgeSource(**row),
+            )
         except Exception as exc:
             LOGGER.warning("검증 문서 직접 조회 실패(%s): %s", candidate.wiki_query, exc)
             continue
         if not source_is_relevant(candidate, candidate_source):
             LOGGER.warning("등록된 주제와 검증 문서가 일치하지 않습니다: %s", candidate_source.title)
             continue
+        script_inputs = {"plan": candidate, "source": candidate_source, "recent_topics": recent_topics}
+        drafted = checkpoints.load("script", script_inputs)
+        if drafted is not None and drafted.get("error"):
+            # 이전 실행에서 편집 기준을 넘지 못한 후보에 다시 비용을 쓰지 않는다.
+            LOGGER.warning("이전 실행에서 편집을 통과하지 못한 후보입니다(%s): %s", topic_attempt, drafted["error"])
+            continue
+        if drafted is not None:
+            return candidate, candidate_source, ScriptPackage(**drafted["script"]), drafted["review"]
         try:
             candidate_script, candidate_review = create_editorial_script(
                 writer,
                 candidate,
                 candidate_source,
                 recent_topics,
+                duration_model=duration_model,
             )
         except Exception as exc:
+            if isinstance(exc, QualityGateError):
+                checkpoints.save("script", script_inputs, {"error": str(exc)})
             LOGGER.warning("주제 편집 실패로 다음 검증 후보를 시도합니다(%s): %s", topic_attempt, exc)
             continue
-        plan = candidate
-        source = candidate_source
-        script = candidate_script
-        editorial_review = candidate_review
-        if plan is not None:
-            break
-    if plan is None or source is None or script is None or editorial_review is None:
-        raise QualityGateError("검증 자료와 최종 편집 기준을 모두 통과한 주제를 만들지 못했습니다.")
-
-    caption_chunks = split_caption_chunks(script.narration)
+        finally:
+            writer.release_contexts()
+        checkpoints.save("script", script_inputs, {"script": candidate_script, "review": candidate_review})
+        return candidate, candidate_source, candidate_script, candidate_review
+    raise QualityGateError("검증 자료와 최종 편집 기준을 모두 통과한 주제를 만들지 못했습니다.")
+
+
+def run(dry_run: bool = False, resume: bool = False) -> Dict[str, Any]:
+    missing = check_configuration(for_upload=not dry_run)
+    if missing:
+        raise RuntimeError("GitHub Secrets 누락: " + ", ".join(missing))
+
+    store = StateStore(STATE_DB_PATH, legacy_json=STATE_PATH)
+    run_id = os.getenv("GITHUB_RUN_ID") or datetime.now(timezone.utc).strftime("local-%Y%m%dT%H%M%S")
+    store.start_run(run_id, "dry-run" if dry_run else "upload")
     try:
-        script.caption_translations = writer.translate_caption_chunks(caption_chunks)
+        result = produce_short(store, dry_run, resume)
     except Exception as exc:
-        # 번역 쿼터나 일시 장애가 한국어 영상 전체의 업로드를 막지는 않도록 한다.
-        script.caption_translations = []
-        LOGGER.warning("영문 자막 생성 실패로 한글 자막만 사용합니다: %s", exc)
-
-    provider = StockMediaProvider()
-    clips = provider.fetch_clips(plan.stock_queries, media_dir, limit=4)
-    final_video = render_short(
-        clips,
-        script.narration,
-        render_dir,
-        caption_translations=script.caption_translations,
+        store.finish_run(run_id, "failed", str(exc))
+        raise
+    else:
+        store.finish_run(run_id, "ok", str(result.get("video_url", "")))
+        return result
+    finally:
+        store.close()
+
+
+def produce_short(store: StateStore, dry_run: bool, resume: bool = False) -> Dict[str, Any]:
+    data_api_key = os.environ["YOUTUBE_DATA_API_KEY"]
+
+    ledger = QuotaLedger(store)
+    if not dry_run:
+        # 렌더링을 다 마친 뒤에야 업로드 한도가 모자란 것을 알지 않도록 먼저 확인한다.
+        ledger.require("videos.insert")
+
+    checkpoints = CheckpointStore(CHECKPOINT_DIR, resume=resume)
+    if WORK_DIR.exists():
+        resolved = WORK_DIR.resolve()
+        if DATA_DIR.resolve() not in resolved.parents:
+            raise RuntimeError("작업 폴더 안전 확인에 실패했습니다.")
+        if resume:
+            # 이어 하기에서는 작업 폴더를 두고, 오래된 단계 기록만 지운다.
+            removed = checkpoints.prune(checkpoint_max_age())
+            if removed:
+                LOGGER.info("오래된 체크포인트 %s개를 지웠습니다.", removed)
+        else:
+            shutil.rmtree(WORK_DIR)
+    media_dir = WORK_DIR / "media"
+    render_dir = WORK_DIR / "render"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    render_dir.mkdir(parents=True, exist_ok=True)
+
+    recent_topics = store.recent_topics(12)
+    writer = GeminiWriter(
+        translation_memory=TranslationMemory(TRANSLATION_MEMORY_PATH),
+        call_log=CallLog(WORK_DIR / "llm_calls.jsonl"),
     )
+    duration_model = DurationModel(DURATION_MODEL_PATH)
+    candidate_positions = eligible_positions(recent_topics, index_path=TOPIC_INDEX_PATH)
+    catalog_digest = file_fingerprint(VERIFIED_TOPICS.path)
+
+    def refresh_metrics() -> bool:
+        refreshed = refresh_due_metrics(store, data_api_key, ledger=ledger)
+        if refreshed:
+            store.export_json(STATE_PATH)
+            LOGGER.info("기존 영상 성과를 갱신했습니다.")
+        return refreshed
+
+    def rank(trend_signals, metrics_refreshed) -> List[TopicPlan]:
+        return checkpoints.run(
+            "ranking",
+            {
+                "date": datetime.now(timezone.utc).date(),
+                # 후보는 최근 주제와 목록 내용으로 정해지므로 후보 목록 대신 목록 지문을 쓴다.
+                "recent_topics": recent_topics,
+                "catalog": catalog_digest,
+            },
+            lambda: rank_candidate_plans(
+                writer, trend_signals, recent_topics, load_performance(store), candidate_positions
+            ),
+            decode=lambda rows: [TopicPlan(**row) for row in rows],
+        )
+
+    def translate(script) -> List[str]:
+        caption_chunks = split_caption_chunks(script.narration)
+        try:
+            return checkpoints.run(
+                "translation",
+                {"chunks": caption_chunks},
+                lambda: writer.translate_caption_chunks(caption_chunks),
+            )
+        except Exception as exc:
+            # 번역 쿼터나 일시 장애가 한국어 영상 전체의 업로드를 막지는 않도록 한다.
+            LOGGER.warning("영문 자막 생성 실패로 한글 자막만 사용합니다: %s", exc)
+            return []
+
+    def fetch_clips(plan) -> List[StockClip]:
+        return checkpoints.run(
+            "clips",
+            {"queries": plan.stock_queries, "limit": 4},
+            lambda: StockMediaProvider().fetch_clips(plan.stock_queries, media_dir, limit=4),
+            decode=lambda rows: [StockClip(**{**row, "path": Path(row["path"])}) for row in rows],
+            valid=lambda items: all(item.path.exists() for item in items),
+        )
+
+    def narrate(script):
+        return checkpoints.run(
+            "narration",
+            {"narration": script.narration, "voice": expected_narration_key()},
+            lambda: create_narration(
+                script.narration,
+                render_dir,
+                cache=NarrationCache(
+                    NARRATION_CACHE_DIR,
+                    max_bytes=int(os.getenv("NARRATION_CACHE_MB", "200")) * 1024 * 1024,
+                ),
+                duration_model=duration_model,
+            ),
+            decode=lambda row: (Path(row[0]), float(row[1]), dict(row[2])),
+            valid=lambda result: result[0].exists(),
+        )
+
+    def render(script, clips, narration, caption_translations) -> Path:
+        return checkpoints.run(
+            "render",
+            {
+                "narration": script.narration,
+                "audio": str(narration[0]),
+                "translations": caption_translations,
+                "clips": [(str(item.path), item.path.stat().st_size) for item in clips],
+            },
+            lambda: render_short(
+                clips,
+                script.narration,
+                render_dir,
+                caption_translations=caption_translations,
+                narration=narration,
+            ),
+            decode=Path,
+            valid=lambda path: all(
+                item.exists()
+                for item in (path, render_dir / "audio_metadata.json", render_dir / "caption_metadata.json")
+            ),
+        )
+
+    # 대본이 확정되면 자막 번역·영상 수집·내레이션 합성은 서로 기다리지 않고 동시에 진행한다.
+    pipeline = StageGraph(
+        [
+            Stage(
+                "trends",
+                lambda: fetch_youtube_trends(data_api_key, ledger=ledger, cache_path=TREND_CACHE_PATH),
+                outputs=("trend_signals",),
+            ),
+            Stage("metrics", refresh_metrics, outputs=("metrics_refreshed",)),
+            Stage("ranking", rank, ("trend_signals", "metrics_refreshed"), ("ranked_candidates",)),
+            Stage(
+                "editorial",
+                lambda ranked_candidates: select_editorial_topic(
+                    writer, ranked_candidates, recent_topics, duration_model, checkpoints
+                ),
+                ("ranked_candidates",),
+                ("plan", "source", "script", "editorial_review"),
+            ),
+            Stage("translation", translate, ("script",), ("caption_translations",)),
+            Stage("clips", fetch_clips, ("plan",), ("clips",)),
+            Stage("narration", narrate, ("script",), ("narration",)),
+            Stage(
+                "render",
+                render,
+                ("script", "clips", "narration", "caption_translations"),
+                ("final_video",),
+            ),
+        ]
+    ).run()
+    plan = pipeline.values["plan"]
+    source = pipeline.values["source"]
+    script = pipeline.values["script"]
+    editorial_review = pipeline.values["editorial_review"]
+    clips = pipeline.values["clips"]
+    final_video = pipeline.values["final_video"]
+    script.caption_translations = pipeline.values["caption_translations"]
     duration = media_duration(final_video)
     audio_metadata_path = render_dir / "audio_metadata.json"
     audio_metadata = json.loads(audio_metadata_path.read_text(encoding="utf-8"))
@@ -228,6 +427,7 @@ def run(dry_run: bool = False) -> Dict[str, Any]:
     description = build_description(script, source, clips)
     metadata = {
         "topic": plan.topic,
+        "category": plan.category,
         "title": script.title,
         "hook": script.hook,
         "midpoint_hook": script.midpoint_hook,
@@ -236,6 +436,11 @@ def run(dry_run: bool = False) -> Dict[str, Any]:
         "duration_seconds": round(duration, 2),
         "source": {"title": source.title, "url": source.url, "license": source.license_name},
         "editorial_review": editorial_review,
+        "prompt_cache": writer.context_cache.summary(),
+        "llm_usage": writer.call_log.summary(),
+        "youtube_quota": ledger.summary(),
+        "resumed_stages": checkpoints.reused,
+        "pipeline": pipeline.summary(),
         "source_strategy": "curated exact-title Wikipedia document",
         "stock_assets": [
             {"provider": item.provider, "creator": item.creator, "url": item.source_url}
@@ -258,18 +463,24 @@ def run(dry_run: bool = False) -> Dict[str, Any]:
     # 설정 점검과 건식 실행은 YouTube 인증 패키지를 불러오지 않아도 된다.
     from youtube_uploader import YouTubeUploader
 
-    uploader = YouTubeUploader()
-    result = uploader.upload_video(
-        final_video,
-        title=f"{script.title} #shorts",
-        description=description,
-        tags=["shorts", "지식쇼츠", *script.tags],
-        privacy=os.getenv("YOUTUBE_PRIVACY", "public"),
+    # 업로드 뒤 기록 단계에서 실패해도 이어 하기가 같은 영상을 두 번 올리지 않게 한다.
+    result = checkpoints.run(
+        "upload",
+        {"video": file_fingerprint(final_video), "title": script.title},
+        lambda: YouTubeUploader().upload_video(
+            final_video,
+            title=f"{script.title} #shorts",
+            description=description,
+            tags=["shorts", "지식쇼츠", *script.tags],
+            privacy=os.getenv("YOUTUBE_PRIVACY", "public"),
+            ledger=ledger,
+        ),
     )
     now = datetime.now(timezone.utc).isoformat()
     record = {
         "published_at": now,
         "topic": plan.topic,
+        "category": plan.category,
         "title": script.title,
         "video_id": result["video_id"],
         "video_url": result["video_url"],
@@ -279,9 +490,10 @@ def run(dry_run: bool = False) -> Dict[str, Any]:
         "editorial_score": editorial_review["score"],
         "metrics": {"views": 0, "likes": 0, "comments": 0},
     }
-    records.append(record)
-    state["videos"] = records[-365:]
-    save_state(state)
+    store.add_video(record)
+    store.export_json(STATE_PATH)
+    # 업로드를 기록했으니 다음 실행이 이 결과를 이어 쓰지 않게 단계 기록을 지운다.
+    checkpoints.clear()
     write_preview_metadata(WORK_DIR / "metadata.json", {**metadata, **result, "dry_run": False})
     send_notification(
         f"[지식 쇼츠] 업로드 완료 - {script.title}",
@@ -295,6 +507,9 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="원본 AI 지식 쇼츠 자동화")
     parser.add_argument("--dry-run", action="store_true", help="영상만 만들고 업로드하지 않음")
     parser.add_argument("--check-config", action="store_true", help="비밀키 이름만 점검")
+    parser.add_argument(
+        "--resume", action="store_true", help="작업 폴더를 지우지 않고 입력이 같은 완료 단계를 건너뜀"
+    )
     return parser.parse_args()
 
 
@@ -307,7 +522,7 @@ def main() -> int:
                 raise RuntimeError("GitHub Secrets 누락: " + ", ".join(missing))
             LOGGER.info("필수 GitHub Secrets 이름 확인 완료")
             return 0
-        result = run(dry_run=args.dry_run)
+        result = run(dry_run=args.dry_run, resume=args.resume)
         LOGGER.info("작업 완료: %s", result.get("video_url", "건식 실행"))
         return 0
     except Exception as exc:
@@ -318,4 +533,4 @@ def main() -> int:
 
 if __name__ == "__main__":
     sys.exit(main())
-
+
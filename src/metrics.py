@@ -1,49 +1,122 @@
 """공개 YouTube 통계를 수집해 다음 주제 선택에 반영한다."""
 
 import logging
-from typing import Any, Dict, Iterable
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 LOGGER = logging.getLogger(__name__)
+BATCH_SIZE = 50
+# (이 나이 미만이면, 이 간격마다 갱신). 마지막 구간보다 오래된 영상은 주 1회다.
+REFRESH_SCHEDULE = (
+    (timedelta(days=3), timedelta(hours=1)),
+    (timedelta(days=7), timedelta(hours=6)),
+    (timedelta(days=30), timedelta(days=1)),
+)
+OLD_VIDEO_REFRESH = timedelta(days=7)
 
 
-def fetch_video_metrics(api_key: str, video_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
-    ids = [item for item in video_ids if item]
-    if not api_key or not ids:
-        return {}
-    output: Dict[str, Dict[str, int]] = {}
-    for start in range(0, len(ids), 50):
-        batch = ids[start:start + 50]
-        try:
-            response = requests.get(
-                "https://www.googleapis.com/youtube/v3/videos",
-                params={
-                    "key": api_key,
-                    "part": "statistics,status",
-                    "id": ",".join(batch),
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            for item in response.json().get("items", []):
-                stats = item.get("statistics", {})
-                output[item["id"]] = {
-                    "views": int(stats.get("viewCount", 0) or 0),
-                    "likes": int(stats.get("likeCount", 0) or 0),
-                    "comments": int(stats.get("commentCount", 0) or 0),
-                }
-        except Exception as exc:
-            LOGGER.warning("YouTube 성과 수집 실패: %s", exc)
-    return output
-
-
-def update_records(records: list[Dict[str, Any]], metrics: Dict[str, Dict[str, int]]) -> bool:
-    changed = False
-    for record in records:
-        video_id = record.get("video_id")
-        if video_id in metrics and record.get("metrics") != metrics[video_id]:
-            record["metrics"] = metrics[video_id]
-            changed = True
-    return changed
+def _metric_workers() -> int:
+    return max(1, int(os.getenv("METRICS_WORKERS", "4")))
+
+
+def _refresh_limit() -> int:
+    return max(BATCH_SIZE, int(os.getenv("METRICS_REFRESH_LIMIT", "500")))
+
+
+def _timestamp(moment: datetime) -> str:
+    # 문자열 비교로 예정 시각을 고르므로 자릿수를 고정한다.
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def refresh_interval(age: timedelta) -> timedelta:
+    """올린 지 얼마 안 된 영상일수록 자주, 한 달이 지나면 주 1회 통계를 다시 본다."""
+    for max_age, interval in REFRESH_SCHEDULE:
+        if age < max_age:
+            return interval
+    return OLD_VIDEO_REFRESH
 
+
+def _fetch_batch(api_key: str, batch: List[str]) -> Optional[Dict[str, Dict[str, int]]]:
+    """요청이 실패하면 None을 돌려 다음 실행에서 다시 시도하게 한다."""
+    try:
+        response = requests.get(
+            "https://www.googleapis.com/youtube/v3/videos",
+            params={
+                "key": api_key,
+                "part": "statistics,status",
+                "id": ",".join(batch),
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        output = {}
+        for item in response.json().get("items", []):
+            stats = item.get("statistics", {})
+            output[item["id"]] = {
+                "views": int(stats.get("viewCount", 0) or 0),
+                "likes": int(stats.get("likeCount", 0) or 0),
+                "comments": int(stats.get("commentCount", 0) or 0),
+            }
+        return output
+    except Exception as exc:
+        LOGGER.warning("YouTube 성과 수집 실패: %s", exc)
+        return None
+
+
+def _fetch_batches(
+    api_key: str, ids: List[str]
+) -> List[Tuple[List[str], Optional[Dict[str, Dict[str, int]]]]]:
+    batches = [ids[start:start + BATCH_SIZE] for start in range(0, len(ids), BATCH_SIZE)]
+    if not batches:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_metric_workers(), len(batches))) as pool:
+        return list(zip(batches, pool.map(lambda batch: _fetch_batch(api_key, batch), batches)))
+
+
+def refresh_due_metrics(
+    store: Any,
+    api_key: str,
+    now: Optional[datetime] = None,
+    ledger: Optional[Any] = None,
+) -> bool:
+    """갱신 시각이 된 영상만 조회해 저장하고, 값이 바뀐 영상이 있었는지 돌려준다."""
+    if not api_key:
+        return False
+    now = now or datetime.now(timezone.utc)
+    due = dict(store.due_videos(_timestamp(now), limit=_refresh_limit()))
+    if ledger is not None and due:
+        batches = -(-len(due) // BATCH_SIZE)
+        allowed = ledger.affordable("videos.list", batches)
+        if allowed < batches:
+            # 할당량이 모자라면 최근 영상부터 확인하고 오래된 영상은 다음 실행으로 미룬다.
+            newest = sorted(due, key=lambda video_id: due[video_id], reverse=True)
+            due = {video_id: due[video_id] for video_id in newest[: allowed * BATCH_SIZE]}
+        if due and not ledger.spend("videos.list", allowed):
+            due = {}
+    if not due:
+        return False
+    collected: Dict[str, Dict[str, int]] = {}
+    schedule: Dict[str, str] = {}
+    for batch, metrics in _fetch_batches(api_key, list(due)):
+        if metrics is None:
+            continue
+        collected.update(metrics)
+        # 삭제·비공개로 응답에 없는 영상도 확인한 것으로 보고 다음 주기까지 미룬다.
+        for video_id in batch:
+            try:
+                published = datetime.fromisoformat(due[video_id])
+                if published.tzinfo is None:
+                    published = published.replace(tzinfo=timezone.utc)
+                age = now - published
+            except ValueError:
+                age = OLD_VIDEO_REFRESH * 10
+            schedule[video_id] = _timestamp(now + refresh_interval(age))
+    refreshed_at = _timestamp(now)
+    changed = store.update_metrics(collected, captured_at=refreshed_at)
+    store.schedule_refresh(schedule, refreshed_at)
+    LOGGER.info("성과 갱신 대상 %s개 중 %s개를 확인했습니다.", len(due), len(schedule))
+    return changed
@@ -0,0 +1,104 @@
+"""같은 대본의 내레이션을 다시 합성하지 않도록 원본·정규화 음성을 내용 주소로 보관한다."""
+
+import hashlib
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+ENTRY_FILE = "entry.json"
+
+
+def cache_key(*parts: Any) -> str:
+    """엔진·음성·모델·프롬프트 형식·낭독 문장을 합쳐 하나의 키로 만든다."""
+    payload = json.dumps([str(part) for part in parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NarrationCache:
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def load(self, key: str, output_dir: Path) -> Optional[Tuple[Path, float, Dict[str, Any]]]:
+        """적중하면 보관된 파일을 작업 폴더로 복사해 (정규화 음성, 길이, 메타데이터)를 돌려준다."""
+        entry_dir = self.root / key
+        entry_path = entry_dir / ENTRY_FILE
+        if not entry_path.exists():
+            return None
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+            output_dir.mkdir(parents=True, exist_ok=True)
+            copied = {}
+            for role, name in entry["files"].items():
+                target = output_dir / name
+                shutil.copyfile(entry_dir / name, target)
+                copied[role] = target
+            entry["used_at"] = time.time()
+            entry_path.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception as exc:
+            LOGGER.warning("내레이션 캐시 항목이 손상되어 다시 합성합니다: %s", exc)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        LOGGER.info("내레이션 캐시 적중: %s", key[:12])
+        return copied["normalized"], float(entry["duration"]), dict(entry["metadata"])
+
+    def store(
+        self,
+        key: str,
+        files: Dict[str, Path],
+        duration: float,
+        metadata: Dict[str, Any],
+    ) -> None:
+        """files에는 최소한 normalized 역할의 파일이 있어야 한다. 실패해도 렌더링은 계속한다."""
+        entry_dir = self.root / key
+        try:
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            names = {}
+            for role, path in files.items():
+                shutil.copyfile(path, entry_dir / path.name)
+                names[role] = path.name
+            (entry_dir / ENTRY_FILE).write_text(
+                json.dumps(
+                    {
+                        "files": names,
+                        "duration": duration,
+                        "metadata": metadata,
+                        "used_at": time.time(),
+                    },
+                    ensure_ascii=False,
+                    indent=2,
+                ),
+                encoding="utf-8",
+            )
+        except Exception as exc:
+            LOGGER.warning("내레이션 캐시 저장 실패: %s", exc)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """전체 용량이 한도를 넘으면 가장 오래 쓰지 않은 항목부터 지운다."""
+        if not self.root.exists():
+            return
+        entries = []
+        for entry_dir in self.root.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            size = sum(item.stat().st_size for item in entry_dir.iterdir() if item.is_file())
+            try:
+                used_at = float(json.loads((entry_dir / ENTRY_FILE).read_text(encoding="utf-8"))["used_at"])
+            except Exception:
+                used_at = 0.0
+            entries.append((used_at, size, entry_dir))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            LOGGER.info("내레이션 캐시 용량 정리: %s", entry_dir.name[:12])
@@ -0,0 +1,152 @@
+"""성과 스냅샷 시계열에서 영상별 증가 속도·나이 보정 성과·분야별 집계를 한 번에 계산한다."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from topic_catalog import VERIFIED_TOPICS
+
+# 참여 점수 = 조회수 + 좋아요×20 + 댓글×40
+LIKE_WEIGHT = 20
+COMMENT_WEIGHT = 40
+VELOCITY_WINDOW_DAYS = 7.0
+MIN_AGE_DAYS = 0.25
+MIN_CURVE_VIDEOS = 5
+# 영상이 적어 채널의 나이-성과 곡선을 맞출 수 없을 때 쓰는 기울기(성과 ∝ 나이^0.5)
+PRIOR_AGE_EXPONENT = 0.5
+UNKNOWN_CATEGORY = "unknown"
+
+
+def engagement_score(views: np.ndarray, likes: np.ndarray, comments: np.ndarray) -> np.ndarray:
+    return views + likes * LIKE_WEIGHT + comments * COMMENT_WEIGHT
+
+
+def _epoch_days(values: Sequence[str]) -> np.ndarray:
+    days = []
+    for value in values:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        days.append(moment.timestamp() / 86400)
+    return np.array(days, dtype=float)
+
+
+@dataclass
+class PerformanceReport:
+    video_ids: np.ndarray
+    topics: np.ndarray
+    categories: np.ndarray
+    age_days: np.ndarray
+    score: np.ndarray
+    # 최근 7일 창에서 하루에 늘어난 점수. 스냅샷이 하나뿐이면 게시 후 평균이다.
+    velocity: np.ndarray
+    # 채널의 나이-성과 곡선 대비 log 잔차. 0보다 크면 같은 나이의 영상보다 잘 된 것이다.
+    relative: np.ndarray
+    category_stats: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def top_topics(self, limit: int = 5) -> List[str]:
+        """나이 보정 성과, 같으면 증가 속도 순으로 중복 없이 주제를 고른다."""
+        topics: List[str] = []
+        for index in np.lexsort((-self.velocity, -self.relative)):
+            topic = str(self.topics[index])
+            if topic and topic not in topics:
+                topics.append(topic)
+            if len(topics) >= limit:
+                break
+        return topics
+
+    def category_scores(self) -> Dict[str, float]:
+        return {
+            category: round(stats["relative"], 3)
+            for category, stats in self.category_stats.items()
+            if category != UNKNOWN_CATEGORY
+        }
+
+
+def _age_curve(log_age: np.ndarray, log_score: np.ndarray) -> Tuple[float, float]:
+    if len(log_age) >= MIN_CURVE_VIDEOS and float(np.ptp(log_age)) > 0.5:
+        slope, intercept = np.polyfit(log_age, log_score, 1)
+        return float(slope), float(intercept)
+    slope = PRIOR_AGE_EXPONENT
+    return slope, float(np.median(log_score - slope * log_age))
+
+
+def analyze_performance(
+    videos: Sequence[Tuple[str, str, str, str, int, int, int]],
+    snapshots: Sequence[Tuple[str, str, int, int, int]],
+    now: Optional[datetime] = None,
+) -> PerformanceReport:
+    """videos는 (id, 게시 시각, 주제, 분야, 조회, 좋아요, 댓글), snapshots는 (id, 수집 시각, 조회·좋아요·댓글) 행이다."""
+    now_days = (now or datetime.now(timezone.utc)).timestamp() / 86400
+    count = len(videos)
+    ids = np.array([row[0] for row in videos], dtype=object)
+    topics = np.array([row[2] or "" for row in videos], dtype=object)
+    categories = np.array(
+        [row[3] or VERIFIED_TOPICS.category_of(row[2] or "") or UNKNOWN_CATEGORY for row in videos],
+        dtype=object,
+    )
+    counts = np.array([row[4:7] for row in videos], dtype=float).reshape(count, 3)
+    score = engagement_score(counts[:, 0], counts[:, 1], counts[:, 2])
+    age = np.maximum(now_days - _epoch_days([row[1] for row in videos]), MIN_AGE_DAYS)
+    velocity = score / age
+
+    position = {video_id: index for index, video_id in enumerate(ids)}
+    known = [row for row in snapshots if row[0] in position]
+    if known:
+        index = np.array([position[row[0]] for row in known])
+        taken = _epoch_days([row[1] for row in known])
+        values = np.array([row[2:5] for row in known], dtype=float)
+        snapshot_score = engagement_score(values[:, 0], values[:, 1], values[:, 2])
+        latest = np.full(count, -np.inf)
+        np.maximum.at(latest, index, taken)
+        in_window = taken >= latest[index] - VELOCITY_WINDOW_DAYS
+        base = np.full(count, np.inf)
+        np.minimum.at(base, index[in_window], taken[in_window])
+        latest_score = np.zeros(count)
+        base_score = np.zeros(count)
+        is_latest = taken == latest[index]
+        is_base = taken == base[index]
+        latest_score[index[is_latest]] = snapshot_score[is_latest]
+        base_score[index[is_base]] = snapshot_score[is_base]
+        span = latest - base
+        measured = np.isfinite(span) & (span > 0)
+        velocity[measured] = (latest_score[measured] - base_score[measured]) / span[measured]
+
+    log_age = np.log(age)
+    log_score = np.log1p(score)
+    relative = np.zeros(count)
+    if count:
+        slope, intercept = _age_curve(log_age, log_score)
+        relative = log_score - (intercept + slope * log_age)
+
+    category_stats: Dict[str, Dict[str, float]] = {}
+    if count:
+        names, inverse = np.unique(categories.astype(str), return_inverse=True)
+        sizes = np.bincount(inverse)
+        mean_relative = np.bincount(inverse, weights=relative) / sizes
+        mean_velocity = np.bincount(inverse, weights=velocity) / sizes
+        total_views = np.bincount(inverse, weights=counts[:, 0])
+        for slot, name in enumerate(names):
+            category_stats[str(name)] = {
+                "videos": int(sizes[slot]),
+                "relative": float(mean_relative[slot]),
+                "velocity": float(mean_velocity[slot]),
+                "views": float(total_views[slot]),
+            }
+    return PerformanceReport(
+        video_ids=ids,
+        topics=topics,
+        categories=categories,
+        age_days=age,
+        score=score,
+        velocity=velocity,
+        relative=relative,
+        category_stats=category_stats,
+    )
+
+
+def load_performance(store: Any, now: Optional[datetime] = None) -> PerformanceReport:
+    videos, snapshots = store.performance_rows()
+    return analyze_performance(videos, snapshots, now)
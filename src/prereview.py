@@ -0,0 +1,94 @@
+"""유료 편집 검수 전에 대본의 숫자·고유명사·문장 근거를 검증 자료와 빠르게 대조한다."""
+
+import re
+from typing import Any, Dict, List
+
+from models import KnowledgeSource, ScriptPackage
+from quality import _topic_terms
+
+NUMBER_PATTERN = re.compile(
+    r"(\d+(?:[.,]\d+)*)\s*"
+    r"(%|퍼센트|km|cm|mm|kg|m|g|℃|°C|광년|킬로미터|미터|킬로그램|그램|톤|세기|년|개|종|배|분|초|시간|도)?"
+)
+LATIN_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9\-]+")
+QUOTED_PATTERN = re.compile(r"[\"'“‘「『]([^\"'”’」』]{2,20})[\"'”’」』]")
+FILLER_TERMS = {
+    "그리고", "하지만", "그런데", "그래서", "바로", "이것", "그것", "우리", "여러분",
+    "있습니다", "합니다", "됩니다", "입니다", "아닙니다", "것입니다", "때문", "정말", "다시",
+}
+MIN_SENTENCE_TERMS = 3
+MIN_SUPPORT_RATIO = 0.34
+MAX_UNSUPPORTED_SENTENCES = 1
+
+
+class SourceIndex:
+    """검증 자료의 압축 본문과 숫자 집합을 한 번만 만들어 반복 조회한다."""
+
+    def __init__(self, extract: str):
+        self.compact = re.sub(r"\s+", "", extract).lower()
+        self.numbers = {
+            value.replace(",", "") for value, _ in NUMBER_PATTERN.findall(extract)
+        }
+
+    def has_number(self, value: str, unit: str = "") -> bool:
+        number = value.replace(",", "")
+        if number not in self.numbers:
+            return False
+        if not unit:
+            return True
+        return any(f"{item}{unit}".lower() in self.compact for item in (value, number))
+
+    def has_term(self, term: str) -> bool:
+        term = term.lower()
+        stems = {term}
+        if len(term) >= 3:
+            stems.add(term[:-1])
+        if len(term) >= 4:
+            stems.add(term[:-2])
+        return any(stem in self.compact for stem in stems)
+
+
+def _issue(kind: str, text: str, message: str) -> Dict[str, str]:
+    return {"kind": kind, "text": text, "message": message}
+
+
+def prereview_script(source: KnowledgeSource, script: ScriptPackage) -> Dict[str, Any]:
+    """자료에 없는 숫자·이름과 근거 없는 문장을 찾아 구조화된 지적 목록으로 돌려준다."""
+    index = SourceIndex(source.extract)
+    narration = re.sub(r"\s+", " ", script.narration).strip()
+    issues: List[Dict[str, str]] = []
+
+    for value, unit in dict.fromkeys(NUMBER_PATTERN.findall(narration)):
+        if not index.has_number(value, unit):
+            text = f"{value}{unit}"
+            issues.append(_issue("number", text, f"검증 자료에 없는 숫자 표현입니다: {text}"))
+    entities = LATIN_PATTERN.findall(narration) + QUOTED_PATTERN.findall(narration)
+    for entity in dict.fromkeys(entities):
+        if not index.has_term(re.sub(r"\s+", "", entity)):
+            issues.append(_issue("entity", entity, f"검증 자료에 없는 고유명사입니다: {entity}"))
+
+    unsupported = 0
+    sentences = re.split(r"(?<=[.!?？。…])\s+", narration)
+    for sentence in sentences:
+        if sentence.endswith(("?", "？")) or (script.closing_loop and sentence in script.closing_loop):
+            continue
+        terms = [term for term in _topic_terms(sentence) if term not in FILLER_TERMS]
+        if len(terms) < MIN_SENTENCE_TERMS:
+            continue
+        supported = sum(1 for term in terms if index.has_term(term))
+        if supported / len(terms) < MIN_SUPPORT_RATIO:
+            unsupported += 1
+            issues.append(
+                _issue(
+                    "unsupported_sentence",
+                    sentence,
+                    f"검증 자료에서 근거를 찾기 어려운 문장입니다: {sentence}",
+                )
+            )
+
+    hard_issues = [item for item in issues if item["kind"] in ("number", "entity")]
+    return {
+        "approved": not hard_issues and unsupported <= MAX_UNSUPPORTED_SENTENCES,
+        "issues": issues,
+        "checked_sentences": len(sentences),
+    }
@@ -1,10 +1,10 @@
 """저품질·고위험·반복 콘텐츠가 업로드되지 않도록 차단한다."""
 
 import re
-from difflib import SequenceMatcher
 from typing import Iterable
 
 from models import KnowledgeSource, ScriptPackage, TopicPlan
+from topic_similarity import most_similar
 
 RISK_TERMS = {
     "대통령", "선거", "정당", "전쟁", "사망", "살인", "범죄", "마약",
@@ -99,9 +99,7 @@ def validate_package(
     if blocked:
         raise QualityGateError("안전 기준에 걸린 표현: " + ", ".join(blocked))
 
-    current = _normalized(plan.topic)
-    for old in recent_topics:
-        ratio = SequenceMatcher(None, current, _normalized(old)).ratio()
-        if ratio >= 0.78:
-            raise QualityGateError(f"최근 주제와 너무 비슷합니다: {old}")
-
+    duplicate = most_similar(plan.topic, recent_topics, 0.78)
+    if duplicate is not None:
+        raise QualityGateError(f"최근 주제와 너무 비슷합니다: {duplicate}")
+
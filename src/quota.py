@@ -0,0 +1,104 @@
+"""YouTube Data API 단위 사용량을 호출 위치별로 기록하고, 업로드 몫을 남겨 두도록 예산을 나눈다."""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    "videos.list": 1,
+    "videos.insert": 1600,
+}
+DEFAULT_DAILY_QUOTA = 10000
+
+try:
+    from zoneinfo import ZoneInfo
+
+    QUOTA_TIMEZONE: Any = ZoneInfo("America/Los_Angeles")
+except Exception:  # tzdata가 없는 환경
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """할당량은 태평양 시간 자정에 초기화된다."""
+    return (now or datetime.now(timezone.utc)).astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+def call_cost(call_site: str, calls: int = 1) -> int:
+    return QUOTA_COSTS[call_site] * calls
+
+
+class QuotaLedger:
+    """필수 호출(업로드)은 남은 한도 전체를, 나머지는 업로드 예약분을 뺀 한도만 쓴다."""
+
+    def __init__(
+        self,
+        store: Any,
+        daily_limit: Optional[int] = None,
+        upload_reserve: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ):
+        self.store = store
+        self.daily_limit = daily_limit or int(os.getenv("YOUTUBE_DAILY_QUOTA", str(DEFAULT_DAILY_QUOTA)))
+        self.upload_reserve = (
+            call_cost("videos.insert") if upload_reserve is None else upload_reserve
+        )
+        self.now = now
+        # 동시에 도는 수집 작업이 같은 잔여량을 보고 함께 쓰지 않게 한다.
+        self.lock = threading.Lock()
+
+    @property
+    def day(self) -> str:
+        return quota_day(self.now)
+
+    def used(self) -> int:
+        return sum(self.store.quota_usage(self.day).values())
+
+    def remaining(self) -> int:
+        return max(0, self.daily_limit - self.used())
+
+    def optional_budget(self) -> int:
+        """업로드 예약분을 지키면서 부가 호출에 쓸 수 있는 단위다."""
+        return max(0, self.remaining() - self.upload_reserve)
+
+    def affordable(self, call_site: str, calls: int, essential: bool = False) -> int:
+        budget = self.remaining() if essential else self.optional_budget()
+        return min(calls, budget // QUOTA_COSTS[call_site])
+
+    def spend(self, call_site: str, calls: int = 1, essential: bool = False) -> bool:
+        """예산 안이면 요청 전에 사용량을 기록하고 True, 아니면 기록 없이 False를 돌려준다."""
+        with self.lock:
+            if self.affordable(call_site, calls, essential) < calls:
+                LOGGER.warning(
+                    "YouTube 할당량 부족으로 %s %s회를 미룹니다(남은 단위 %s, 업로드 예약 %s).",
+                    call_site,
+                    calls,
+                    self.remaining(),
+                    0 if essential else self.upload_reserve,
+                )
+                return False
+            self.store.add_quota_usage(self.day, call_site, call_cost(call_site, calls), calls)
+            return True
+
+    def require(self, call_site: str) -> None:
+        """필수 호출의 한도를 확인만 한다. 모자라면 비싼 작업 전에 실행을 멈춘다."""
+        if self.remaining() < call_cost(call_site):
+            raise QuotaExceeded(
+                f"오늘 YouTube 할당량이 {self.remaining()}단위 남아 "
+                f"{call_site}({call_cost(call_site)}단위)를 할 수 없습니다."
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "day": self.day,
+            "limit": self.daily_limit,
+            "used": self.used(),
+            "by_call_site": self.store.quota_usage(self.day),
+        }
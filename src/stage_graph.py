@@ -0,0 +1,164 @@
+"""입력·출력 이름을 선언한 단계들을 의존 관계 순서로 실행하고, 서로 기다릴 필요가 없는 단계는 동시에 돌린다."""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class Stage:
+    """run은 inputs 이름을 키워드 인자로 받고, 출력이 하나면 값을, 여럿이면 같은 순서의 튜플을 돌려준다."""
+
+    name: str
+    run: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+@dataclass
+class GraphRun:
+    values: Dict[str, Any]
+    # 실행 시작 기준 (시작, 끝) 초
+    timings: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    critical_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "critical_path": self.critical_path,
+            "critical_seconds": round(self.critical_seconds, 2),
+            "wall_seconds": round(self.wall_seconds, 2),
+            "stages": {
+                name: {"start": round(start, 2), "seconds": round(end - start, 2)}
+                for name, (start, end) in self.timings.items()
+            },
+        }
+
+
+class StageGraph:
+    """출력 이름으로 단계 사이 의존 관계를 만든다. 만들 때 중복 출력과 순환을 검사한다."""
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("단계 이름이 중복되었습니다.")
+        self.producers: Dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"출력 {output}을 두 단계가 만듭니다.")
+                self.producers[output] = stage.name
+        self.dependencies = {
+            stage.name: {self.producers[name] for name in stage.inputs if name in self.producers}
+            for stage in stages
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        order: List[str] = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError("단계 의존 관계에 순환이 있습니다: " + ", ".join(sorted(remaining)))
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def run(self, values: Optional[Dict[str, Any]] = None, max_workers: int = DEFAULT_WORKERS) -> GraphRun:
+        """모든 단계를 실행한다. 한 단계가 실패하면 새 단계를 시작하지 않고, 실행 중인 단계를 기다린 뒤 그 예외를 다시 던진다."""
+        values = dict(values or {})
+        missing = {
+            name
+            for stage in self.stages.values()
+            for name in stage.inputs
+            if name not in self.producers and name not in values
+        }
+        if missing:
+            raise ValueError("어느 단계도 만들지 않는 입력: " + ", ".join(sorted(missing)))
+        started_at = time.perf_counter()
+        timings: Dict[str, Tuple[float, float]] = {}
+        done: set = set()
+        running: Dict[Future, str] = {}
+        failure: Optional[BaseException] = None
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+            while True:
+                if failure is None:
+                    for name in self.order:
+                        if name in done or name in running.values():
+                            continue
+                        if self.dependencies[name] <= done:
+                            stage = self.stages[name]
+                            arguments = {key: values[key] for key in stage.inputs}
+                            running[pool.submit(self._timed, stage, arguments, started_at)] = name
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result, start, end = future.result()
+                        values.update(self._outputs(self.stages[name], result))
+                    except BaseException as exc:  # noqa: BLE001 - 나머지 단계를 정리한 뒤 다시 던진다.
+                        if failure is None:
+                            failure = exc
+                            LOGGER.warning("%s 단계 실패로 남은 단계를 시작하지 않습니다.", name)
+                        continue
+                    timings[name] = (start, end)
+                    done.add(name)
+        if failure is not None:
+            raise failure
+        run = GraphRun(values=values, timings=timings, wall_seconds=time.perf_counter() - started_at)
+        run.critical_path, run.critical_seconds = self.critical_path(timings)
+        LOGGER.info(
+            "단계 임계 경로: %s (%.1f초, 전체 %.1f초)",
+            " → ".join(run.critical_path),
+            run.critical_seconds,
+            run.wall_seconds,
+        )
+        return run
+
+    @staticmethod
+    def _timed(stage: Stage, arguments: Dict[str, Any], origin: float) -> Tuple[Any, float, float]:
+        start = time.perf_counter() - origin
+        result = stage.run(**arguments)
+        return result, start, time.perf_counter() - origin
+
+    @staticmethod
+    def _outputs(stage: Stage, result: Any) -> Dict[str, Any]:
+        if not stage.outputs:
+            return {}
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        if not isinstance(result, tuple) or len(result) != len(stage.outputs):
+            raise ValueError(f"{stage.name} 단계는 출력 {len(stage.outputs)}개를 튜플로 돌려줘야 합니다.")
+        return dict(zip(stage.outputs, result))
+
+    def critical_path(self, timings: Dict[str, Tuple[float, float]]) -> Tuple[List[str], float]:
+        """단계 소요 시간 합이 가장 긴 의존 경로. 이 경로의 단계가 빨라져야 전체 시간이 줄어든다."""
+        longest: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self.order:
+            start, end = timings.get(name, (0.0, 0.0))
+            parent = max(self.dependencies[name], key=lambda dep: longest[dep], default=None)
+            previous[name] = parent
+            longest[name] = (end - start) + (longest[parent] if parent else 0.0)
+        if not longest:
+            return [], 0.0
+        tail: Optional[str] = max(self.order, key=lambda name: longest[name])
+        total = longest[tail]
+        path: List[str] = []
+        while tail is not None:
+            path.append(tail)
+            tail = previous[tail]
+        return path[::-1], total
+
@@ -0,0 +1,305 @@
+"""업로드 기록·성과 스냅샷·실행 이력을 SQLite에 보관하고 기존 JSON 형식으로도 내보낸다."""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+JSON_EXPORT_LIMIT = 365
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    published_at TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    preview_run_id TEXT NOT NULL DEFAULT '',
+    views INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0,
+    record TEXT NOT NULL,
+    metrics_refreshed_at TEXT NOT NULL DEFAULT '',
+    next_refresh_at TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_videos_topic ON videos(topic);
+CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos(published_at);
+CREATE INDEX IF NOT EXISTS idx_videos_preview_run ON videos(preview_run_id);
+CREATE INDEX IF NOT EXISTS idx_videos_next_refresh ON videos(next_refresh_at);
+CREATE TABLE IF NOT EXISTS metric_snapshots (
+    video_id TEXT NOT NULL REFERENCES videos(video_id),
+    captured_at TEXT NOT NULL,
+    views INTEGER NOT NULL,
+    likes INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    PRIMARY KEY (video_id, captured_at)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL DEFAULT 'running',
+    detail TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE TABLE IF NOT EXISTS quota_usage (
+    day TEXT NOT NULL,
+    call_site TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, call_site)
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _metric(record: Dict[str, Any], key: str) -> int:
+    return int((record.get("metrics") or {}).get(key, 0) or 0)
+
+
+class StateStore:
+    """영상 기록 전체를 보존한다. JSON 내보내기만 예전처럼 최근 365개로 자른다."""
+
+    def __init__(self, path: Path, legacy_json: Optional[Path] = None):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self._add_missing_columns()
+            self.connection.executescript(SCHEMA)
+        if legacy_json is not None and legacy_json.exists():
+            self.migrate_json(legacy_json)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def _add_missing_columns(self) -> None:
+        """이전 스키마로 만든 파일에 새로 생긴 열을 더한다."""
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(videos)")}
+        if not columns:
+            return
+        for name in ("metrics_refreshed_at", "next_refresh_at", "category"):
+            if name not in columns:
+                self.connection.execute(f"ALTER TABLE videos ADD COLUMN {name} TEXT NOT NULL DEFAULT ''")
+
+    def count(self) -> int:
+        with self.lock:
+            return int(self.connection.execute("SELECT COUNT(*) FROM videos").fetchone()[0])
+
+    def migrate_json(self, legacy_json: Path) -> int:
+        """published_topics.json에만 있는 기록을 한 트랜잭션으로 옮긴다. 읽지 못하면 실행을 멈춘다.
+
+        데이터베이스는 저장소에 커밋하지 않고 실행 캐시로만 이어 가므로, 캐시가 없거나 오래되었으면
+        커밋된 내보내기로 빠진 영상을 되살린다. 이미 있는 영상은 데이터베이스 값을 그대로 둔다.
+        """
+        try:
+            data = json.loads(legacy_json.read_text(encoding="utf-8"))
+            videos = data.get("videos")
+            if not isinstance(videos, list):
+                raise ValueError("videos가 목록이 아님")
+        except Exception as exc:
+            raise RuntimeError(f"운영 상태 파일을 읽지 못했습니다: {exc}") from exc
+        known = set(self.video_ids())
+        missing = [record for record in videos if str(record.get("video_id") or "") not in known]
+        if not missing:
+            return 0
+        with self.lock, self.connection:
+            for record in missing:
+                self._upsert(record)
+        LOGGER.info("운영 기록 %s개를 SQLite로 옮겼습니다.", len(missing))
+        return len(missing)
+
+    def _upsert(self, record: Dict[str, Any]) -> None:
+        self.connection.execute(
+            """
+            INSERT INTO videos
+                (video_id, published_at, topic, title, preview_run_id, views, likes, comments, record,
+                 category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                published_at = excluded.published_at,
+                topic = excluded.topic,
+                title = excluded.title,
+                preview_run_id = excluded.preview_run_id,
+                views = excluded.views,
+                likes = excluded.likes,
+                comments = excluded.comments,
+                record = excluded.record,
+                category = excluded.category
+            """,
+            (
+                str(record.get("video_id") or ""),
+                str(record.get("published_at") or _now()),
+                str(record.get("topic") or ""),
+                str(record.get("title") or ""),
+                str(record.get("preview_run_id") or ""),
+                _metric(record, "views"),
+                _metric(record, "likes"),
+                _metric(record, "comments"),
+                json.dumps(record, ensure_ascii=False),
+                str(record.get("category") or ""),
+            ),
+        )
+
+    def add_video(self, record: Dict[str, Any]) -> None:
+        if not record.get("video_id"):
+            raise ValueError("video_id가 없는 기록은 저장할 수 없습니다.")
+        with self.lock, self.connection:
+            self._upsert(record)
+
+    def _records(self, rows: Iterable[sqlite3.Row]) -> List[Dict[str, Any]]:
+        records = []
+        for row in rows:
+            record = json.loads(row["record"])
+            record["metrics"] = {
+                "views": row["views"],
+                "likes": row["likes"],
+                "comments": row["comments"],
+            }
+            records.append(record)
+        return records
+
+    def videos(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """오래된 순서의 영상 기록이다. limit을 주면 가장 최근 것만 남긴다."""
+        with self.lock:
+            if limit is None:
+                rows = self.connection.execute("SELECT * FROM videos ORDER BY published_at").fetchall()
+            else:
+                rows = self.connection.execute(
+                    "SELECT * FROM (SELECT * FROM videos ORDER BY published_at DESC LIMIT ?) "
+                    "ORDER BY published_at",
+                    (limit,),
+                ).fetchall()
+        return self._records(rows)
+
+    def video_ids(self) -> List[str]:
+        with self.lock:
+            rows = self.connection.execute("SELECT video_id FROM videos ORDER BY published_at").fetchall()
+        return [row[0] for row in rows]
+
+    def due_videos(self, now: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """다음 갱신 시각이 지난 (video_id, published_at)을 오래 기다린 순서로 돌려준다."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT video_id, published_at FROM videos WHERE next_refresh_at <= ? "
+                "ORDER BY next_refresh_at, published_at DESC LIMIT ?",
+                (now, -1 if limit is None else limit),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def schedule_refresh(self, schedule: Dict[str, str], refreshed_at: str) -> None:
+        """통계를 확인한 영상마다 확인 시각과 다음 갱신 시각을 기록한다."""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE videos SET metrics_refreshed_at = ?, next_refresh_at = ? WHERE video_id = ?",
+                [(refreshed_at, next_at, video_id) for video_id, next_at in schedule.items()],
+            )
+
+    def find_preview(self, preview_run_id: str) -> Optional[Dict[str, Any]]:
+        if not preview_run_id:
+            return None
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM videos WHERE preview_run_id = ? LIMIT 1", (preview_run_id,)
+            ).fetchone()
+        return self._records([row])[0] if row else None
+
+    def recent_topics(self, limit: int = 12) -> List[str]:
+        """최근 업로드 주제를 오래된 순서로 돌려준다."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT topic FROM videos WHERE topic != '' ORDER BY published_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def performance_rows(self) -> Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]]]:
+        """성과 분석에 쓸 영상 행과, 영상·시각 순으로 정렬한 전체 스냅샷 행이다."""
+        with self.lock:
+            videos = self.connection.execute(
+                "SELECT video_id, published_at, topic, category, views, likes, comments "
+                "FROM videos ORDER BY published_at"
+            ).fetchall()
+            snapshots = self.connection.execute(
+                "SELECT video_id, captured_at, views, likes, comments "
+                "FROM metric_snapshots ORDER BY video_id, captured_at"
+            ).fetchall()
+        return [tuple(row) for row in videos], [tuple(row) for row in snapshots]
+
+    def update_metrics(
+        self,
+        metrics: Dict[str, Dict[str, int]],
+        captured_at: Optional[str] = None,
+    ) -> bool:
+        """수집한 통계를 스냅샷으로 쌓고, 값이 바뀐 영상만 현재 성과를 갱신한다."""
+        captured_at = captured_at or _now()
+        changed = False
+        with self.lock, self.connection:
+            for video_id, values in metrics.items():
+                views = int(values.get("views", 0) or 0)
+                likes = int(values.get("likes", 0) or 0)
+                comments = int(values.get("comments", 0) or 0)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO metric_snapshots VALUES (?, ?, ?, ?, ?)",
+                    (video_id, captured_at, views, likes, comments),
+                )
+                cursor = self.connection.execute(
+                    "UPDATE videos SET views = ?, likes = ?, comments = ? "
+                    "WHERE video_id = ? AND (views, likes, comments) != (?, ?, ?)",
+                    (views, likes, comments, video_id, views, likes, comments),
+                )
+                changed = changed or cursor.rowcount > 0
+        return changed
+
+    def add_quota_usage(self, day: str, call_site: str, units: int, calls: int = 1) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO quota_usage (day, call_site, units, calls) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(day, call_site) DO UPDATE SET "
+                "units = units + excluded.units, calls = calls + excluded.calls",
+                (day, call_site, units, calls),
+            )
+
+    def quota_usage(self, day: str) -> Dict[str, int]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT call_site, units FROM quota_usage WHERE day = ?", (day,)
+            ).fetchall()
+        return {row[0]: int(row[1]) for row in rows}
+
+    def start_run(self, run_id: str, kind: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO runs (run_id, kind, started_at) VALUES (?, ?, ?)",
+                (run_id, kind, _now()),
+            )
+
+    def finish_run(self, run_id: str, status: str, detail: str = "") -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, detail = ? WHERE run_id = ?",
+                (_now(), status, detail[:2000], run_id),
+            )
+
+    def export_json(self, path: Path, limit: int = JSON_EXPORT_LIMIT) -> None:
+        """기존 도구와 사람이 읽는 용도로 최근 기록을 예전 published_topics.json 형식으로 쓴다."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"version": 1, "videos": self.videos(limit)}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
@@ -1,136 +1,170 @@
 """검증 가능한 자료와 영상 검색어를 미리 연결한 편집 주제 목록."""
 
-import re
-from difflib import SequenceMatcher
-from typing import Iterable, List
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
 
 from models import TopicPlan
+from topic_similarity import TopicIndex, is_similar, normalize_topic
+
+CATALOG_PATH = Path(__file__).resolve().parents[1] / "data" / "topic_catalog.jsonl"
+ELIGIBLE_SIMILARITY = 0.72
+
+
+class TopicCatalog(Sequence[TopicPlan]):
+    """JSONL 한 줄이 주제 하나다. 주제·영상 검색어 문자열과 분야·문서 번호 열만 메모리에 두고,
+    TopicPlan은 처음 꺼낼 때 해당 줄만 다시 읽어 만든다."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        offsets: List[int] = []
+        category_codes: List[int] = []
+        wiki_codes: List[int] = []
+        self.topics: List[str] = []
+        self.categories: List[str] = []
+        self.wiki_queries: List[str] = []
+        # 주제 색인용으로 영상 검색어를 공백으로 이어 붙인 열
+        self.stock_texts: List[str] = []
+        category_lookup: Dict[str, int] = {}
+        wiki_lookup: Dict[str, int] = {}
+        self.by_topic: Dict[str, int] = {}
+        start = 0
+        with path.open("rb") as handle:
+            for number, line in enumerate(handle, start=1):
+                if line.strip():
+                    try:
+                        entry = json.loads(line)
+                        topic, wiki_query = str(entry["topic"]), str(entry["wiki_query"])
+                        category = str(entry.get("category") or "science")
+                        if not topic or not wiki_query or not entry.get("stock_queries"):
+                            raise ValueError("topic·wiki_query·stock_queries가 비어 있음")
+                    except Exception as exc:
+                        raise ValueError(
+                            f"주제 목록 {path.name} {number}번째 줄을 읽지 못했습니다: {exc}"
+                        ) from exc
+                    self.by_topic.setdefault(normalize_topic(topic), len(self.topics))
+                    self.topics.append(topic)
+                    self.stock_texts.append(" ".join(str(item) for item in entry["stock_queries"]))
+                    offsets.append(start)
+                    category_codes.append(category_lookup.setdefault(category, len(category_lookup)))
+                    wiki_codes.append(wiki_lookup.setdefault(wiki_query, len(wiki_lookup)))
+                start += len(line)
+        self.categories = list(category_lookup)
+        self.wiki_queries = list(wiki_lookup)
+        self._category_lookup = category_lookup
+        self._wiki_lookup = wiki_lookup
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._category_codes = np.array(category_codes, dtype=np.int32)
+        self._wiki_codes = np.array(wiki_codes, dtype=np.int32)
+        self._plans: Dict[int, TopicPlan] = {}
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    @overload
+    def __getitem__(self, index: int) -> TopicPlan: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[TopicPlan]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[TopicPlan, List[TopicPlan]]:
+        if isinstance(index, slice):
+            return self.plans(range(len(self))[index])
+        return self.plan(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[TopicPlan]:
+        return iter(self.plans(range(len(self))))
+
+    def plan(self, position: int) -> TopicPlan:
+        return self.plans([position])[0]
+
+    def plans(self, positions: Iterable[int]) -> List[TopicPlan]:
+        """위치 순서대로 TopicPlan을 돌려준다. 처음 꺼내는 항목만 파일을 한 번 열어 읽는다."""
+        positions = [int(position) for position in positions]
+        missing = [position for position in positions if position not in self._plans]
+        if missing:
+            with self.path.open("rb") as handle:
+                for position in missing:
+                    handle.seek(int(self._offsets[position]))
+                    entry = json.loads(handle.readline())
+                    self._plans[position] = TopicPlan(
+                        topic=self.topics[position],
+                        wiki_query=self.wiki_queries[self._wiki_codes[position]],
+                        stock_queries=[str(item) for item in entry["stock_queries"]],
+                        category=self.categories[self._category_codes[position]],
+                    )
+        return [self._plans[position] for position in positions]
+
+    def fields(self, positions: Optional[Iterable[int]] = None) -> List[Tuple[str, str, str, str]]:
+        """TopicPlan을 만들지 않고 열 배열에서 (주제, 검증 문서, 분야, 영상 검색어)를 꺼낸다. 위치를 주지 않으면 전체다."""
+        positions = range(len(self)) if positions is None else [int(position) for position in positions]
+        return [
+            (
+                self.topics[position],
+                self.wiki_queries[self._wiki_codes[position]],
+                self.categories[self._category_codes[position]],
+                self.stock_texts[position],
+            )
+            for position in positions
+        ]
+
+    def category_of(self, topic: str) -> Optional[str]:
+        position = self.by_topic.get(normalize_topic(topic))
+        return None if position is None else self.categories[self._category_codes[position]]
+
+    def positions_in_category(self, category: str) -> np.ndarray:
+        code = self._category_lookup.get(category)
+        return np.flatnonzero(self._category_codes == code) if code is not None else np.empty(0, int)
+
+    def positions_for_wiki_query(self, wiki_query: str) -> np.ndarray:
+        code = self._wiki_lookup.get(wiki_query)
+        return np.flatnonzero(self._wiki_codes == code) if code is not None else np.empty(0, int)
+
+    def cooldown_mask(self, recent_topics: Sequence[str], index: TopicIndex) -> np.ndarray:
+        """최근 주제와 비슷한 항목이 True인 배열이다."""
+        blocked = np.zeros(len(self), dtype=bool)
+        blocked[list(index.near_duplicates(recent_topics, ELIGIBLE_SIMILARITY))] = True
+        return blocked
+
+    def conflicts(self, positions: Sequence[int], topics: Sequence[str], index: TopicIndex) -> np.ndarray:
+        """(항목 수, 주제 수) 배열. 항목이 주제와 비슷하면 True다."""
+        positions = np.asarray(positions, dtype=int)
+        result = np.zeros((len(positions), len(topics)), dtype=bool)
+        if not len(positions) or not len(topics):
+            return result
+        rows = np.full(len(self), -1)
+        rows[positions] = np.arange(len(positions))
+        normalized = [normalize_topic(topic) for topic in topics]
+        for position, query in index.candidate_pairs(topics):
+            row = rows[position]
+            if row >= 0 and not result[row, query] and is_similar(
+                index.topics[position], normalized[query], ELIGIBLE_SIMILARITY
+            ):
+                result[row, query] = True
+        return result
+
+
+VERIFIED_TOPICS = TopicCatalog(CATALOG_PATH)
+
+
+@lru_cache(maxsize=4)
+def catalog_index(path: Optional[Path] = None) -> TopicIndex:
+    return TopicIndex.load_or_build(VERIFIED_TOPICS.topics, path)
+
+
+def eligible_positions(recent_topics: Iterable[str], index_path: Optional[Path] = None) -> np.ndarray:
+    """최근 업로드와 겹치지 않는 검증 주제의 목록 위치다. 모두 막히면 전체 위치를 돌려준다."""
+    recent = [topic for topic in recent_topics if topic]
+    blocked = VERIFIED_TOPICS.cooldown_mask(recent, catalog_index(index_path))
+    eligible = np.flatnonzero(~blocked)
+    return eligible if len(eligible) else np.arange(len(VERIFIED_TOPICS))
 
 
-VERIFIED_TOPICS = (
-    TopicPlan(
-        topic="QR 코드는 왜 일부가 가려져도 읽힐까",
-        wiki_query="QR 코드",
-        stock_queries=["QR code scan smartphone", "damaged QR code", "barcode scanner close up"],
-        category="technology",
-    ),
-    TopicPlan(
-        topic="오로라는 왜 극지방의 밤하늘에서 잘 보일까",
-        wiki_query="오로라",
-        stock_queries=["aurora borealis vertical", "northern lights sky", "polar night landscape"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="문어는 어떻게 피부색과 무늬를 바꿀까",
-        wiki_query="문어",
-        stock_queries=["octopus camouflage underwater", "octopus skin close up", "octopus coral reef"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="구름은 무거운데 어떻게 하늘에 떠 있을까",
-        wiki_query="구름",
-        stock_queries=["cumulus clouds aerial", "cloud timelapse sky", "mist water droplets"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="번개는 구름 속 전하를 어떻게 방전할까",
-        wiki_query="번개",
-        stock_queries=["lightning storm vertical", "storm clouds lightning", "lightning slow motion"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="무지개는 왜 둥근 원의 일부처럼 보일까",
-        wiki_query="무지개",
-        stock_queries=["rainbow sky vertical", "rainbow after rain", "water prism rainbow"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="달은 왜 지구에서 늘 비슷한 면으로 보일까",
-        wiki_query="달",
-        stock_queries=["moon surface telescope", "full moon night vertical", "earth moon animation"],
-        category="space",
-    ),
-    TopicPlan(
-        topic="태풍의 눈은 왜 주변보다 비교적 고요할까",
-        wiki_query="태풍",
-        stock_queries=["typhoon satellite storm", "hurricane eye clouds", "tropical storm ocean"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="나침반 바늘은 왜 북쪽을 가리킬까",
-        wiki_query="나침반",
-        stock_queries=["compass needle close up", "compass navigation forest", "magnetic compass macro"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="소리는 왜 우주 공간에서 전달되지 않을까",
-        wiki_query="소리",
-        stock_queries=["sound wave speaker close up", "astronaut space vertical", "audio waveform studio"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="표면장력은 어떻게 물방울을 둥글게 만들까",
-        wiki_query="표면장력",
-        stock_queries=["water droplet macro", "water surface tension", "raindrop slow motion"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="철새는 먼 이동 경로를 어떻게 찾을까",
-        wiki_query="철새",
-        stock_queries=["migratory birds flying", "bird flock sunset vertical", "birds navigation sky"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="나이테는 나무가 자란 환경을 어떻게 기록할까",
-        wiki_query="나이테",
-        stock_queries=["tree rings close up", "wood grain macro", "forest seasons timelapse"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="카멜레온은 왜 몸 색깔을 바꿀까",
-        wiki_query="카멜레온",
-        stock_queries=["chameleon color change", "chameleon skin close up", "chameleon branch vertical"],
-        category="nature",
-    ),
-    TopicPlan(
-        topic="파도는 물이 아닌 에너지를 어떻게 옮길까",
-        wiki_query="파도",
-        stock_queries=["ocean wave slow motion", "sea waves vertical", "water ripple close up"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="지진파는 지구 내부를 어떻게 통과할까",
-        wiki_query="지진파",
-        stock_queries=["seismic wave animation", "seismograph close up", "earth layers animation"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="화산재는 왜 비행기에 위험할까",
-        wiki_query="화산재",
-        stock_queries=["volcanic ash eruption", "airplane clouds vertical", "volcano plume close up"],
-        category="science",
-    ),
-    TopicPlan(
-        topic="자석은 왜 같은 극끼리 밀어낼까",
-        wiki_query="자석",
-        stock_queries=["magnet poles experiment", "magnetic field close up", "magnets science experiment"],
-        category="science",
-    ),
-)
-
-
-def _normalized(text: str) -> str:
-    return re.sub(r"[^0-9A-Za-z가-힣]", "", text).lower()
-
-
-def eligible_topic_plans(recent_topics: Iterable[str]) -> List[TopicPlan]:
+def eligible_topic_plans(
+    recent_topics: Iterable[str], index_path: Optional[Path] = None
+) -> List[TopicPlan]:
     """최근 업로드와 겹치지 않는 검증 주제만 반환한다."""
-    recent = [_normalized(item) for item in recent_topics if item]
-    eligible = []
-    for plan in VERIFIED_TOPICS:
-        current = _normalized(plan.topic)
-        if any(SequenceMatcher(None, current, old).ratio() >= 0.72 for old in recent):
-            continue
-        eligible.append(plan)
-    return eligible or list(VERIFIED_TOPICS)
-
+    return VERIFIED_TOPICS.plans(eligible_positions(recent_topics, index_path))
@@ -0,0 +1,168 @@
+"""인기 신호 제목·태그를 검증 주제 목록의 글자 n-gram TF-IDF 색인과 비교해 LLM 없이 후보 순서를 매긴다."""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import TopicPlan
+from topic_catalog import VERIFIED_TOPICS, TopicCatalog
+
+NGRAM_SIZES = (2, 3)
+# 유사도 행렬을 계산할 때 한 번에 펼칠 문서 쪽 0이 아닌 값의 수
+CHUNK_NONZEROS = 200_000
+PERFORMANCE_WEIGHT = 0.15
+TOP_PERFORMER_WEIGHT = 0.2
+
+
+def _grams(text: str) -> List[str]:
+    """낱말 경계를 표시한 글자 2·3-gram과 낱말 자체. 한국어 조사·어미 변형에도 겹치는 부분이 남는다."""
+    grams = []
+    for word in re.findall(r"[0-9a-z가-힣]+", text.lower()):
+        grams.append(word)
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            grams.extend(padded[start:start + size] for start in range(len(padded) - size + 1))
+    return grams
+
+
+def field_document(topic: str, wiki_query: str, category: str, stock_queries: str) -> str:
+    """목록의 열 배열만으로 만드는 문서다. 영상 검색어도 넣어 인기 신호 태그와 영상 어휘를 맞춘다."""
+    return " ".join([topic, wiki_query, stock_queries, category])
+
+
+def plan_document(plan: TopicPlan) -> str:
+    return field_document(plan.topic, plan.wiki_query, plan.category, " ".join(plan.stock_queries))
+
+
+def signal_document(signal: Dict[str, Any]) -> str:
+    return " ".join([str(signal.get("title", "")), *[str(tag) for tag in signal.get("tags", [])]])
+
+
+class TopicMatcher:
+    """IDF와 어휘는 목록 한 번으로 만들고, 질의·후보 문서는 같은 가중치로 희소 벡터화한다."""
+
+    def __init__(self, texts: Sequence[str]):
+        documents = [Counter(_grams(text)) for text in texts]
+        self.vocabulary: Dict[str, int] = {}
+        for counts in documents:
+            for gram in counts:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        frequency = np.zeros(len(self.vocabulary))
+        for counts in documents:
+            frequency[[self.vocabulary[gram] for gram in counts]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + frequency)) + 1
+
+    def vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """L2 정규화한 TF-IDF 행을 CSR(indptr, indices, data)로 돌려준다. 목록에 없는 n-gram은 버린다."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            counts = Counter(gram for gram in _grams(text) if gram in self.vocabulary)
+            columns = [self.vocabulary[gram] for gram in counts]
+            if columns:
+                weights = np.log(np.array(list(counts.values()), dtype=float)) + 1
+                weights *= self.idf[columns]
+                indices.extend(columns)
+                data.extend((weights / np.linalg.norm(weights)).tolist())
+            indptr.append(len(indices))
+        return np.array(indptr), np.array(indices, dtype=int), np.array(data, dtype=float)
+
+    def similarity(self, queries: Sequence[str], documents: Sequence[str]) -> np.ndarray:
+        """(질의 수, 문서 수) 코사인 유사도. 질의는 밀집, 문서는 희소로 두고 구간 합으로 곱한다."""
+        scores = np.zeros((len(queries), len(documents)))
+        if not len(queries) or not len(documents):
+            return scores
+        q_indptr, q_indices, q_data = self.vectorize(queries)
+        dense = np.zeros((len(queries), len(self.vocabulary)))
+        rows = np.repeat(np.arange(len(queries)), np.diff(q_indptr))
+        dense[rows, q_indices] = q_data
+        indptr, indices, data = self.vectorize(documents)
+        start = 0
+        while start < len(documents):
+            stop = start + 1
+            while stop < len(documents) and indptr[stop + 1] - indptr[start] <= CHUNK_NONZEROS:
+                stop += 1
+            begin, end = indptr[start], indptr[stop]
+            if end > begin:
+                # 끝에 0 열을 덧대 마지막 빈 행의 시작 위치도 유효한 색인이 되게 한다.
+                products = np.pad(dense[:, indices[begin:end]] * data[begin:end], ((0, 0), (0, 1)))
+                chunk = np.add.reduceat(products, indptr[start:stop] - begin, axis=1)
+                chunk[:, np.diff(indptr[start:stop + 1]) == 0] = 0.0
+                scores[:, start:stop] = chunk
+            start = stop
+        return scores
+
+
+@lru_cache(maxsize=2)
+def catalog_matcher(catalog: TopicCatalog = VERIFIED_TOPICS) -> TopicMatcher:
+    """목록의 주제·검증 문서·분야·영상 검색어 열로 색인을 만든다. TopicPlan은 하나도 읽지 않는다."""
+    return TopicMatcher([field_document(*fields) for fields in catalog.fields()])
+
+
+def score_documents(
+    documents: Sequence[str],
+    categories: Sequence[str],
+    trend_signals: Iterable[Dict[str, Any]],
+    top_performers: Iterable[str] = (),
+    category_performance: Optional[Dict[str, float]] = None,
+    matcher: Optional[TopicMatcher] = None,
+) -> np.ndarray:
+    """조회수로 가중한 인기 신호 일치도에 분야 성과와 성과 좋은 주제와의 유사도를 더한 점수다."""
+    matcher = matcher or catalog_matcher()
+    signals = list(trend_signals)
+    scores = np.zeros(len(documents))
+    if signals:
+        views = np.log1p(np.array([float(item.get("views", 0) or 0) for item in signals]))
+        weights = views / views.max() if views.max() > 0 else np.ones(len(signals))
+        similarity = matcher.similarity([signal_document(item) for item in signals], documents)
+        scores += (similarity * weights[:, None]).max(axis=0)
+    performers = [topic for topic in top_performers if topic]
+    if performers:
+        scores += TOP_PERFORMER_WEIGHT * matcher.similarity(performers, documents).max(axis=0)
+    if category_performance:
+        scores += PERFORMANCE_WEIGHT * np.tanh(
+            np.array([category_performance.get(category, 0.0) for category in categories])
+        )
+    return scores
+
+
+def rank_positions(
+    positions: Sequence[int],
+    trend_signals: Iterable[Dict[str, Any]],
+    top_performers: Iterable[str] = (),
+    category_performance: Optional[Dict[str, float]] = None,
+    catalog: TopicCatalog = VERIFIED_TOPICS,
+) -> np.ndarray:
+    """목록 위치를 점수 내림차순으로 돌려준다. TopicPlan 없이 열 배열과 캐시된 목록 색인으로 점수를 매긴다."""
+    positions = np.asarray(positions, dtype=int)
+    fields = catalog.fields(positions)
+    scores = score_documents(
+        [field_document(*item) for item in fields],
+        [item[2] for item in fields],
+        trend_signals,
+        top_performers,
+        category_performance,
+        matcher=catalog_matcher(catalog),
+    )
+    return positions[np.argsort(-scores, kind="stable")]
+
+
+def score_candidates(
+    candidates: Sequence[TopicPlan], *args: Any, **kwargs: Any
+) -> np.ndarray:
+    return score_documents(
+        [plan_document(plan) for plan in candidates],
+        [plan.category for plan in candidates],
+        *args,
+        **kwargs,
+    )
+
+
+def rank_candidates(candidates: Sequence[TopicPlan], *args: Any, **kwargs: Any) -> List[int]:
+    """점수 내림차순 후보 위치. 같은 점수는 원래 순서를 유지한다."""
+    scores = score_candidates(candidates, *args, **kwargs)
+    return [int(index) for index in np.argsort(-scores, kind="stable")]
@@ -0,0 +1,168 @@
+"""글자 2-gram MinHash와 LSH 밴드로 최근 주제와 비슷한 목록 항목을 후보만 골라 정확히 비교한다."""
+
+import hashlib
+import logging
+import re
+import zlib
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+SHINGLE_SIZE = 2
+# 40밴드 × 2행. SequenceMatcher 0.72 이상인 쌍의 2-gram 자카드는 0.33 이상이었고,
+# 그 값에서 한 밴드 이상 겹칠 확률은 1-(1-0.33²)^40 ≈ 0.99다.
+NUM_PERM = 80
+BAND_ROWS = 2
+HASH_PRIME = 4294967291  # 2^32보다 작은 가장 큰 소수
+CHUNK_SHINGLES = 50_000
+INDEX_FORMAT = 1
+
+
+def normalize_topic(text: str) -> str:
+    return re.sub(r"[^0-9A-Za-z가-힣]", "", text).lower()
+
+
+def is_similar(first: str, second: str, threshold: float) -> bool:
+    """정규화한 두 주제의 SequenceMatcher 비율이 기준 이상인지. 값싼 상한부터 확인한다."""
+    matcher = SequenceMatcher(None, first, second)
+    return (
+        matcher.real_quick_ratio() >= threshold
+        and matcher.quick_ratio() >= threshold
+        and matcher.ratio() >= threshold
+    )
+
+
+def most_similar(topic: str, others: Iterable[str], threshold: float) -> Optional[str]:
+    """기준 이상으로 비슷한 첫 항목(원문)을 돌려준다."""
+    current = normalize_topic(topic)
+    for other in others:
+        if is_similar(current, normalize_topic(other), threshold):
+            return other
+    return None
+
+
+def _shingle_hashes(normalized: str) -> List[int]:
+    if len(normalized) < SHINGLE_SIZE:
+        return [zlib.crc32(normalized.encode("utf-8"))]
+    return sorted(
+        {
+            zlib.crc32(normalized[start:start + SHINGLE_SIZE].encode("utf-8"))
+            for start in range(len(normalized) - SHINGLE_SIZE + 1)
+        }
+    )
+
+
+def _permutations() -> np.ndarray:
+    generator = np.random.default_rng(20240611)
+    return generator.integers(1, HASH_PRIME, size=(2, NUM_PERM), dtype=np.uint64)
+
+
+PERMUTATIONS = _permutations()
+
+
+def minhash_signatures(normalized_topics: Sequence[str]) -> np.ndarray:
+    """(주제 수, NUM_PERM) uint32 서명. 모든 2-gram 해시를 이어 붙여 묶음 단위로 최소값을 구한다."""
+    signatures = np.empty((len(normalized_topics), NUM_PERM), dtype=np.uint32)
+    multiply, offset = PERMUTATIONS
+    start = 0
+    while start < len(normalized_topics):
+        hashes: List[int] = []
+        bounds = []
+        stop = start
+        while stop < len(normalized_topics) and (stop == start or len(hashes) < CHUNK_SHINGLES):
+            bounds.append(len(hashes))
+            hashes.extend(_shingle_hashes(normalized_topics[stop]))
+            stop += 1
+        values = np.array(hashes, dtype=np.uint64)[:, None]
+        permuted = (values * multiply + offset) % np.uint64(HASH_PRIME)
+        signatures[start:stop] = np.minimum.reduceat(permuted, bounds, axis=0)
+        start = stop
+    return signatures
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """(주제 수, 밴드 수) uint64 키. 밴드 안 2행을 상·하위 32비트로 그대로 묶어 충돌이 없다."""
+    rows = signatures.astype(np.uint64).reshape(len(signatures), -1, BAND_ROWS)
+    return (rows[:, :, 0] << np.uint64(32)) | rows[:, :, 1]
+
+
+def catalog_version(normalized_topics: Sequence[str]) -> str:
+    payload = "\n".join([f"{INDEX_FORMAT}:{NUM_PERM}:{BAND_ROWS}:{SHINGLE_SIZE}", *normalized_topics])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TopicIndex:
+    """밴드마다 키를 정렬해 두고 searchsorted로 같은 버킷의 항목만 찾는다."""
+
+    def __init__(self, normalized_topics: Sequence[str], signatures: np.ndarray):
+        self.topics = list(normalized_topics)
+        self.version = catalog_version(self.topics)
+        self.signatures = signatures
+        keys = band_keys(signatures.reshape(-1, NUM_PERM)).T
+        self.order = np.argsort(keys, axis=1, kind="stable")
+        self.sorted_keys = np.take_along_axis(keys, self.order, axis=1)
+
+    @classmethod
+    def build(cls, topics: Sequence[str]) -> "TopicIndex":
+        normalized = [normalize_topic(topic) for topic in topics]
+        return cls(normalized, minhash_signatures(normalized))
+
+    @classmethod
+    def load_or_build(cls, topics: Sequence[str], path: Optional[Path] = None) -> "TopicIndex":
+        """목록 내용이 같으면 저장된 서명을 쓰고, 바뀌었으면 다시 만들어 저장한다."""
+        normalized = [normalize_topic(topic) for topic in topics]
+        version = catalog_version(normalized)
+        if path is not None and path.exists():
+            try:
+                with np.load(path) as stored:
+                    if str(stored["version"]) == version:
+                        return cls(normalized, stored["signatures"])
+            except Exception as exc:
+                LOGGER.warning("주제 유사도 색인을 읽지 못해 다시 만듭니다: %s", exc)
+        index = cls(normalized, minhash_signatures(normalized))
+        if path is not None:
+            index.save(path)
+        return index
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as handle:
+            np.savez(handle, version=np.array(self.version), signatures=self.signatures)
+
+    def candidate_pairs(self, queries: Sequence[str]) -> np.ndarray:
+        """(목록 위치, 질의 위치) 쌍 배열. 한 밴드라도 같은 버킷에 든 쌍만 중복 없이 돌려준다."""
+        normalized = [normalize_topic(query) for query in queries]
+        if not normalized or not self.topics:
+            return np.empty((0, 2), dtype=int)
+        query_keys = band_keys(minhash_signatures(normalized)).T
+        positions = []
+        owners = []
+        for band, keys in enumerate(query_keys):
+            left = np.searchsorted(self.sorted_keys[band], keys, side="left")
+            right = np.searchsorted(self.sorted_keys[band], keys, side="right")
+            for query, (begin, end) in enumerate(zip(left, right)):
+                if end > begin:
+                    positions.append(self.order[band, begin:end])
+                    owners.append(np.full(end - begin, query))
+        if not positions:
+            return np.empty((0, 2), dtype=int)
+        keys = np.unique(np.concatenate(positions) * len(normalized) + np.concatenate(owners))
+        return np.column_stack([keys // len(normalized), keys % len(normalized)])
+
+    def candidates(self, queries: Sequence[str]) -> np.ndarray:
+        """질의 중 하나와 한 밴드라도 같은 버킷에 든 목록 위치."""
+        return np.unique(self.candidate_pairs(queries)[:, 0])
+
+    def near_duplicates(self, queries: Sequence[str], threshold: float) -> Set[int]:
+        """질의 중 하나와 SequenceMatcher 비율이 기준 이상인 목록 위치. 버킷이 겹친 쌍만 비교한다."""
+        normalized = [normalize_topic(query) for query in queries if query]
+        matches: Set[int] = set()
+        for position, query in self.candidate_pairs(normalized):
+            if int(position) not in matches and is_similar(
+                self.topics[int(position)], normalized[int(query)], threshold
+            ):
+                matches.add(int(position))
+        return matches
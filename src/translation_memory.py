@@ -0,0 +1,77 @@
+"""여러 실행에서 반복되는 한글 자막의 영문 번역을 재사용한다."""
+
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+MAX_ENTRIES = 5000
+
+
+def normalize_chunk(text: str) -> str:
+    """공백과 말줄임표 표기만 통일해 같은 자막을 같은 키로 찾는다."""
+    cleaned = re.sub(r"\s+", " ", str(text)).strip()
+    return cleaned.replace("...", "…")
+
+
+class TranslationMemory:
+    def __init__(self, path: Path, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # 재사용 횟수는 이번 실행 안에서만 센다. 파일에 쓰면 재사용만 한 실행도 파일을 고쳐 커밋하게 된다.
+        self.hits: Dict[str, int] = {}
+        self.changed = False
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                entries = data.get("entries")
+                if not isinstance(entries, dict):
+                    raise ValueError("entries가 객체가 아님")
+                self.entries = entries
+            except Exception as exc:
+                LOGGER.warning("번역 메모리를 읽지 못해 새로 시작합니다: %s", exc)
+
+    def get(self, text: str) -> Optional[str]:
+        key = normalize_chunk(text)
+        entry = self.entries.get(key)
+        if not entry or not entry.get("en"):
+            return None
+        self.hits[key] = self.hits.get(key, 0) + 1
+        return str(entry["en"])
+
+    def put(self, text: str, translation: str) -> None:
+        key = normalize_chunk(text)
+        if not key or not translation:
+            return
+        self.entries[key] = {
+            "en": translation,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        if len(self.entries) > self.max_entries:
+            # 이번 실행에서 재사용한 문장과 최근 번역을 남긴다.
+            ranked = sorted(
+                self.entries.items(),
+                key=lambda item: (self.hits.get(item[0], 0), item[1].get("updated_at", "")),
+                reverse=True,
+            )
+            self.entries = dict(ranked[: self.max_entries])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(
+                {"version": 1, "entries": dict(sorted(self.entries.items()))},
+                ensure_ascii=False,
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        self.changed = False
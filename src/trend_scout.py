@@ -1,65 +1,171 @@
 """YouTube의 한국 인기 신호를 저비용으로 수집한다."""
 
+import json
 import logging
-from typing import Any, Dict, List
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import requests
-
-from topic_catalog import VERIFIED_TOPICS
+from requests.adapters import HTTPAdapter
 
 LOGGER = logging.getLogger(__name__)
 YOUTUBE_VIDEOS_ENDPOINT = "https://www.googleapis.com/youtube/v3/videos"
+DEFAULT_CATEGORIES = ("0", "28")  # 전체, 과학/기술
+DEFAULT_REGIONS = ("KR",)
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _http_session() -> requests.Session:
+    """차트 요청끼리 연결을 재사용하도록 프로세스에서 세션 하나를 공유한다."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+            _SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        return _SESSION
+
+
+def _env_list(name: str, default: Sequence[str]) -> Tuple[str, ...]:
+    values = tuple(item.strip() for item in os.getenv(name, "").split(",") if item.strip())
+    return values or tuple(default)
+
+
+def trend_cache_ttl() -> float:
+    return float(os.getenv("TREND_CACHE_HOURS", "20")) * 3600
+
+
+def _load_cache(path: Optional[Path]) -> Dict[str, Any]:
+    if path is None or not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception as exc:
+        LOGGER.warning("인기 신호 캐시를 읽지 못해 새로 수집합니다: %s", exc)
+        return {}
 
-EVERGREEN_SEEDS = [plan.topic for plan in VERIFIED_TOPICS]
 
+def _save_cache(path: Path, entries: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+    temporary.replace(path)
 
-def fetch_youtube_trends(api_key: str, region: str = "KR") -> List[Dict[str, Any]]:
+
+def _fetch_chart(
+    api_key: str,
+    region: str,
+    category_id: str,
+    cached: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """캐시에 ETag가 있으면 조건부로 요청해 바뀌지 않은 차트(304)는 본문 없이 재사용한다."""
+    headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+    try:
+        response = _http_session().get(
+            YOUTUBE_VIDEOS_ENDPOINT,
+            params={
+                "key": api_key,
+                "part": "snippet,statistics",
+                "chart": "mostPopular",
+                "regionCode": region,
+                "videoCategoryId": category_id,
+                "maxResults": 12,
+            },
+            headers=headers,
+            timeout=25,
+        )
+        if response.status_code == 304 and cached:
+            return {**cached, "fetched_at": time.time()}
+        response.raise_for_status()
+        payload = response.json()
+    except Exception as exc:
+        LOGGER.warning(
+            "YouTube 인기 신호 수집 실패(region=%s, category=%s): %s", region, category_id, exc
+        )
+        return None
+    items = []
+    for item in payload.get("items", []):
+        snippet = item.get("snippet", {})
+        stats = item.get("statistics", {})
+        items.append(
+            {
+                "title": snippet.get("title", "")[:120],
+                "channel": snippet.get("channelTitle", "")[:60],
+                "tags": snippet.get("tags", [])[:6],
+                "views": int(stats.get("viewCount", 0) or 0),
+                "category_id": category_id,
+                "region": region,
+            }
+        )
+    return {
+        "etag": payload.get("etag") or response.headers.get("ETag", ""),
+        "fetched_at": time.time(),
+        "items": items,
+    }
+
+
+def fetch_youtube_trends(
+    api_key: str,
+    regions: Optional[Sequence[str]] = None,
+    categories: Optional[Sequence[str]] = None,
+    ledger: Optional[Any] = None,
+    cache_path: Optional[Path] = None,
+) -> List[Dict[str, Any]]:
+    """TTL 안의 캐시는 요청 없이 쓰고, 만료된 지역·분야 차트만 동시에 다시 확인한다."""
     if not api_key:
         return []
+    charts = [
+        (region, category_id)
+        for region in regions or _env_list("TREND_REGIONS", DEFAULT_REGIONS)
+        for category_id in categories or _env_list("TREND_CATEGORIES", DEFAULT_CATEGORIES)
+    ]
+    cache = _load_cache(cache_path)
+    now = time.time()
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale = []
+    for region, category_id in charts:
+        key = f"{region}/{category_id}"
+        cached = cache.get(key)
+        if cached and now - float(cached.get("fetched_at", 0)) < trend_cache_ttl():
+            entries[key] = cached
+        elif ledger is None or ledger.spend("videos.list"):
+            stale.append((region, category_id, cached))
+        elif cached:
+            # 할당량을 아끼려 다시 확인하지 못하면 만료된 캐시라도 쓴다.
+            entries[key] = cached
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(8, len(stale))) as pool:
+            fetched = list(pool.map(lambda chart: _fetch_chart(api_key, *chart), stale))
+        for (region, category_id, cached), entry in zip(stale, fetched):
+            if entry is not None:
+                entries[f"{region}/{category_id}"] = entry
+            elif cached:
+                entries[f"{region}/{category_id}"] = cached
+        if cache_path is not None:
+            _save_cache(cache_path, {**cache, **entries})
+    LOGGER.info("인기 신호: 차트 %s개 중 %s개를 새로 확인했습니다.", len(charts), len(stale))
+    return _merge_charts(entries.values())
+
+
+def cached_youtube_trends(cache_path: Path) -> List[Dict[str, Any]]:
+    """요청 없이 캐시에 남은 차트만 합친다. 만료 여부는 따지지 않는다."""
+    return _merge_charts(_load_cache(cache_path).values())
+
+
+def _merge_charts(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
-    for category_id in ("0", "28"):  # 전체, 과학/기술
-        try:
-            response = requests.get(
-                YOUTUBE_VIDEOS_ENDPOINT,
-                params={
-                    "key": api_key,
-                    "part": "snippet,statistics",
-                    "chart": "mostPopular",
-                    "regionCode": region,
-                    "videoCategoryId": category_id,
-                    "maxResults": 12,
-                },
-                timeout=25,
-            )
-            response.raise_for_status()
-            for item in response.json().get("items", []):
-                snippet = item.get("snippet", {})
-                stats = item.get("statistics", {})
-                results.append(
-                    {
-                        "title": snippet.get("title", "")[:120],
-                        "channel": snippet.get("channelTitle", "")[:60],
-                        "tags": snippet.get("tags", [])[:6],
-                        "views": int(stats.get("viewCount", 0) or 0),
-                        "category_id": category_id,
-                    }
-                )
-        except Exception as exc:
-            LOGGER.warning("YouTube 인기 신호 수집 실패(category=%s): %s", category_id, exc)
+    seen = set()
+    for entry in entries:
+        for item in entry.get("items", []):
+            identity = (item.get("title"), item.get("channel"))
+            if identity not in seen:
+                seen.add(identity)
+                results.append(item)
     results.sort(key=lambda item: item.get("views", 0), reverse=True)
     return results[:20]
-
-
-def top_performing_topics(records: List[Dict[str, Any]]) -> List[str]:
-    scored = []
-    for item in records:
-        metrics = item.get("metrics", {})
-        views = int(metrics.get("views", 0) or 0)
-        likes = int(metrics.get("likes", 0) or 0)
-        comments = int(metrics.get("comments", 0) or 0)
-        score = views + likes * 20 + comments * 40
-        if item.get("topic"):
-            scored.append((score, item["topic"]))
-    scored.sort(reverse=True)
-    return [topic for _, topic in scored[:5]]
-
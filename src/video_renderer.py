@@ -8,14 +8,21 @@ import os
 import re
 import shutil
 import subprocess
+import sys
+import time
 import wave
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import edge_tts
 import requests
 
+from audio_analysis import TARGET_LUFS, TARGET_TRUE_PEAK, AudioAnalysis, analyze_pcm
+from duration_model import DurationModel
 from models import StockClip
+from narration_cache import NarrationCache, cache_key
 
 LOGGER = logging.getLogger(__name__)
 WIDTH = 1080
@@ -42,7 +49,27 @@ EDGE_TTS_VOICES = (
     "ko-KR-InJoonNeural",
     "ko-KR-SunHiNeural",
 )
+GEMINI_TTS_PROMPT = (
+    "차분하고 따뜻한 한국어 다큐멘터리 내레이터처럼 읽어주세요. "
+    "광고처럼 과장하지 말고, 문장 사이에 자연스럽게 숨을 고르며, "
+    "핵심 단어만 은은하게 강조하세요. 대본의 단어를 바꾸거나 덧붙이지 마세요.\n\n"
+    "대본:\n{text}"
+)
+EDGE_TTS_SETTINGS = {"rate": "-2%", "volume": "+0%", "pitch": "+0Hz"}
+PCM_SAMPLE_RATE = 24000
+# edge-tts는 audio-24khz-48kbitrate-mono-mp3 고정 비트레이트로 보내므로 바이트 수로 길이를 잰다.
+EDGE_TTS_BITRATE = 48000
+# 문장별 병렬 합성(NARRATION_SYNTHESIS=parallel)에서 한 요청에 묶을 최대 글자 수와 문장 사이 쉼
+NARRATION_GROUP_CHARS = 90
+NARRATION_SENTENCE_PAUSE = 0.32
+PCM_SILENCE_THRESHOLD = 400
 AUDIO_MIX_MODE = "voice_only"
+LOUDNORM_TARGET = "I=-16:LRA=10:TP=-1.5"
+NARRATION_BAND_FILTERS = "highpass=f=65,lowpass=f=14500"
+LOUDNORM_MEASURED_KEYS = ("measured_I", "measured_LRA", "measured_TP", "measured_thresh")
+# 고정 이득 뒤에 두는 리미터. 자동 레벨 조정을 끄고 트루 피크 목표에서 자른다.
+GAIN_LIMITER = f"alimiter=limit={10 ** (TARGET_TRUE_PEAK / 20):.3f}:level=disabled"
+LOUDNESS_TOLERANCE_LU = 1.0
 
 
 class RenderError(RuntimeError):
@@ -142,10 +169,50 @@ def english_caption_lines(text: str) -> List[str]:
     return caption_lines(text, max_line_chars=23)
 
 
-def caption_timeline(text: str, duration: float) -> List[Tuple[float, float, str]]:
+def _span_timeline(
+    chunks: Sequence[str],
+    sentence_spans: Sequence[Sequence[Any]],
+    duration: float,
+) -> Optional[List[Tuple[float, float, str]]]:
+    """문장별 합성 경계(시작, 끝, 문장) 안에서만 글자 수 비례로 자막 시간을 나눈다."""
+    if " ".join(str(span[2]) for span in sentence_spans) != " ".join(chunks):
+        return None
+    anchors = []
+    offset = 0
+    for start, end, sentence in sentence_spans:
+        anchors.append((offset, offset + len(sentence), float(start), float(end)))
+        offset += len(sentence) + 1
+
+    def at(position: int) -> float:
+        for first, last, start, end in anchors:
+            if position <= last:
+                ratio = max(0, position - first) / max(1, last - first)
+                return start + (end - start) * ratio
+        return duration
+
+    timeline = []
+    position = 0
+    for index, chunk in enumerate(chunks):
+        start = 0.0 if index == 0 else at(position)
+        position += len(chunk) + 1
+        end = duration if index == len(chunks) - 1 else at(position)
+        timeline.append((start, end, chunk))
+    return timeline
+
+
+def caption_timeline(
+    text: str,
+    duration: float,
+    sentence_spans: Optional[Sequence[Sequence[Any]]] = None,
+) -> List[Tuple[float, float, str]]:
     chunks = split_caption_chunks(text)
     if not chunks:
         return []
+    if sentence_spans:
+        anchored = _span_timeline(chunks, sentence_spans, duration)
+        if anchored:
+            return anchored
+        LOGGER.warning("문장 경계가 자막 문장과 맞지 않아 글자 비례 배분을 사용합니다.")
     weights = []
     for item in chunks:
         weight = max(2.0, _visual_units(item))
@@ -182,8 +249,9 @@ def write_ass(
     narration: str,
     duration: float,
     caption_translations: Sequence[str] = (),
+    sentence_spans: Optional[Sequence[Sequence[Any]]] = None,
 ) -> None:
-    timeline = caption_timeline(narration, duration)
+    timeline = caption_timeline(narration, duration, sentence_spans)
     translations = [re.sub(r"\s+", " ", str(item)).strip() for item in caption_translations]
     if translations and len(translations) != len(timeline):
         raise RenderError(
@@ -251,22 +319,158 @@ def prepare_narration_text(text: str) -> str:
     return "\n".join(sentence.strip() for sentence in sentences if sentence.strip())
 
 
+def narration_synthesis_mode() -> str:
+    mode = os.getenv("NARRATION_SYNTHESIS", "single").strip().lower()
+    return mode if mode in ("single", "parallel", "stream") else "single"
+
+
+def narration_voice_key(voice: str, mode: str) -> str:
+    return f"{voice}/{mode}"
+
+
+def expected_narration_key() -> str:
+    """지금 설정에서 가장 먼저 시도할 음성의 길이 예측 키다."""
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    voice = GEMINI_TTS_VOICE if api_key else EDGE_TTS_VOICES[0]
+    return narration_voice_key(voice, narration_synthesis_mode())
+
+
+def narration_sentence_groups(prepared: str, max_chars: int = NARRATION_GROUP_CHARS) -> List[str]:
+    """짧은 문장은 이웃과 묶어 요청 수를 줄이고, 긴 문장은 자르지 않고 한 묶음으로 둔다."""
+    groups: List[str] = []
+    current = ""
+    for sentence in prepared.split("\n"):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}".strip()
+        if current and len(candidate) > max_chars:
+            groups.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        groups.append(current)
+    return groups
+
+
+def narration_tempo(raw_duration: float) -> float:
+    """59초를 넘는 원본만 최대 6%까지 빠르게 읽어 60초 안에 맞춘다."""
+    if raw_duration > 59:
+        return min(raw_duration / 58.0, 1.06)
+    return 1.0
+
+
 def narration_audio_filter(raw_duration: float) -> str:
     """음색을 과도하게 누르지 않고 음량만 방송 수준으로 정리한다."""
     filters = []
-    if raw_duration > 59:
-        tempo = min(raw_duration / 58.0, 1.06)
+    tempo = narration_tempo(raw_duration)
+    if tempo != 1.0:
         filters.append(f"atempo={tempo:.4f}")
-    filters.extend(
-        [
-            "highpass=f=65",
-            "lowpass=f=14500",
-            "loudnorm=I=-16:LRA=10:TP=-1.5",
-        ]
+    filters.extend([NARRATION_BAND_FILTERS, f"loudnorm={LOUDNORM_TARGET}"])
+    return ",".join(filters)
+
+
+def narration_audio_path() -> str:
+    """lossless는 무손실 내레이션을 최종 인코딩에서 한 번만 AAC로 굽고, aac는 기존 두 번 인코딩 경로다."""
+    path = os.getenv("NARRATION_AUDIO_PATH", "lossless").strip().lower()
+    return path if path in ("lossless", "aac") else "lossless"
+
+
+def _lossless_outputs(output: Path) -> List[str]:
+    """한 번의 FFmpeg 실행에서 FLAC 보관본을 쓰면서 같은 입력의 라우드니스를 측정한다."""
+    return [
+        "-map", "0:a", "-c:a", "flac", str(output),
+        "-map", "0:a", "-filter:a",
+        f"{NARRATION_BAND_FILTERS},loudnorm={LOUDNORM_TARGET}:print_format=json",
+        "-f", "null", "-",
+    ]
+
+
+def parse_loudnorm(log: str) -> Optional[Dict[str, str]]:
+    """loudnorm 측정 출력(JSON)에서 두 번째 단계에 넘길 값만 꺼낸다."""
+    match = re.search(r"\{[^{}]*\"input_i\"[^{}]*\}", log)
+    if not match:
+        return None
+    try:
+        measured = json.loads(match.group(0))
+        values = {
+            "measured_I": measured["input_i"],
+            "measured_LRA": measured["input_lra"],
+            "measured_TP": measured["input_tp"],
+            "measured_thresh": measured["input_thresh"],
+            "offset": measured["target_offset"],
+        }
+        for value in values.values():
+            float(value)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return values
+
+
+def measure_loudness(raw: Path, output: Path) -> Optional[Dict[str, str]]:
+    result = subprocess.run(
+        ["ffmpeg", "-y", "-hide_banner", "-nostats", "-i", str(raw), *_lossless_outputs(output)],
+        capture_output=True,
+        text=True,
     )
+    if result.returncode != 0:
+        raise RenderError(f"FFmpeg 실행 실패: {result.stderr[-2500:]}")
+    return parse_loudnorm(result.stderr)
+
+
+def mastering_filter(
+    tempo: float,
+    loudness: Optional[Dict[str, str]],
+    gain_db: Optional[float] = None,
+) -> str:
+    """최종 인코딩 한 번에 적용할 템포·대역·라우드니스·리미터 체인을 만든다."""
+    filters = []
+    if tempo != 1.0:
+        filters.append(f"atempo={tempo:.4f}")
+    limiter = "alimiter=limit=0.95"
+    if gain_db is not None:
+        # 프로세스 안에서 잰 라우드니스로 고정 이득을 주고, 한도를 넘는 순간 피크는 리미터가 누른다.
+        level = f"volume={gain_db:.2f}dB"
+        limiter = GAIN_LIMITER
+    else:
+        level = f"loudnorm={LOUDNORM_TARGET}"
+        if loudness:
+            # 측정값이 있으면 선형 보정만 해 압축 없이 목표 음량을 맞춘다.
+            level += "".join(f":{key}={loudness[key]}" for key in (*LOUDNORM_MEASURED_KEYS, "offset"))
+            level += ":linear=true"
+    filters.extend([NARRATION_BAND_FILTERS, level, "aresample=48000", limiter])
     return ",".join(filters)
 
 
+def narration_gain(analysis: AudioAnalysis) -> Optional[float]:
+    """고정 이득을 정하고, 피크 때문에 목표 음량보다 1LU 넘게 작아지면 경고한다."""
+    gain_db = analysis.normalization_gain()
+    if gain_db is None:
+        return None
+    expected = analysis.expected_lufs(gain_db)
+    if expected is not None and TARGET_LUFS - expected > LOUDNESS_TOLERANCE_LU:
+        LOGGER.warning(
+            "피크가 커서 내레이션 음량이 목표보다 낮습니다: %.1f LUFS (목표 %.1f LUFS)",
+            expected,
+            TARGET_LUFS,
+        )
+    return gain_db
+
+
+def analyze_wave(path: Path) -> Optional[AudioAnalysis]:
+    """합성 단계가 쓴 16비트 모노 WAV만 분석한다. 다른 형식은 기존 FFmpeg 측정을 쓴다."""
+    try:
+        with wave.open(str(path), "rb") as audio_file:
+            if audio_file.getnchannels() != 1 or audio_file.getsampwidth() != 2:
+                return None
+            sample_rate = audio_file.getframerate()
+            pcm = audio_file.readframes(audio_file.getnframes())
+    except (wave.Error, EOFError, OSError):
+        return None
+    return analyze_pcm(pcm, sample_rate)
+
+
 def _write_pcm_wave(path: Path, pcm: bytes, sample_rate: int = 24000) -> None:
     with wave.open(str(path), "wb") as audio_file:
         audio_file.setnchannels(1)
@@ -275,65 +479,338 @@ def _write_pcm_wave(path: Path, pcm: bytes, sample_rate: int = 24000) -> None:
         audio_file.writeframes(pcm)
 
 
-def _synthesize_gemini_tts(text: str, output: Path, api_key: str) -> None:
-    prompt = (
-        "차분하고 따뜻한 한국어 다큐멘터리 내레이터처럼 읽어주세요. "
-        "광고처럼 과장하지 말고, 문장 사이에 자연스럽게 숨을 고르며, "
-        "핵심 단어만 은은하게 강조하세요. 대본의 단어를 바꾸거나 덧붙이지 마세요.\n\n"
-        f"대본:\n{text}"
-    )
-    response = requests.post(
-        f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_TTS_MODEL}:generateContent",
-        headers={"x-goog-api-key": api_key, "Content-Type": "application/json"},
-        json={
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "responseModalities": ["AUDIO"],
-                "speechConfig": {
-                    "voiceConfig": {
-                        "prebuiltVoiceConfig": {"voiceName": GEMINI_TTS_VOICE}
-                    }
-                },
+def _gemini_tts_payload(text: str) -> Dict[str, Any]:
+    return {
+        "contents": [{"parts": [{"text": GEMINI_TTS_PROMPT.format(text=text)}]}],
+        "generationConfig": {
+            "responseModalities": ["AUDIO"],
+            "speechConfig": {
+                "voiceConfig": {
+                    "prebuiltVoiceConfig": {"voiceName": GEMINI_TTS_VOICE}
+                }
             },
         },
-        timeout=120,
-    )
-    response.raise_for_status()
-    payload = response.json()
+    }
+
+
+def _inline_audio(payload: Dict[str, Any]) -> Iterator[Tuple[bytes, int]]:
     parts = payload.get("candidates", [{}])[0].get("content", {}).get("parts", [])
-    chunks = []
-    sample_rate = 24000
     for part in parts:
         inline = part.get("inlineData") or part.get("inline_data") or {}
         if inline.get("data"):
-            chunks.append(base64.b64decode(inline["data"]))
             mime_type = str(inline.get("mimeType") or inline.get("mime_type") or "")
             match = re.search(r"rate=(\d+)", mime_type)
-            if match:
-                sample_rate = int(match.group(1))
+            yield base64.b64decode(inline["data"]), int(match.group(1)) if match else PCM_SAMPLE_RATE
+
+
+def _gemini_tts_pcm(text: str, api_key: str) -> Tuple[bytes, int]:
+    response = requests.post(
+        f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_TTS_MODEL}:generateContent",
+        headers={"x-goog-api-key": api_key, "Content-Type": "application/json"},
+        json=_gemini_tts_payload(text),
+        timeout=120,
+    )
+    response.raise_for_status()
+    chunks = list(_inline_audio(response.json()))
     if not chunks:
         raise RenderError("Gemini TTS 응답에 오디오가 없습니다.")
-    _write_pcm_wave(output, b"".join(chunks), sample_rate)
+    return b"".join(pcm for pcm, _ in chunks), chunks[-1][1]
 
 
-async def _synthesize_edge_tts(text: str, output: Path, voice: str) -> None:
-    communicator = edge_tts.Communicate(
-        text=text,
-        voice=voice,
-        rate="-2%",
-        volume="+0%",
-        pitch="+0Hz",
+def _gemini_tts_stream(text: str, api_key: str) -> Iterator[Tuple[bytes, int]]:
+    """streamGenerateContent의 SSE 이벤트마다 (PCM 조각, 샘플레이트)를 내보낸다."""
+    response = requests.post(
+        f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_TTS_MODEL}"
+        ":streamGenerateContent?alt=sse",
+        headers={"x-goog-api-key": api_key, "Content-Type": "application/json"},
+        json=_gemini_tts_payload(text),
+        stream=True,
+        timeout=120,
     )
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line and line.startswith(b"data:"):
+                yield from _inline_audio(json.loads(line[5:]))
+    finally:
+        response.close()
+
+
+def _synthesize_gemini_tts(text: str, output: Path, api_key: str) -> None:
+    pcm, sample_rate = _gemini_tts_pcm(text, api_key)
+    _write_pcm_wave(output, pcm, sample_rate)
+
+
+async def _synthesize_edge_tts(text: str, output: Path, voice: str) -> None:
+    communicator = edge_tts.Communicate(text=text, voice=voice, **EDGE_TTS_SETTINGS)
     await communicator.save(str(output))
 
 
-def create_narration(text: str, output_dir: Path) -> Tuple[Path, float, Dict[str, str]]:
-    prepared = prepare_narration_text(text)
+async def _edge_tts_stream(text: str, voice: str, sink: Callable[[bytes], None]) -> None:
+    communicator = edge_tts.Communicate(text=text, voice=voice, **EDGE_TTS_SETTINGS)
+    async for chunk in communicator.stream():
+        if chunk.get("type") == "audio" and chunk.get("data"):
+            sink(chunk["data"])
+
+
+class _StreamingEncoder:
+    """합성 중인 음성 조각을 실행 중인 FFmpeg 프로세스의 표준 입력으로 바로 흘려보낸다."""
+
+    def __init__(self, input_args: Sequence[str], output: Path, lossless: bool = True):
+        if lossless:
+            outputs = _lossless_outputs(output)
+        else:
+            outputs = [
+                "-filter:a", narration_audio_filter(0.0),
+                "-c:a", "aac", "-b:a", "160k", str(output),
+            ]
+        self.process = subprocess.Popen(
+            ["ffmpeg", "-y", "-hide_banner", "-nostats", *input_args, "-i", "pipe:0", *outputs],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self.bytes_written = 0
+        self.log = ""
+
+    def _failure(self) -> RenderError:
+        self.process.kill()
+        tail = self.process.stderr.read().decode("utf-8", "replace")[-2500:]
+        self.process.wait()
+        return RenderError(f"FFmpeg 실행 실패: {tail}")
+
+    def write(self, data: bytes) -> None:
+        try:
+            self.process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            raise self._failure()
+        self.bytes_written += len(data)
+
+    def finish(self) -> None:
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.log = self.process.stderr.read().decode("utf-8", "replace")
+        if self.process.wait() != 0:
+            raise RenderError(f"FFmpeg 실행 실패: {self.log[-2500:]}")
+
+    def abort(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+def _stream_narration(
+    prepared: str,
+    output: Path,
+    api_key: Optional[str],
+    lossless: bool = True,
+) -> Tuple[float, str, str, Optional[Dict[str, str]]]:
+    """중간 WAV 없이 내레이션을 바로 만들고, 흘려보낸 샘플 수로 원본 길이를 계산한다."""
+    last_error = None
+    if api_key:
+        encoder = None
+        try:
+            sample_rate = PCM_SAMPLE_RATE
+            for pcm, sample_rate in _gemini_tts_stream(prepared, api_key):
+                if encoder is None:
+                    encoder = _StreamingEncoder(
+                        ["-f", "s16le", "-ar", str(sample_rate), "-ac", "1"], output, lossless
+                    )
+                encoder.write(pcm)
+            if encoder is None:
+                raise RenderError("Gemini TTS 응답에 오디오가 없습니다.")
+            encoder.finish()
+            return (
+                encoder.bytes_written / 2 / sample_rate,
+                "Gemini expressive TTS",
+                GEMINI_TTS_VOICE,
+                parse_loudnorm(encoder.log),
+            )
+        except Exception as exc:
+            last_error = exc
+            if encoder is not None:
+                encoder.abort()
+            LOGGER.warning("Gemini TTS 스트리밍 실패, 무료 한국어 신경망 음성으로 전환합니다: %s", exc)
+    for candidate in EDGE_TTS_VOICES:
+        encoder = _StreamingEncoder(["-f", "mp3"], output, lossless)
+        try:
+            asyncio.run(_edge_tts_stream(prepared, candidate, encoder.write))
+            if not encoder.bytes_written:
+                raise RenderError("TTS 응답에 오디오가 없습니다.")
+            encoder.finish()
+            return (
+                encoder.bytes_written * 8 / EDGE_TTS_BITRATE,
+                "Microsoft neural TTS fallback",
+                candidate,
+                parse_loudnorm(encoder.log),
+            )
+        except Exception as exc:
+            last_error = exc
+            encoder.abort()
+            LOGGER.warning("TTS 음성 실패(%s), 다른 음성을 시도합니다.", candidate)
+    raise RenderError(f"한국어 내레이션을 만들지 못했습니다: {last_error}")
+
+
+def _parallel_workers(groups: int) -> int:
+    return max(1, min(groups, int(os.getenv("NARRATION_PARALLEL_WORKERS", "4"))))
+
+
+def _decode_pcm(path: Path, sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-i", str(path),
+            "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-",
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0 or not result.stdout:
+        tail = result.stderr.decode("utf-8", "replace")[-2500:]
+        raise RenderError(f"문장 음성 디코딩 실패: {tail}")
+    return result.stdout
+
+
+def _pcm_samples(pcm: bytes) -> array:
+    samples = array("h")
+    samples.frombytes(pcm[: len(pcm) // 2 * 2])
+    if sys.byteorder != "little":
+        samples.byteswap()
+    return samples
+
+
+def _trim_pcm_silence(
+    pcm: bytes,
+    sample_rate: int,
+    threshold: int = PCM_SILENCE_THRESHOLD,
+    keep: float = 0.03,
+) -> bytes:
+    """엔진마다 다른 앞뒤 무음을 걷어 내고 자음이 잘리지 않도록 짧은 여유만 남긴다."""
+    samples = _pcm_samples(pcm)
+    start, end = 0, len(samples)
+    while start < end and abs(samples[start]) < threshold:
+        start += 1
+    while end > start and abs(samples[end - 1]) < threshold:
+        end -= 1
+    margin = int(sample_rate * keep)
+    trimmed = samples[max(0, start - margin) : min(len(samples), end + margin)]
+    if sys.byteorder != "little":
+        trimmed.byteswap()
+    return trimmed.tobytes()
+
+
+def stitch_sentence_pcm(
+    pieces: Sequence[bytes],
+    sample_rate: int,
+    pause: float = NARRATION_SENTENCE_PAUSE,
+) -> Tuple[bytes, List[Tuple[float, float]]]:
+    """문장 묶음 PCM을 일정한 쉼으로 이어 붙이고 묶음별 (시작, 끝) 초를 함께 돌려준다."""
+    silence = b"\x00\x00" * int(sample_rate * pause)
+    track = bytearray()
+    spans = []
+    for index, piece in enumerate(pieces):
+        if index:
+            track += silence
+        start = len(track) / 2 / sample_rate
+        track += _trim_pcm_silence(piece, sample_rate)
+        spans.append((start, len(track) / 2 / sample_rate))
+    return bytes(track), spans
+
+
+def _synthesize_gemini_groups(groups: Sequence[str], api_key: str) -> Tuple[List[bytes], int, List[float]]:
+    def synthesize(text: str) -> Tuple[bytes, int, float]:
+        started = time.perf_counter()
+        pcm, sample_rate = _gemini_tts_pcm(text, api_key)
+        return pcm, sample_rate, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=_parallel_workers(len(groups))) as pool:
+        results = list(pool.map(synthesize, groups))
+    sample_rates = {sample_rate for _, sample_rate, _ in results}
+    if len(sample_rates) != 1:
+        raise RenderError("문장별 Gemini 음성의 샘플레이트가 서로 다릅니다.")
+    return [pcm for pcm, _, _ in results], sample_rates.pop(), [item[2] for item in results]
+
+
+async def _synthesize_edge_groups(groups: Sequence[str], output_dir: Path, voice: str) -> List[float]:
+    limit = asyncio.Semaphore(_parallel_workers(len(groups)))
+
+    async def synthesize(index: int, text: str) -> float:
+        async with limit:
+            started = time.perf_counter()
+            await _synthesize_edge_tts(text, output_dir / f"narration_part_{index + 1}.mp3", voice)
+            return time.perf_counter() - started
+
+    return list(await asyncio.gather(*(synthesize(index, text) for index, text in enumerate(groups))))
+
+
+def _edge_race_size() -> int:
+    """EDGE_TTS_RACE가 2 이상이면 선호 순서 앞쪽의 그 수만큼 음성을 동시에 시도한다."""
+    try:
+        return max(0, int(os.getenv("EDGE_TTS_RACE", "0")))
+    except ValueError:
+        return 0
+
+
+async def _race_edge_voices(
+    prepared: str,
+    output_dir: Path,
+    voices: Sequence[str],
+) -> Tuple[Path, str]:
+    """음성들을 시차를 두고 동시에 합성하고, 길이까지 정상인 결과 중 선호 순서가 가장 앞선 것을 고른다."""
+    stagger = float(os.getenv("EDGE_TTS_RACE_STAGGER", "0.4"))
+    started = time.perf_counter()
+    elapsed: Dict[int, float] = {}
+
+    async def attempt(index: int, voice: str) -> Path:
+        await asyncio.sleep(index * stagger)
+        output = output_dir / f"narration_raw_{index + 1}.mp3"
+        began = time.perf_counter()
+        try:
+            await _synthesize_edge_tts(prepared, output, voice)
+            seconds = output.stat().st_size * 8 / EDGE_TTS_BITRATE
+            if not 25 <= seconds <= 63:
+                raise RenderError(f"내레이션 길이가 비정상입니다: {seconds:.1f}초")
+            return output
+        finally:
+            elapsed[index] = time.perf_counter() - began
+
+    tasks = [asyncio.create_task(attempt(index, voice)) for index, voice in enumerate(voices)]
+    last_error: Optional[Exception] = None
+    winner: Optional[Path] = None
+    try:
+        # 선호 순서대로 기다리므로 뒤 음성이 먼저 끝나도 앞 음성의 결과가 나올 때까지 채택하지 않는다.
+        for index, task in enumerate(tasks):
+            try:
+                winner = await task
+            except Exception as exc:
+                last_error = exc
+                LOGGER.warning("TTS 음성 실패(%s): %s", voices[index], exc)
+                continue
+            wall = time.perf_counter() - started
+            # 순차 방식이라면 앞선 실패 음성의 시간과 승자 합성 시간을 모두 기다렸어야 한다.
+            sequential = sum(elapsed.get(item, 0.0) for item in range(index + 1))
+            LOGGER.info(
+                "edge 음성 경합 승자: %s / %.1f초 / 순차 시도 대비 약 %.1f초 절약",
+                voices[index],
+                wall,
+                max(0.0, sequential - wall),
+            )
+            return winner, voices[index]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for index in range(len(voices)):
+            leftover = output_dir / f"narration_raw_{index + 1}.mp3"
+            if leftover != winner and leftover.exists():
+                leftover.unlink()
+    raise RenderError(f"동시 시도한 음성이 모두 실패했습니다: {last_error}")
+
+
+def _synthesize_whole(prepared: str, output_dir: Path, api_key: Optional[str]) -> Tuple[Path, str, str]:
     raw = output_dir / "narration_raw.wav"
     engine = "Gemini expressive TTS"
     selected_voice = GEMINI_TTS_VOICE
     last_error = None
-    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if api_key:
         try:
             _synthesize_gemini_tts(prepared, raw, api_key)
@@ -343,7 +820,20 @@ def create_narration(text: str, output_dir: Path) -> Tuple[Path, float, Dict[str
     if not raw.exists():
         raw = output_dir / "narration_raw.mp3"
         engine = "Microsoft neural TTS fallback"
-        for candidate in EDGE_TTS_VOICES:
+        race = min(_edge_race_size(), len(EDGE_TTS_VOICES))
+        sequential = EDGE_TTS_VOICES
+        if race > 1:
+            sequential = EDGE_TTS_VOICES[race:]
+            try:
+                winner, selected_voice = asyncio.run(
+                    _race_edge_voices(prepared, output_dir, EDGE_TTS_VOICES[:race])
+                )
+                winner.replace(raw)
+                return raw, engine, selected_voice
+            except Exception as exc:
+                last_error = exc
+                LOGGER.warning("동시 시도한 음성이 모두 실패해 나머지 음성을 차례로 시도합니다: %s", exc)
+        for candidate in sequential:
             try:
                 asyncio.run(_synthesize_edge_tts(prepared, raw, candidate))
                 selected_voice = candidate
@@ -353,28 +843,215 @@ def create_narration(text: str, output_dir: Path) -> Tuple[Path, float, Dict[str
                 LOGGER.warning("TTS 음성 실패(%s), 다른 음성을 시도합니다.", candidate)
         else:
             raise RenderError(f"한국어 내레이션을 만들지 못했습니다: {last_error}")
-    raw_duration = media_duration(raw)
+    return raw, engine, selected_voice
+
+
+def _synthesize_sentences(
+    prepared: str,
+    output_dir: Path,
+    api_key: Optional[str],
+) -> Tuple[Path, str, str, Dict[str, Any]]:
+    """문장 묶음을 동시에 합성해 하나의 WAV로 잇는다. 전체 지연은 가장 느린 묶음 하나로 줄어든다."""
+    groups = narration_sentence_groups(prepared)
+    started = time.perf_counter()
+    pieces: Optional[List[bytes]] = None
+    sample_rate = PCM_SAMPLE_RATE
+    latencies: List[float] = []
+    engine = "Gemini expressive TTS"
+    selected_voice = GEMINI_TTS_VOICE
+    last_error = None
+    if api_key:
+        try:
+            pieces, sample_rate, latencies = _synthesize_gemini_groups(groups, api_key)
+        except Exception as exc:
+            last_error = exc
+            LOGGER.warning("문장별 Gemini TTS 실패, 무료 한국어 신경망 음성으로 전환합니다: %s", exc)
+    if pieces is None:
+        engine = "Microsoft neural TTS fallback"
+        sample_rate = PCM_SAMPLE_RATE
+        for candidate in EDGE_TTS_VOICES:
+            try:
+                latencies = asyncio.run(_synthesize_edge_groups(groups, output_dir, candidate))
+                pieces = [
+                    _decode_pcm(output_dir / f"narration_part_{index + 1}.mp3", sample_rate)
+                    for index in range(len(groups))
+                ]
+                selected_voice = candidate
+                break
+            except Exception as exc:
+                last_error = exc
+                LOGGER.warning("문장별 TTS 음성 실패(%s), 다른 음성을 시도합니다.", candidate)
+        else:
+            raise RenderError(f"한국어 내레이션을 만들지 못했습니다: {last_error}")
+
+    track, spans = stitch_sentence_pcm(pieces, sample_rate)
+    raw = output_dir / "narration_raw.wav"
+    _write_pcm_wave(raw, track, sample_rate)
+    wall = time.perf_counter() - started
+    LOGGER.info(
+        "문장별 병렬 합성: %s묶음 / 전체 %.1f초 / 가장 느린 묶음 %.1f초",
+        len(groups),
+        wall,
+        max(latencies, default=0.0),
+    )
+    return raw, engine, selected_voice, {
+        "groups": groups,
+        "spans": spans,
+        "latencies": [round(value, 3) for value in latencies],
+        "wall_seconds": round(wall, 3),
+    }
+
+
+def narration_cache_keys(
+    prepared: str,
+    use_gemini: bool,
+    mode: str = "single",
+) -> List[Tuple[str, str]]:
+    """합성 선호 순서대로 (음성, 캐시 키)를 만든다. 엔진 설정이 바뀌면 키도 바뀐다."""
+    # 문장별 합성은 이어 붙이는 방식에 따라 음성이 달라지므로 그 설정까지 키에 넣는다.
+    stitching = {
+        "single": (),
+        "parallel": (mode, NARRATION_GROUP_CHARS, NARRATION_SENTENCE_PAUSE),
+    }.get(mode, (mode,))
+    keys = []
+    if use_gemini:
+        keys.append(
+            (
+                GEMINI_TTS_VOICE,
+                cache_key(
+                    "gemini", GEMINI_TTS_VOICE, GEMINI_TTS_MODEL, GEMINI_TTS_PROMPT, prepared, *stitching
+                ),
+            )
+        )
+    for voice in EDGE_TTS_VOICES:
+        settings = json.dumps(EDGE_TTS_SETTINGS, sort_keys=True)
+        keys.append((voice, cache_key("edge", voice, "edge-tts", settings, prepared, *stitching)))
+    return keys
+
+
+def create_narration(
+    text: str,
+    output_dir: Path,
+    cache: Optional[NarrationCache] = None,
+    duration_model: Optional[DurationModel] = None,
+) -> Tuple[Path, float, Dict[str, Any]]:
+    prepared = prepare_narration_text(text)
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    mode = narration_synthesis_mode()
+    cache_keys = dict(narration_cache_keys(prepared, bool(api_key), mode))
+    if cache:
+        for key in cache_keys.values():
+            cached = cache.load(key, output_dir)
+            if cached:
+                normalized, duration, metadata = cached
+                return normalized, duration, {**metadata, "narration_cache": "hit"}
+
+    prediction = None
+    if duration_model is not None:
+        prediction = duration_model.predict(prepared, expected_narration_key())
+        problem = prediction.problem()
+        if problem:
+            # 기준 밖 길이가 확실하면 유료 합성을 하기 전에 멈춘다.
+            raise RenderError(f"합성 전 길이 예측으로 중단합니다: {problem}")
+
+    lossless = narration_audio_path() == "lossless"
+    normalized = output_dir / ("narration.flac" if lossless else "narration.m4a")
+    loudness = None
+    if mode == "stream":
+        raw = None
+        raw_duration, engine, selected_voice, loudness = _stream_narration(
+            prepared, normalized, api_key, lossless
+        )
+        synthesis = {}
+    elif mode == "parallel":
+        raw, engine, selected_voice, synthesis = _synthesize_sentences(prepared, output_dir, api_key)
+    else:
+        raw, engine, selected_voice = _synthesize_whole(prepared, output_dir, api_key)
+        synthesis = {}
+    analysis = analyze_wave(raw) if raw is not None and raw.suffix == ".wav" else None
+    if analysis is not None:
+        raw_duration = analysis.duration
+    elif raw is not None:
+        raw_duration = media_duration(raw)
+    if duration_model is not None:
+        # 기준 밖으로 나온 합성도 다음 예측에는 유효한 관측값이다.
+        duration_model.record(prepared, narration_voice_key(selected_voice, mode), raw_duration)
+        duration_model.save()
     if not 25 <= raw_duration <= 63:
         raise RenderError(f"내레이션 길이가 비정상입니다: {raw_duration:.1f}초")
 
-    normalized = output_dir / "narration.m4a"
-    _run(
-        [
-            "ffmpeg", "-y", "-i", str(raw), "-filter:a",
-            narration_audio_filter(raw_duration),
-            "-c:a", "aac", "-b:a", "160k", str(normalized),
-        ]
-    )
-    duration = media_duration(normalized)
+    tempo = narration_tempo(raw_duration)
+    audio_filter = "alimiter=limit=0.95"
+    gain_db = narration_gain(analysis) if analysis is not None else None
+    if lossless:
+        # 정규화·템포 보정은 최종 인코딩의 필터 체인에서 한 번에 적용한다.
+        if gain_db is not None:
+            # WAV 원본이 곧 무손실 보관본이므로 측정·변환용 FFmpeg 실행이 필요 없다.
+            normalized = raw
+        elif raw is not None:
+            loudness = measure_loudness(raw, normalized)
+        if gain_db is None and not loudness:
+            LOGGER.warning("라우드니스 측정값이 없어 최종 인코딩에서 동적 정규화를 사용합니다.")
+        audio_filter = mastering_filter(tempo, loudness, gain_db)
+        duration = raw_duration / tempo
+    elif raw is None:
+        # 스트리밍 중에는 전체 길이를 모르므로 템포 보정이 필요할 때만 한 번 더 인코딩한다.
+        duration = raw_duration / tempo
+        if tempo != 1.0:
+            retimed = output_dir / "narration_tempo.m4a"
+            _run(
+                [
+                    "ffmpeg", "-y", "-i", str(normalized), "-filter:a", f"atempo={tempo:.4f}",
+                    "-c:a", "aac", "-b:a", "160k", str(retimed),
+                ]
+            )
+            retimed.replace(normalized)
+    else:
+        _run(
+            [
+                "ffmpeg", "-y", "-i", str(raw), "-filter:a",
+                narration_audio_filter(raw_duration),
+                "-c:a", "aac", "-b:a", "160k", str(normalized),
+            ]
+        )
+        duration = media_duration(normalized)
     if not 28 <= duration <= 60:
         raise RenderError(f"정규화 후 내레이션 길이가 기준 밖입니다: {duration:.1f}초")
-    return normalized, duration, {
+    metadata = {
         "narration_engine": engine,
         "narration_voice": selected_voice,
         "pacing": "sentence-aware natural Korean",
         "background_music": "none",
         "mix_mode": AUDIO_MIX_MODE,
+        "synthesis_mode": mode,
+        "audio_path": "lossless" if lossless else "aac",
+        "audio_filter": audio_filter,
     }
+    if analysis is not None:
+        metadata["loudness_analysis"] = analysis.summary()
+    if prediction is not None:
+        metadata["predicted_duration"] = {
+            "seconds": round(prediction.seconds, 2),
+            "method": prediction.method,
+            "samples": prediction.samples,
+        }
+    if synthesis:
+        # 템포 보정만큼 경계를 줄여 정규화된 음성의 시간축에 맞춘다.
+        scale = duration / raw_duration
+        metadata["sentence_spans"] = [
+            [round(start * scale, 3), round(end * scale, 3), group]
+            for (start, end), group in zip(synthesis["spans"], synthesis["groups"])
+        ]
+        metadata["sentence_latency_seconds"] = synthesis["latencies"]
+        metadata["synthesis_wall_seconds"] = synthesis["wall_seconds"]
+    if cache:
+        cache.store(
+            cache_keys[selected_voice],
+            {"raw": raw, "normalized": normalized} if raw and not lossless else {"normalized": normalized},
+            duration,
+            metadata,
+        )
+    return normalized, duration, {**metadata, "narration_cache": "miss" if cache else "off"}
 
 
 def render_short(
@@ -383,7 +1060,11 @@ def render_short(
     output_dir: Path,
     output_name: str = "final_short.mp4",
     caption_translations: Sequence[str] = (),
+    narration_cache: Optional[NarrationCache] = None,
+    duration_model: Optional[DurationModel] = None,
+    narration: Optional[Tuple[Path, float, Dict[str, Any]]] = None,
 ) -> Path:
+    """narration에 create_narration 결과를 넘기면 음성 합성을 건너뛰고 그 음성으로 렌더링한다."""
     if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
         raise RenderError("FFmpeg 또는 FFprobe가 설치되어 있지 않습니다.")
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -391,13 +1072,21 @@ def render_short(
     if len(clip_list) < 2:
         raise RenderError("렌더링에는 서로 다른 영상 2개 이상이 필요합니다.")
 
-    narration_path, duration, audio_metadata = create_narration(narration_text, output_dir)
+    narration_path, duration, audio_metadata = narration or create_narration(
+        narration_text, output_dir, cache=narration_cache, duration_model=duration_model
+    )
     (output_dir / "audio_metadata.json").write_text(
         json.dumps(audio_metadata, ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
     )
     ass_path = output_dir / "captions.ass"
-    write_ass(ass_path, narration_text, duration, caption_translations)
+    write_ass(
+        ass_path,
+        narration_text,
+        duration,
+        caption_translations,
+        sentence_spans=audio_metadata.get("sentence_spans"),
+    )
     (output_dir / "caption_metadata.json").write_text(
         json.dumps(
             {
@@ -405,6 +1094,7 @@ def render_short(
                 "korean_base_font_size": CAPTION_BASE_FONT_SIZE,
                 "english_base_font_size": ENGLISH_CAPTION_BASE_FONT_SIZE,
                 "layout": "transparent safe-area panel",
+                "timing": "sentence spans" if audio_metadata.get("sentence_spans") else "character weights",
             },
             ensure_ascii=False,
             indent=2,
@@ -468,7 +1158,7 @@ def render_short(
             "ffmpeg", "-y", "-i", str(visual), "-i", str(narration_path),
             "-filter_complex",
             f"[0:v]ass='{ass_filter_path}'[v];"
-            "[1:a]alimiter=limit=0.95[a]",
+            f"[1:a]{audio_metadata.get('audio_filter', 'alimiter=limit=0.95')}[a]",
             "-map", "[v]", "-map", "[a]",
             "-t", f"{duration:.3f}", "-c:v", "libx264", "-preset", "medium",
             "-crf", "20", "-c:a", "aac", "-b:a", "160k", "-movflags", "+faststart",
@@ -479,4 +1169,4 @@ def render_short(
         raise RenderError("최종 영상 파일이 생성되지 않았습니다.")
     LOGGER.info("최종 영상 생성: %.1f초 / %.1fMB", duration, final_path.stat().st_size / 1024 / 1024)
     return final_path
-
+
@@ -6,7 +6,7 @@ import os
 import random
 import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -14,6 +14,7 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
+from quota import QuotaExceeded
 from secret_utils import clean_secret
 
 LOGGER = logging.getLogger(__name__)
@@ -83,9 +84,12 @@ class YouTubeUploader:
         description: str,
         tags: List[str],
         privacy: str = "public",
+        ledger: Optional[Any] = None,
     ) -> Dict[str, str]:
         if not video_path.exists():
             raise FileNotFoundError(video_path)
+        if ledger is not None and not ledger.spend("videos.insert", essential=True):
+            raise QuotaExceeded("오늘 남은 YouTube 할당량으로는 업로드할 수 없습니다.")
         body = {
             "snippet": {
                 "title": title[:100],
@@ -1,41 +1,103 @@
+import asyncio
 import base64
 import json
 import re
 import sys
 import tempfile
+import threading
 import unittest
 import wave
-from dataclasses import replace
+from dataclasses import asdict, replace
+from difflib import SequenceMatcher
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import numpy as np
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT / "src"))
 
-from ai_writer import GeminiError, GeminiWriter, normalize_loop_ending, normalize_question_hook
-from main import build_engagement_comment
-from knowledge import _select_wikipedia_page
+from ai_writer import (
+    API_BASE,
+    DraftRejectedError,
+    GeminiError,
+    GeminiWriter,
+    IncrementalJsonObject,
+    normalize_loop_ending,
+    normalize_question_hook,
+)
+from ai_standin_server import StandInConfig, StandInServer
+from audio_analysis import analyze_pcm
+from checkpoints import CheckpointStore
+from content_calendar import plan_calendar, scheduled_plans, write_calendar
+from context_cache import ContextCache
+from duration_model import DurationModel, duration_features
+from llm_telemetry import CallLog
+from main import build_engagement_comment, create_editorial_script, rank_candidate_plans
+from metrics import refresh_due_metrics
+from narration_cache import NarrationCache
+from performance import analyze_performance, load_performance
+from prereview import prereview_script
+from quota import QuotaExceeded, QuotaLedger
+from knowledge import _select_wikipedia_page, condense_extract
 from models import KnowledgeSource, ScriptPackage, TopicPlan
 from publish_preview import build_preview_description
 from quality import QualityGateError, source_is_relevant, validate_package
 from run_status import build_status
 from secret_utils import clean_secret
-from topic_catalog import VERIFIED_TOPICS, eligible_topic_plans
+from stage_graph import Stage, StageGraph
+from state_store import StateStore
+from topic_catalog import VERIFIED_TOPICS, TopicCatalog, eligible_topic_plans
+from topic_matcher import catalog_matcher, field_document, score_documents
+from topic_similarity import TopicIndex, minhash_signatures, normalize_topic
+from trend_scout import fetch_youtube_trends
+from translation_memory import TranslationMemory
 from video_renderer import (
     AUDIO_MIX_MODE,
     EDGE_TTS_VOICES,
     GEMINI_TTS_MODEL,
     _synthesize_gemini_tts,
+    _synthesize_whole,
     caption_font_size,
     caption_lines,
     caption_timeline,
+    create_narration,
     english_caption_lines,
+    mastering_filter,
+    narration_cache_keys,
     narration_audio_filter,
+    narration_gain,
+    narration_sentence_groups,
     prepare_narration_text,
     split_caption_chunks,
     write_ass,
 )
 
+LOUDNESS = {
+    "measured_I": "-23.10",
+    "measured_LRA": "6.30",
+    "measured_TP": "-4.20",
+    "measured_thresh": "-33.40",
+    "offset": "0.20",
+}
+
+
+
+def pcm_tone(
+    seconds: float,
+    amplitude: float = 0.1,
+    sample_rate: int = 24000,
+    lead: float = 0.0,
+    tail: float = 0.0,
+) -> bytes:
+    """앞뒤 무음이 붙은 997Hz 사인파 16비트 PCM을 만든다."""
+    tone = amplitude * np.sin(2 * np.pi * 997 * np.arange(int(sample_rate * seconds)) / sample_rate)
+    signal = np.concatenate(
+        (np.zeros(int(sample_rate * lead)), tone, np.zeros(int(sample_rate * tail)))
+    )
+    return (signal * 32767).astype("<i2").tobytes()
+
 
 class PipelineTests(unittest.TestCase):
     def setUp(self):
@@ -159,6 +221,20 @@ class PipelineTests(unittest.TestCase):
         )
         self.assertEqual(selected[0]["title"], "번개")
 
+    def test_condensed_extract_keeps_relevant_sentences_past_the_prefix(self):
+        extract = (
+            "벌집은 꿀벌이 밀랍으로 만든 구조물이다. "
+            + "양봉의 역사는 고대 이집트까지 거슬러 올라간다. " * 80
+            + "== 구조 == 벌집의 방은 육각형이다. 육각형은 적은 밀랍으로 넓은 공간을 만든다. "
+            + "== 같이 보기 == 꿀벌 육각형"
+        )
+        condensed = condense_extract(extract, "벌집이 육각형인 이유 벌집", budget=400)
+        self.assertLessEqual(len(condensed), 400)
+        self.assertTrue(condensed.startswith("벌집은 꿀벌이 밀랍으로 만든 구조물이다."))
+        self.assertIn("육각형은 적은 밀랍으로 넓은 공간을 만든다.", condensed)
+        self.assertNotIn("==", condensed)
+        self.assertEqual(condense_extract("짧은 자료입니다.", "자료", budget=400), "짧은 자료입니다.")
+
     def test_verified_catalog_has_direct_sources_and_specific_media_queries(self):
         topics = [plan.topic for plan in VERIFIED_TOPICS]
         self.assertEqual(len(topics), len(set(topics)))
@@ -174,9 +250,195 @@ class PipelineTests(unittest.TestCase):
         eligible = eligible_topic_plans([recent])
         self.assertNotIn(recent, [plan.topic for plan in eligible])
 
+    def test_topic_catalog_indexes_jsonl_and_materializes_plans_lazily(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "topic_catalog.jsonl"
+            lines = [json.dumps(asdict(plan), ensure_ascii=False) for plan in VERIFIED_TOPICS[:4]]
+            path.write_text("\n".join(lines) + "\n\n", encoding="utf-8")
+            catalog = TopicCatalog(path)
+            self.assertEqual(len(catalog), 4)
+            self.assertEqual(catalog._plans, {})
+            self.assertEqual(catalog[1:3], list(VERIFIED_TOPICS[1:3]))
+            self.assertEqual(sorted(catalog._plans), [1, 2])
+            self.assertEqual(catalog[-1], VERIFIED_TOPICS[3])
+            nature = catalog.positions_in_category("nature")
+            self.assertEqual(list(nature), [i for i in range(4) if VERIFIED_TOPICS[i].category == "nature"])
+            self.assertEqual(catalog.category_of(VERIFIED_TOPICS[0].topic + "?"), VERIFIED_TOPICS[0].category)
+            plan = catalog[3]
+            self.assertEqual(
+                catalog.fields([3]),
+                [(plan.topic, plan.wiki_query, plan.category, " ".join(plan.stock_queries))],
+            )
+            fresh = TopicCatalog(path)
+            fields = fresh.fields()
+            scores = score_documents(
+                [field_document(*item) for item in fields],
+                [item[2] for item in fields],
+                [{"title": fresh.topics[2], "views": 10}],
+                matcher=catalog_matcher(fresh),
+            )
+            self.assertEqual(int(np.argmax(scores)), 2)
+            # 영상 검색어 열도 색인되어 영어 태그만 있는 인기 신호가 해당 주제와 맞는다.
+            tagged = score_documents(
+                [field_document(*item) for item in fields],
+                [item[2] for item in fields],
+                [{"title": "", "tags": ["northern lights"], "views": 10}],
+                matcher=catalog_matcher(fresh),
+            )
+            self.assertIn("northern lights", fresh.stock_texts[int(np.argmax(tagged))])
+            self.assertEqual(fresh._plans, {})
+            # 같은 검증 문서를 쓰더라도 주제가 다르면 쿨다운 대상이 아니다.
+            sibling = {**asdict(VERIFIED_TOPICS[1]), "topic": "전혀 다른 각도의 새 질문"}
+            path.write_text("\n".join([*lines, json.dumps(sibling, ensure_ascii=False)]) + "\n", encoding="utf-8")
+            shared = TopicCatalog(path)
+            mask = shared.cooldown_mask([VERIFIED_TOPICS[1].topic], TopicIndex.build(shared.topics))
+            self.assertEqual(list(np.flatnonzero(mask)), [1])
+            path.write_text(lines[0] + '\n{"topic": "빈 항목"}\n', encoding="utf-8")
+            with self.assertRaisesRegex(ValueError, "2번째 줄"):
+                TopicCatalog(path)
+
+    def test_topic_index_matches_pairwise_similarity_and_persists(self):
+        topics = [plan.topic for plan in VERIFIED_TOPICS]
+        recent = ["오로라는 왜 극지방 밤하늘에서 잘 보일까요", "문어 피부색", VERIFIED_TOPICS[5].topic]
+        expected = {
+            position
+            for position, topic in enumerate(topics)
+            if any(
+                SequenceMatcher(None, normalize_topic(topic), normalize_topic(old)).ratio() >= 0.72
+                for old in recent
+            )
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "topic_lsh.npz"
+            built = TopicIndex.load_or_build(topics, path)
+            self.assertEqual(built.near_duplicates(recent, 0.72), expected)
+            with patch("topic_similarity.minhash_signatures", wraps=minhash_signatures) as signatures:
+                TopicIndex.load_or_build(topics, path)
+                signatures.assert_not_called()
+                TopicIndex.load_or_build([*topics, "새 주제는 왜 추가될까"], path)
+                signatures.assert_called_once()
+
+    def test_content_calendar_spreads_categories_and_feeds_daily_plan(self):
+        recent = [VERIFIED_TOPICS[0].topic]
+        start = date(2026, 1, 1)
+        calendar = plan_calendar(recent, category_performance={"nature": 1.0}, days=10, start=start)
+        topics = [entry["topic"] for entry in calendar["entries"]]
+        self.assertEqual(len(topics), 10)
+        self.assertEqual(len(set(topics)), 10)
+        self.assertNotIn(VERIFIED_TOPICS[0].topic, topics)
+        categories = [entry["category"] for entry in calendar["entries"]]
+        self.assertFalse(any(len(set(categories[day:day + 3])) == 1 for day in range(len(categories) - 2)))
+        fresh = TopicCatalog(VERIFIED_TOPICS.path)
+        replanned = plan_calendar(
+            recent, category_performance={"nature": 1.0}, days=10, start=start, catalog=fresh
+        )
+        self.assertEqual(replanned["entries"], calendar["entries"])
+        self.assertEqual(fresh._plans, {})
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "content_calendar.json"
+            write_calendar(path, calendar)
+            today = scheduled_plans(path, start, recent)
+            self.assertEqual([plan.topic for plan in today], topics)
+            self.assertIn("2026-01-01", today[0].trend_reason)
+            # 오늘 계획 주제를 이미 올렸다면 순위 호출을 건너뛰지 않는다.
+            self.assertEqual(scheduled_plans(path, start, [*recent, topics[0]]), [])
+            tomorrow = scheduled_plans(path, start + timedelta(days=1), [*recent, topics[0]])
+            self.assertEqual(tomorrow[0].topic, topics[1])
+            self.assertEqual(scheduled_plans(path, start + timedelta(days=30), recent), [])
+
+    def test_checkpoints_resume_only_stages_with_unchanged_inputs(self):
+        plan = VERIFIED_TOPICS[0]
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory) / "checkpoints"
+            clip = Path(directory) / "clip.mp4"
+            clip.write_bytes(b"video")
+            compute = MagicMock(side_effect=[[plan], [clip], [clip], ["changed"]])
+            first = CheckpointStore(root)
+            first.run("ranking", {"date": date(2026, 1, 1)}, compute)
+            first.run("clips", {"queries": plan.stock_queries}, compute)
+
+            fresh = CheckpointStore(root)
+            self.assertIsNone(fresh.load("ranking", {"date": date(2026, 1, 1)}))
+            resumed = CheckpointStore(root, resume=True)
+            ranked = resumed.run(
+                "ranking",
+                {"date": date(2026, 1, 1)},
+                compute,
+                decode=lambda rows: [TopicPlan(**row) for row in rows],
+            )
+            self.assertEqual(ranked, [plan])
+            clip.unlink()
+            decode_paths = lambda rows: [Path(row) for row in rows]  # noqa: E731
+            resumed.run(
+                "clips",
+                {"queries": plan.stock_queries},
+                compute,
+                decode=decode_paths,
+                valid=lambda paths: all(path.exists() for path in paths),
+            )
+            self.assertEqual(resumed.run("ranking", {"date": date(2026, 1, 2)}, compute), ["changed"])
+            self.assertEqual(compute.call_count, 4)
+            self.assertEqual(resumed.reused, ["ranking"])
+            self.assertEqual(resumed.prune(3600, now=datetime.now().timestamp() + 7200), 3)
+            self.assertEqual(list(root.glob("*.json")), [])
+
+    def test_stage_graph_runs_independent_stages_together_and_reports_critical_path(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def branch(value):
+            def run(script):
+                barrier.wait()
+                return f"{script}:{value}"
+
+            return run
+
+        graph = StageGraph(
+            [
+                Stage(
+                    "render",
+                    lambda translated, clips, narration: (translated, clips, narration),
+                    ("translated", "clips", "narration"),
+                    ("video",),
+                ),
+                Stage("script", lambda plan: f"{plan}-script", ("plan",), ("script",)),
+                Stage("translation", branch("en"), ("script",), ("translated",)),
+                Stage("clips", branch("clips"), ("script",), ("clips",)),
+                Stage("narration", branch("audio"), ("script",), ("narration",)),
+            ]
+        )
+        result = graph.run({"plan": "p"})
+        self.assertEqual(result.values["video"], ("p-script:en", "p-script:clips", "p-script:audio"))
+        self.assertEqual(result.critical_path[0], "script")
+        self.assertEqual(result.critical_path[-1], "render")
+        self.assertEqual(len(result.critical_path), 3)
+        timed = StageGraph(
+            [
+                Stage("a", lambda: 1, outputs=("x",)),
+                Stage("b", lambda x: 2, ("x",), ("y",)),
+                Stage("c", lambda x: 3, ("x",), ("z",)),
+                Stage("d", lambda y, z: 4, ("y", "z")),
+            ]
+        )
+        self.assertEqual(
+            timed.critical_path({"a": (0, 1), "b": (1, 4), "c": (1, 2), "d": (4, 5)}),
+            (["a", "b", "d"], 5),
+        )
+        skipped = MagicMock()
+        failing = StageGraph(
+            [
+                Stage("a", MagicMock(side_effect=QualityGateError("실패")), outputs=("x",)),
+                Stage("b", skipped, ("x",)),
+            ]
+        )
+        with self.assertRaises(QualityGateError):
+            failing.run()
+        skipped.assert_not_called()
+        with self.assertRaisesRegex(ValueError, "순환"):
+            StageGraph([Stage("a", print, ("y",), ("x",)), Stage("b", print, ("x",), ("y",))])
+
     def test_ai_can_only_rank_verified_candidate_ids(self):
         writer = GeminiWriter.__new__(GeminiWriter)
-        writer._generate = lambda prompt, schema, temperature: {
+        writer._generate = lambda step, prompt, schema, temperature: {
             "candidate_ids": [2, 99, 2, 1],
             "trend_reason": "시각적으로 설명하기 좋습니다.",
         }
@@ -187,9 +449,42 @@ class PipelineTests(unittest.TestCase):
             [candidates[2].topic, candidates[1].topic, candidates[0].topic],
         )
 
+    def test_topic_ranking_prefilters_prompt_and_falls_back_to_local_matcher(self):
+        signals = [{"title": "북극 오로라 실시간", "tags": ["aurora"], "views": 5000}]
+        prompts = []
+
+        def failing(step, prompt, schema, temperature):
+            prompts.append(prompt)
+            raise GeminiError("모든 제공자 실패")
+
+        writer = GeminiWriter.__new__(GeminiWriter)
+        writer._generate = failing
+        with patch.dict("os.environ", {"RANK_PROMPT_CANDIDATES": "3"}):
+            ranked = writer.rank_topics(signals, [], [], list(VERIFIED_TOPICS), limit=3)
+        self.assertIn("오로라", ranked[0].topic)
+        self.assertEqual(prompts[0].count('"source_title"'), 3)
+        self.assertEqual(len(ranked), 3)
+
+    def test_candidate_ranking_materializes_only_the_prompt_shortlist(self):
+        fresh = TopicCatalog(VERIFIED_TOPICS.path)
+        writer = MagicMock()
+        writer.rank_topics.side_effect = lambda signals, recent, top, candidates, **kwargs: candidates
+        performance = MagicMock()
+        performance.top_topics.return_value = []
+        performance.category_scores.return_value = {}
+        with patch("main.VERIFIED_TOPICS", fresh), patch("main.scheduled_plans", return_value=[]), patch.dict(
+            "os.environ", {"RANK_PROMPT_CANDIDATES": "9"}
+        ):
+            ranked = rank_candidate_plans(
+                writer, [{"title": "북극 오로라", "views": 10}], [], performance, np.arange(len(fresh))
+            )
+        self.assertEqual(len(fresh._plans), 9)
+        self.assertEqual(len(ranked), 9)
+        self.assertIn("오로라", ranked[0].topic)
+
     def test_editorial_review_requires_80_points(self):
         writer = GeminiWriter.__new__(GeminiWriter)
-        writer._generate = lambda prompt, schema, temperature: {
+        writer._generate = lambda step, prompt, schema, temperature: {
             "approved": True,
             "score": 79,
             "facts_supported": True,
@@ -201,6 +496,74 @@ class PipelineTests(unittest.TestCase):
         self.assertFalse(review["approved"])
         self.assertEqual(review["score"], 79)
 
+    def test_local_prereview_rejects_numbers_missing_from_source(self):
+        source = replace(
+            self.source,
+            extract=(
+                "생물발광은 생물의 몸속에서 일어나는 화학 반응으로 빛 에너지를 만드는 현상이다. "
+                "루시페린 같은 발광 물질과 효소가 산소와 반응하며 열이 적은 차가운 빛을 낸다. "
+                "심해 생물은 먹이를 유인하거나 포식자를 피하고 같은 종끼리 신호를 보낼 때 빛을 쓴다. "
+                "반딧불이와 일부 버섯도 생물발광을 한다. 쓰임은 생물마다 다르다."
+            ),
+        )
+        self.assertTrue(prereview_script(source, self.script)["approved"])
+        script = replace(
+            self.script,
+            narration=self.script.narration.replace(
+                "반딧불이와", "NASA 조사로는 약 1500종의 반딧불이와"
+            ),
+        )
+        review = prereview_script(source, script)
+        self.assertFalse(review["approved"])
+        kinds = {item["kind"]: item["text"] for item in review["issues"]}
+        self.assertEqual(kinds["number"], "1500종")
+        self.assertEqual(kinds["entity"], "NASA")
+
+    def test_source_extract_is_cached_once_per_candidate(self):
+        writer = GeminiWriter.__new__(GeminiWriter)
+        writer.github_token = ""
+        writer.api_keys = ["gemini-key"]
+        writer.requested_model = "gemini-2.5-flash"
+        writer.context_cache = ContextCache()
+        requests_sent = []
+
+        def post(url, **kwargs):
+            requests_sent.append((url, kwargs["json"]))
+            response = MagicMock(ok=True)
+            if url.endswith("/cachedContents"):
+                response.json.return_value = {"name": "cachedContents/abc"}
+            else:
+                body = {
+                    "approved": True,
+                    "score": 90,
+                    "facts_supported": True,
+                    "natural_korean": True,
+                    "visualizable": True,
+                    "issues": [],
+                }
+                response.json.return_value = {
+                    "candidates": [{"content": {"parts": [{"text": json.dumps(body)}]}}],
+                    "usageMetadata": {"promptTokenCount": 900, "cachedContentTokenCount": 700},
+                }
+            return response
+
+        writer.session = MagicMock()
+        writer.session.post.side_effect = post
+        for _ in range(2):
+            self.assertTrue(writer.review_script(self.plan, self.source, self.script)["approved"])
+        urls = [url for url, _ in requests_sent]
+        self.assertEqual(urls.count(f"{API_BASE}/cachedContents"), 1)
+        generate_calls = [body for url, body in requests_sent if url.endswith(":generateContent")]
+        self.assertEqual(len(generate_calls), 2)
+        tail = generate_calls[0]["contents"][0]["parts"][0]["text"]
+        self.assertNotIn(self.source.extract[:40], tail)
+        self.assertEqual(generate_calls[0]["cachedContent"], "cachedContents/abc")
+        summary = writer.context_cache.summary()
+        self.assertEqual(summary["cached_tokens"], 1400)
+        self.assertEqual(summary["billed_prompt_tokens"], 400)
+        writer.release_contexts()
+        writer.session.delete.assert_called_once()
+
     def test_closing_loop_must_end_the_narration(self):
         script = replace(self.script, closing_loop="다른 마지막 문장입니다.")
         with self.assertRaises(QualityGateError):
@@ -293,7 +656,7 @@ class PipelineTests(unittest.TestCase):
 
     def test_caption_translation_keeps_exact_chunk_order(self):
         writer = GeminiWriter.__new__(GeminiWriter)
-        writer._generate = lambda prompt, schema, temperature: {
+        writer._generate = lambda step, prompt, schema, temperature: {
             "translations": ["Why does it glow?", "It is a chemical reaction."],
         }
         translated = writer.translate_caption_chunks(
@@ -306,12 +669,44 @@ class PipelineTests(unittest.TestCase):
 
     def test_caption_translation_rejects_wrong_count(self):
         writer = GeminiWriter.__new__(GeminiWriter)
-        writer._generate = lambda prompt, schema, temperature: {
+        writer._generate = lambda step, prompt, schema, temperature: {
             "translations": ["Only one caption"],
         }
         with self.assertRaises(GeminiError):
             writer.translate_caption_chunks(["첫 자막", "둘째 자막"])
 
+    def test_caption_translation_memory_sends_only_new_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "memory.json"
+            memory = TranslationMemory(path)
+            memory.put("처음 장면을 다시 보면...", "Now look at the first scene again…")
+            memory.save()
+            writer = GeminiWriter.__new__(GeminiWriter)
+            writer.translation_memory = TranslationMemory(path)
+            prompts = []
+
+            def generate(step, prompt, schema, temperature):
+                prompts.append(prompt)
+                return {"translations": ["Why does it glow?"]}
+
+            writer._generate = generate
+            translated = writer.translate_caption_chunks(
+                ["왜 빛날까요?", "처음  장면을 다시 보면…", "왜 빛날까요?"]
+            )
+            self.assertEqual(
+                translated,
+                ["Why does it glow?", "Now look at the first scene again…", "Why does it glow?"],
+            )
+            self.assertEqual(len(prompts), 1)
+            self.assertNotIn("처음 장면", prompts[0])
+            self.assertEqual(TranslationMemory(path).get("왜 빛날까요?"), "Why does it glow?")
+
+            saved = path.read_text(encoding="utf-8")
+            writer.translate_caption_chunks(["왜 빛날까요?", "처음 장면을 다시 보면…"])
+            self.assertEqual(len(prompts), 1)
+            self.assertEqual(path.read_text(encoding="utf-8"), saved)
+            self.assertNotIn("hits", saved)
+
     def test_audio_is_voice_only_without_synthetic_tones(self):
         self.assertEqual(AUDIO_MIX_MODE, "voice_only")
         renderer_source = (ROOT / "src" / "video_renderer.py").read_text(encoding="utf-8")
@@ -367,10 +762,473 @@ class PipelineTests(unittest.TestCase):
                 self.assertEqual(audio_file.getframerate(), 24000)
                 self.assertEqual(audio_file.getnchannels(), 1)
 
+    def test_unchanged_narration_is_served_from_cache_without_synthesis(self):
+        prepared = prepare_narration_text(self.script.narration)
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            normalized = root / "narration.m4a"
+            normalized.write_bytes(b"normalized-audio")
+            raw = root / "narration_raw.mp3"
+            raw.write_bytes(b"raw-audio")
+            cache = NarrationCache(root / "cache")
+            voice, key = narration_cache_keys(prepared, use_gemini=False)[0]
+            cache.store(key, {"raw": raw, "normalized": normalized}, 48.5, {"narration_voice": voice})
+            output = root / "render"
+            with patch.dict("os.environ", {"GEMINI_API_KEY": "", "GOOGLE_API_KEY": ""}), patch(
+                "video_renderer._synthesize_edge_tts", side_effect=AssertionError("합성 호출")
+            ), patch("video_renderer._run", side_effect=AssertionError("ffmpeg 호출")):
+                path, duration, metadata = create_narration(self.script.narration, output, cache=cache)
+            self.assertEqual(path.read_bytes(), b"normalized-audio")
+            self.assertEqual(duration, 48.5)
+            self.assertEqual(metadata["narration_cache"], "hit")
+            self.assertEqual(metadata["narration_voice"], EDGE_TTS_VOICES[0])
+
+    def test_default_narration_synthesizes_whole_script_once(self):
+        calls = []
+
+        async def synthesize(text, output, voice):
+            calls.append(text)
+            output.write_bytes(b"mp3")
+
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            "os.environ", {"GEMINI_API_KEY": "", "GOOGLE_API_KEY": "", "NARRATION_SYNTHESIS": ""}
+        ), patch("video_renderer._synthesize_edge_tts", side_effect=synthesize), patch(
+            "video_renderer._run", side_effect=AssertionError("중간 AAC 인코딩")
+        ), patch("video_renderer.media_duration", return_value=45.0), patch(
+            "video_renderer.measure_loudness", return_value=LOUDNESS
+        ) as measure:
+            path, duration, metadata = create_narration(self.script.narration, Path(directory))
+        self.assertEqual(calls, [prepare_narration_text(self.script.narration)])
+        self.assertEqual(path.suffix, ".flac")
+        self.assertEqual(measure.call_args[0][1], path)
+        self.assertEqual(duration, 45.0)
+        self.assertEqual(metadata["synthesis_mode"], "single")
+        # 정규화는 최종 인코딩 한 번에 측정값으로 적용된다.
+        self.assertIn("measured_I=-23.10:", metadata["audio_filter"])
+        self.assertIn("linear=true", metadata["audio_filter"])
+        self.assertTrue(metadata["audio_filter"].endswith("alimiter=limit=0.95"))
+        self.assertEqual(metadata["narration_voice"], EDGE_TTS_VOICES[0])
+        self.assertNotIn("sentence_spans", metadata)
+
+    def test_parallel_narration_stitches_sentences_and_anchors_captions(self):
+        groups = narration_sentence_groups(prepare_narration_text(self.script.narration))
+        self.assertGreater(len(groups), 1)
+        voiced = pcm_tone(8.0, lead=0.1, tail=0.2)
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            "os.environ", {"GEMINI_API_KEY": "key", "NARRATION_SYNTHESIS": "parallel"}
+        ), patch("video_renderer._gemini_tts_pcm", return_value=(voiced, 24000)) as synthesize, patch(
+            "video_renderer.measure_loudness", side_effect=AssertionError("FFmpeg 측정")
+        ), patch("video_renderer.media_duration", side_effect=AssertionError("ffprobe 호출")):
+            output = Path(directory)
+            _, _, metadata = create_narration(self.script.narration, output)
+            with wave.open(str(output / "narration_raw.wav"), "rb") as audio_file:
+                raw_seconds = audio_file.getnframes() / audio_file.getframerate()
+        self.assertEqual(synthesize.call_count, len(groups))
+        self.assertEqual(metadata["synthesis_mode"], "parallel")
+        self.assertEqual(len(metadata["sentence_latency_seconds"]), len(groups))
+        spans = metadata["sentence_spans"]
+        self.assertEqual([span[2] for span in spans], groups)
+        # 앞뒤 무음은 걷어 내고 문장 사이에는 일정한 쉼만 남는다.
+        self.assertAlmostEqual(raw_seconds, len(groups) * 8.06 + (len(groups) - 1) * 0.32, places=2)
+        # WAV 원본은 프로세스 안에서 측정해 고정 이득으로 정규화한다.
+        self.assertAlmostEqual(metadata["loudness_analysis"]["integrated_lufs"], -23.0, delta=0.3)
+        self.assertIn("volume=", metadata["audio_filter"])
+        self.assertNotIn("loudnorm", metadata["audio_filter"])
+        self.assertGreater(spans[1][0], spans[0][1])
+        timeline = caption_timeline(self.script.narration, 40.0, spans)
+        second_group_start = len(groups[0]) + 1
+        position = 0
+        for start, _, chunk in timeline:
+            if position == second_group_start:
+                self.assertAlmostEqual(start, spans[1][0])
+            position += len(chunk) + 1
+        self.assertAlmostEqual(timeline[-1][1], 40.0)
+
+    def test_pcm_analysis_measures_loudness_peak_and_silence(self):
+        pcm = pcm_tone(3.0, sample_rate=48000) + pcm_tone(2.0, amplitude=0.0, sample_rate=48000)
+        pcm += pcm_tone(3.0, sample_rate=48000)
+        analysis = analyze_pcm(pcm, 48000)
+        self.assertAlmostEqual(analysis.duration, 8.0)
+        # 997Hz 사인파는 피크 dBFS보다 3dB 낮은 LUFS로 측정되어야 한다.
+        self.assertAlmostEqual(analysis.integrated_lufs, -23.0, delta=0.3)
+        self.assertAlmostEqual(analysis.true_peak_dbtp, -20.0, delta=0.1)
+        self.assertEqual(len(analysis.silence_spans), 1)
+        start, end = analysis.silence_spans[0]
+        self.assertAlmostEqual(start, 3.0, delta=0.03)
+        self.assertAlmostEqual(end, 5.0, delta=0.03)
+        self.assertAlmostEqual(analysis.normalization_gain(), 7.0, delta=0.3)
+
+    def test_quiet_narration_with_sharp_peaks_reaches_target_through_limiter(self):
+        samples = np.frombuffer(pcm_tone(8.0, amplitude=0.02, sample_rate=48000), dtype="<i2").copy()
+        samples[::12000] = int(0.18 * 32767)
+        analysis = analyze_pcm(samples.tobytes(), 48000)
+        # 트루 피크 한도만으로 이득을 자르면 목표 음량에 한참 못 미친다.
+        peak_only = analysis.normalization_gain(limiter_headroom=0.0)
+        self.assertLess(analysis.expected_lufs(peak_only), -18.0)
+        gain = narration_gain(analysis)
+        self.assertAlmostEqual(analysis.expected_lufs(gain), -16.0, delta=0.1)
+        chain = mastering_filter(1.0, None, gain)
+        self.assertLess(chain.index("volume="), chain.index("alimiter="))
+        self.assertIn("level=disabled", chain)
+        samples[::12000] = 32767
+        with self.assertLogs("video_renderer", "WARNING"):
+            narration_gain(analyze_pcm(samples.tobytes(), 48000))
+
+    def test_streamed_narration_feeds_ffmpeg_without_raw_file(self):
+        second = b"\x01\x00" * 24000
+        process = MagicMock()
+        process.wait.return_value = 0
+        process.stderr.read.return_value = json.dumps(
+            {
+                "input_i": "-23.10", "input_tp": "-4.20", "input_lra": "6.30",
+                "input_thresh": "-33.40", "target_offset": "0.20",
+            }
+        ).encode("utf-8")
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            "os.environ", {"GEMINI_API_KEY": "key", "NARRATION_SYNTHESIS": "stream"}
+        ), patch(
+            "video_renderer._gemini_tts_stream", return_value=iter([(second * 10, 24000)] * 4)
+        ), patch("video_renderer.subprocess.Popen", return_value=process) as popen, patch(
+            "video_renderer.media_duration", side_effect=AssertionError("ffprobe 호출")
+        ), patch("video_renderer._run", side_effect=AssertionError("추가 인코딩")):
+            output = Path(directory)
+            _, duration, metadata = create_narration(self.script.narration, output)
+            self.assertFalse((output / "narration_raw.wav").exists())
+        command = popen.call_args[0][0]
+        self.assertIn("pipe:0", command)
+        self.assertEqual(command[command.index("-ar") + 1], "24000")
+        self.assertEqual(process.stdin.write.call_count, 4)
+        self.assertAlmostEqual(duration, 40.0)
+        self.assertEqual(metadata["synthesis_mode"], "stream")
+        self.assertIn("flac", command)
+        self.assertIn("measured_TP=-4.20", metadata["audio_filter"])
+
+    def test_edge_voice_race_prefers_earlier_voice_and_cancels_the_rest(self):
+        finished = []
+
+        async def synthesize(text, output, voice):
+            if voice == EDGE_TTS_VOICES[0]:
+                await asyncio.sleep(0.05)
+                raise RuntimeError("endpoint down")
+            if voice == EDGE_TTS_VOICES[2]:
+                await asyncio.sleep(1.0)
+            # 48kbps 고정 비트레이트 기준 40초 분량
+            output.write_bytes(b"\xff" * 240000)
+            finished.append(voice)
+
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            "os.environ", {"EDGE_TTS_RACE": "3", "EDGE_TTS_RACE_STAGGER": "0.01"}
+        ), patch("video_renderer._synthesize_edge_tts", side_effect=synthesize):
+            output = Path(directory)
+            raw, engine, voice = _synthesize_whole("대본", output, None)
+            leftovers = sorted(item.name for item in output.iterdir())
+        self.assertEqual(voice, EDGE_TTS_VOICES[1])
+        self.assertEqual(raw.name, "narration_raw.mp3")
+        self.assertEqual(finished, [EDGE_TTS_VOICES[1]])
+        self.assertEqual(leftovers, ["narration_raw.mp3"])
+
+    def test_duration_model_fits_voice_history_and_persists(self):
+        texts = [self.script.narration[: 120 + index * 20] for index in range(10)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "narration_durations.json"
+            model = DurationModel(path)
+            self.assertEqual(model.predict(texts[0], "voice/single").method, "prior")
+            for text in texts:
+                features = duration_features(text)
+                model.record(text, "voice/single", 1.0 + 0.2 * features[1] + 0.4 * features[3])
+            model.save()
+            prediction = DurationModel(path).predict(self.script.narration, "voice/single")
+        features = duration_features(self.script.narration)
+        self.assertEqual(prediction.method, "fitted")
+        self.assertEqual(prediction.samples, 10)
+        self.assertAlmostEqual(prediction.seconds, 1.0 + 0.2 * features[1] + 0.4 * features[3], delta=0.5)
+
+    def test_long_predicted_narration_is_rewritten_before_review(self):
+        writer = MagicMock()
+        writer.write_script.return_value = self.script
+        with tempfile.TemporaryDirectory() as directory, patch("main.validate_package"), patch(
+            "main.expected_narration_key", return_value="voice/single"
+        ):
+            model = DurationModel(Path(directory) / "narration_durations.json")
+            # 같은 음성의 기록이 이 대본을 기준보다 훨씬 길게 읽는다고 알려 준다.
+            model.record(self.script.narration, "voice/single", 90.0)
+            with self.assertRaises(QualityGateError):
+                create_editorial_script(writer, self.plan, self.source, [], duration_model=model)
+        writer.review_script.assert_not_called()
+        feedback = writer.write_script.call_args_list[1].kwargs["editorial_feedback"]
+        self.assertIn("너무 깁니다", feedback[0])
+
+    def test_state_store_migrates_json_and_keeps_full_history(self):
+        videos = [
+            {
+                "published_at": f"2026-01-{index + 1:02d}T00:00:00+00:00",
+                "topic": f"주제 {index}",
+                "video_id": f"id{index}",
+                "metrics": {"views": index * 7 % 11, "likes": index % 3, "comments": 0},
+            }
+            for index in range(20)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            legacy = root / "published_topics.json"
+            legacy.write_text(json.dumps({"version": 1, "videos": videos}), encoding="utf-8")
+            with StateStore(root / "state.sqlite3", legacy_json=legacy) as store:
+                self.assertEqual(store.count(), 20)
+                self.assertEqual(store.recent_topics(3), ["주제 17", "주제 18", "주제 19"])
+                self.assertTrue(store.update_metrics({"id0": {"views": 500, "likes": 1, "comments": 2}}))
+                self.assertFalse(store.update_metrics({"id0": {"views": 500, "likes": 1, "comments": 2}}))
+                self.assertEqual(store.videos()[0]["metrics"]["views"], 500)
+                snapshots = store.connection.execute(
+                    "SELECT COUNT(*) FROM metric_snapshots WHERE video_id = 'id0'"
+                ).fetchone()[0]
+                self.assertGreaterEqual(snapshots, 1)
+                store.add_video(
+                    {**videos[0], "video_id": "new", "published_at": "2026-02-01", "preview_run_id": "77"}
+                )
+                self.assertEqual(store.find_preview("77")["video_id"], "new")
+                store.export_json(legacy, limit=10)
+            exported = json.loads(legacy.read_text(encoding="utf-8"))["videos"]
+            with StateStore(root / "state.sqlite3", legacy_json=legacy) as reopened:
+                # JSON 내보내기는 잘려도 데이터베이스는 전체 기록을 유지한다.
+                self.assertEqual(reopened.count(), 21)
+            with StateStore(root / "restored.sqlite3", legacy_json=legacy) as restored:
+                # 캐시된 데이터베이스가 없으면 커밋된 내보내기에서 다시 만든다.
+                self.assertEqual(restored.video_ids(), [record["video_id"] for record in exported])
+                restored.update_metrics({"new": {"views": 900, "likes": 0, "comments": 0}})
+            with StateStore(root / "restored.sqlite3", legacy_json=legacy) as restored:
+                self.assertEqual(restored.videos()[-1]["metrics"]["views"], 900)
+        self.assertEqual(len(exported), 10)
+        self.assertEqual(exported[-1]["video_id"], "new")
+
+    def test_metrics_refresh_fetches_only_videos_due_by_age(self):
+        now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        requested = []
+
+        def fake_get(url, params, timeout):
+            ids = params["id"].split(",")
+            requested.extend(ids)
+            response = MagicMock()
+            response.json.return_value = {
+                "items": [{"id": item, "statistics": {"viewCount": "10"}} for item in ids if item != "gone"]
+            }
+            return response
+
+        with tempfile.TemporaryDirectory() as directory, patch("metrics.requests.get", side_effect=fake_get):
+            with StateStore(Path(directory) / "state.sqlite3") as store:
+                for video_id, age in (("fresh", 1), ("week", 10), ("old", 60), ("gone", 2)):
+                    store.add_video(
+                        {"video_id": video_id, "published_at": (now - timedelta(days=age)).isoformat()}
+                    )
+                self.assertTrue(refresh_due_metrics(store, "key", now))
+                self.assertEqual(sorted(requested), ["fresh", "gone", "old", "week"])
+                requested.clear()
+                self.assertFalse(refresh_due_metrics(store, "key", now + timedelta(hours=2)))
+                self.assertEqual(sorted(requested), ["fresh", "gone"])
+                requested.clear()
+                refresh_due_metrics(store, "key", now + timedelta(days=2))
+                self.assertEqual(sorted(requested), ["fresh", "gone", "week"])
+
+    def test_quota_ledger_keeps_upload_reservation(self):
+        now = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as directory, patch("trend_scout._http_session") as session:
+            get = session.return_value.get
+            get.return_value.status_code = 200
+            get.return_value.json.return_value = {"items": []}
+            with StateStore(Path(directory) / "state.sqlite3") as store:
+                ledger = QuotaLedger(store, daily_limit=1601, now=now)
+                fetch_youtube_trends("key", ["KR"], ["0", "28"], ledger=ledger)
+                # 업로드 예약 1600을 빼면 부가 호출에는 1단위만 남는다.
+                self.assertEqual(get.call_count, 1)
+                self.assertEqual(ledger.optional_budget(), 0)
+                ledger.require("videos.insert")
+                self.assertTrue(ledger.spend("videos.insert", essential=True))
+                self.assertEqual(ledger.summary()["by_call_site"], {"videos.list": 1, "videos.insert": 1600})
+                with self.assertRaises(QuotaExceeded):
+                    ledger.require("videos.insert")
+                # 태평양 시간 자정이 지나면 새 한도다.
+                self.assertEqual(QuotaLedger(store, daily_limit=1601, now=now + timedelta(days=1)).used(), 0)
+
+    def test_trend_cache_skips_fresh_charts_and_revalidates_with_etag(self):
+        chart = MagicMock(status_code=200, headers={})
+        chart.json.return_value = {
+            "etag": "v1",
+            "items": [{"snippet": {"title": "오로라 타임랩스"}, "statistics": {"viewCount": "90"}}],
+        }
+        with tempfile.TemporaryDirectory() as directory, patch("trend_scout._http_session") as session:
+            cache_path = Path(directory) / "trends.json"
+            get = session.return_value.get
+            get.return_value = chart
+            first = fetch_youtube_trends("key", ["KR"], ["0", "28"], cache_path=cache_path)
+            self.assertEqual(get.call_count, 2)
+            self.assertEqual(len(first), 1)
+            fetch_youtube_trends("key", ["KR"], ["0", "28"], cache_path=cache_path)
+            self.assertEqual(get.call_count, 2)
+            get.return_value = MagicMock(status_code=304)
+            with patch.dict("os.environ", {"TREND_CACHE_HOURS": "0"}):
+                revalidated = fetch_youtube_trends("key", ["KR"], ["28"], cache_path=cache_path)
+        self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": "v1"})
+        self.assertEqual(revalidated[0]["title"], "오로라 타임랩스")
+
+    def test_performance_normalizes_by_age_and_uses_snapshot_velocity(self):
+        now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as directory:
+            with StateStore(Path(directory) / "state.sqlite3") as store:
+                for video_id, age, views, category in (
+                    ("old", 300, 9000, "space"),
+                    ("young", 2, 3000, "nature"),
+                    ("flat", 40, 900, "space"),
+                    ("mid", 20, 1500, "science"),
+                    ("new", 1, 200, "nature"),
+                ):
+                    store.add_video(
+                        {
+                            "video_id": video_id,
+                            "topic": f"{video_id} 주제",
+                            "category": category,
+                            "published_at": (now - timedelta(days=age)).isoformat(),
+                        }
+                    )
+                    store.update_metrics(
+                        {video_id: {"views": views, "likes": 0, "comments": 0}},
+                        (now - timedelta(days=4)).isoformat(),
+                    )
+                store.update_metrics(
+                    {"young": {"views": 5000, "likes": 10, "comments": 0}}, now.isoformat()
+                )
+                report = load_performance(store, now)
+        self.assertEqual(report.top_topics(1), ["young 주제"])
+        young = list(report.video_ids).index("young")
+        # 4일 동안 3000 → 5000+좋아요 10×20
+        self.assertAlmostEqual(report.velocity[young], 2200 / 4)
+        self.assertEqual(report.category_stats["space"]["videos"], 2)
+        self.assertGreater(report.category_scores()["nature"], report.category_scores()["space"])
+
+    def test_performance_top_topics_orders_same_age_videos_by_engagement(self):
+        published = "2026-02-01T00:00:00+00:00"
+        videos = [
+            ("a", published, "a 주제", "space", 100, 0, 0),
+            ("b", published, "b 주제", "space", 10, 10, 0),
+            ("c", published, "c 주제", "nature", 5, 0, 10),
+            ("c2", published, "c 주제", "nature", 50, 0, 0),
+            ("e", published, "e 주제", "science", 300, 0, 0),
+        ]
+        report = analyze_performance(videos, [], datetime(2026, 3, 1, tzinfo=timezone.utc))
+        # 좋아요 20배·댓글 40배 가중치로 c(405) > e(300) > b(210) > a(100)이고, 같은 주제는 한 번만 나온다.
+        self.assertEqual(report.top_topics(5), ["c 주제", "e 주제", "b 주제", "a 주제"])
+        self.assertEqual(report.top_topics(2), ["c 주제", "e 주제"])
+
+    def test_narration_cache_evicts_least_recently_used_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            audio = root / "narration.m4a"
+            audio.write_bytes(b"x" * 600)
+            cache = NarrationCache(root / "cache", max_bytes=1500)
+            for key in ("old", "middle", "new"):
+                cache.store(key, {"normalized": audio}, 40.0, {})
+            self.assertFalse((root / "cache" / "old").exists())
+            self.assertTrue((root / "cache" / "new").exists())
+            self.assertIsNotNone(cache.load("new", root / "out"))
+
     def test_gemini_json_parser_accepts_code_fence(self):
         value = GeminiWriter._parse_json('```json\n{"topic":"구름"}\n```')
         self.assertEqual(value, {"topic": "구름"})
 
+    def test_incremental_json_emits_fields_as_they_complete(self):
+        parser = IncrementalJsonObject()
+        self.assertEqual(parser.feed('```json\n{"hook": "왜 빛날'), [])
+        self.assertEqual(parser.feed('까요?", "tags": ["a", "b'), [("hook", "왜 빛날까요?")])
+        self.assertEqual(parser.feed('\\"c"], "score": 8'), [("tags", ["a", 'b"c'])])
+        self.assertEqual(parser.feed("1}"), [("score", 81)])
+        self.assertTrue(parser.done)
+
+    def test_streaming_script_aborts_on_out_of_range_narration(self):
+        writer = GeminiWriter.__new__(GeminiWriter)
+        writer.streaming = True
+        writer.github_token = "token"
+        writer.github_model = "openai/gpt-4.1"
+        writer.api_keys = ["gemini-key"]
+        consumed = []
+
+        def lines():
+            for piece in (
+                '{"title": "빛", ',
+                '"hook": "빛을 냅니다.", ',
+                '"narration": "빛은 짧게 설명할 수 없습니다.", ',
+                '"description_intro": "',
+            ):
+                consumed.append(piece)
+                event = {"choices": [{"delta": {"content": piece}}]}
+                yield ("data: " + json.dumps(event, ensure_ascii=False)).encode("utf-8")
+
+        response = MagicMock(ok=True)
+        response.iter_lines.return_value = lines()
+        writer.session = MagicMock()
+        writer.session.post.return_value = response
+        with self.assertRaises(DraftRejectedError):
+            writer.write_script(self.plan, self.source)
+        self.assertEqual(len(consumed), 3)
+        response.close.assert_called_once()
+        self.assertEqual(writer.session.post.call_count, 1)
+        self.assertTrue(writer.session.post.call_args.kwargs["json"]["stream"])
+
+    def test_ai_calls_are_recorded_per_step_with_usage_and_fallback(self):
+        writer = GeminiWriter.__new__(GeminiWriter)
+        writer.github_token = "token"
+        writer.github_model = "openai/gpt-4.1"
+        writer.api_keys = ["gemini-key"]
+        writer.requested_model = "gemini-2.5-flash"
+        failed = MagicMock(ok=False, status_code=429, text="rate limited", reason="Too Many")
+        failed.json.return_value = {"error": {"message": "rate limited"}}
+        succeeded = MagicMock(ok=True)
+        succeeded.json.return_value = {
+            "output_text": '{"candidate_ids": [0], "trend_reason": "좋습니다."}',
+            "usage": {"total_input_tokens": 321, "total_output_tokens": 12},
+        }
+        writer.session = MagicMock()
+        writer.session.post.side_effect = [failed, succeeded]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "llm_calls.jsonl"
+            writer.call_log = CallLog(path)
+            writer.rank_topics([], [], [], list(VERIFIED_TOPICS[:2]), limit=2)
+            lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([item["outcome"] for item in lines], ["error", "ok"])
+        self.assertEqual([item["attempt"] for item in lines], [1, 2])
+        self.assertEqual({item["step"] for item in lines}, {"rank_topics"})
+        self.assertEqual(lines[1]["provider"], "gemini")
+        self.assertEqual(lines[1]["prompt_tokens"], 321)
+        summary = writer.call_log.summary()
+        self.assertEqual(summary[0]["step"], "rank_topics")
+        self.assertEqual(summary[-1]["step"], "total")
+        self.assertEqual(summary[-1]["calls"], 2)
+        self.assertEqual(summary[-1]["failures"], 1)
+
+    def test_writer_runs_the_editorial_loop_against_the_local_stand_in(self):
+        with StandInServer(StandInConfig(seed=1)) as server:
+            environment = {
+                **server.environment(),
+                "GITHUB_MODELS_TOKEN": "standin-token",
+                "GEMINI_API_KEY": "standin-key",
+            }
+            for streaming in ("0", "1"):
+                with patch.dict("os.environ", {**environment, "AI_STREAMING": streaming}):
+                    writer = GeminiWriter()
+                ranked = writer.rank_topics([], [], [], list(VERIFIED_TOPICS[:3]), limit=3)
+                self.assertEqual(len(ranked), 3)
+                script = writer.write_script(self.plan, self.source)
+                validate_package(self.plan, script, self.source, [])
+                self.assertTrue(writer.review_script(self.plan, self.source, script)["approved"])
+                chunks = split_caption_chunks(script.narration)
+                self.assertEqual(len(writer.translate_caption_chunks(chunks)), len(chunks))
+                self.assertTrue(all(event["outcome"] == "ok" for event in writer.call_log.events))
+
+            with patch.dict("os.environ", environment):
+                writer = GeminiWriter()
+            writer.github_endpoint = f"{server.base_url}/missing"
+            writer.rank_topics([], [], [], list(VERIFIED_TOPICS[:2]), limit=2)
+            self.assertEqual(
+                [event["provider"] for event in writer.call_log.events], ["github", "gemini"]
+            )
+
     def test_gemini_interaction_text_is_extracted(self):
         value = GeminiWriter._extract_interaction_text(
             {
@@ -460,4 +1318,4 @@ class PipelineTests(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
-
+